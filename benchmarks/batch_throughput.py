@@ -0,0 +1,100 @@
+"""
+Compare rendering a directory of small scenes one at a time against
+'pytracer batch', in images per hour.
+
+    python benchmarks/batch_throughput.py --scenes 40 --size 48 -n 4
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from pytracer.batch import render_batch
+from pytracer.image import PPM
+from pytracer.pool import RenderPool
+from pytracer.render import render
+from pytracer.scenecache import load_scene_file
+
+SCENE = """
+camera:
+  hsize: {size}
+  vsize: {size}
+  field_of_view: "pi/3"
+  view_transform:
+    from: [0, 1.5, -5]
+    to: [0, 1, 0]
+    up: [0, 1, 0]
+
+shapes:
+  - sphere:
+      material:
+        color:
+          rgb: [{red}, {green}, {blue}]
+        reflective: 0.3
+      transforms:
+        - translation: [{x}, 1, 0]
+  - plane:
+      material:
+        color:
+          rgb: [200, 200, 200]
+
+lights:
+  - position: [-10, 10, -10]
+    color:
+      rgb: [255, 255, 255]
+"""
+
+
+def generate_scenes(directory: Path, count: int, size: int) -> list[str]:
+    rng = random.Random(0)
+    filenames = []
+    for i in range(count):
+        filename = directory / f"thumbnail{i:04}.yaml"
+        filename.write_text(
+            SCENE.format(
+                size=size,
+                red=rng.randrange(256),
+                green=rng.randrange(256),
+                blue=rng.randrange(256),
+                x=rng.uniform(-1, 1),
+            )
+        )
+        filenames.append(str(filename))
+    return filenames
+
+
+def one_at_a_time(filenames, output_dir, num_processes):
+    for filename in filenames:
+        camera, world = load_scene_file(filename)
+        canvas = render(camera, world, num_processes=num_processes, show_progress=False)
+        with open(Path(output_dir) / Path(filename).with_suffix(".ppm").name, "w") as f:
+            PPM.save(canvas, f)
+
+
+def batch(filenames, output_dir, num_processes):
+    with RenderPool(num_processes) as pool:
+        for _ in render_batch(filenames, pool, output_dir):
+            pass
+
+
+def main(scenes, size, num_processes):
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = generate_scenes(Path(directory), scenes, size)
+        print(f"{'mode':<16}{'seconds':>10}{'images/hour':>14}")
+        for name, run in (("one at a time", one_at_a_time), ("batch", batch)):
+            start = time.perf_counter()
+            run(filenames, directory, num_processes)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16}{elapsed:>10.2f}{scenes / elapsed * 3600:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=40)
+    parser.add_argument("--size", type=int, default=48)
+    parser.add_argument("-n", "--num-processes", type=int)
+    args = parser.parse_args()
+
+    main(**args.__dict__)
@@ -0,0 +1,69 @@
+"""
+Compare image formats on a rendered scene: file size and time to write,
+and PNG compression levels and thread counts.
+
+    python benchmarks/image_formats.py --scale 6 --threads 1 4
+
+The scene is rendered at --width x --height, then scaled up --scale times
+without interpolation, so large images don't take long to render.
+"""
+
+import argparse
+import io
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from pytracer.canvas import Canvas
+from pytracer.image import PNG, PPM, BinaryPPM
+from pytracer.render import render
+from pytracer.scenecache import load_scene_file
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def timed(save, canvas, binary):
+    destination = io.BytesIO() if binary else io.StringIO()
+    start = time.perf_counter()
+    save(canvas, destination)
+    elapsed = time.perf_counter() - start
+    return len(destination.getvalue()), elapsed
+
+
+def main(scene, width, height, scale, levels, threads):
+    camera, world = load_scene_file(scene)
+    camera.hsize, camera.vsize = width, height
+    pixels = render(camera, world, show_progress=False).pixels
+    canvas = Canvas.from_array(
+        np.ascontiguousarray(pixels.repeat(scale, axis=0).repeat(scale, axis=1))
+    )
+    print(f"{canvas.width}x{canvas.height}")
+    print(f"{'format':<24}{'MiB':>10}{'seconds':>10}")
+    runs = [("p3", PPM.save, False), ("p6", BinaryPPM.save, True)]
+    for level in levels:
+        for count in threads:
+            runs.append(
+                (
+                    f"png level {level}, {count} threads",
+                    partial(PNG.save, level=level, threads=count),
+                    True,
+                )
+            )
+    for name, save, binary in runs:
+        size, elapsed = timed(save, canvas, binary)
+        print(f"{name:<24}{size / 2**20:>10.2f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scene", default=str(EXAMPLES / "scene_reflection.yaml"))
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--scale", type=int, default=6)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    main(**args.__dict__)
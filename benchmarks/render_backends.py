@@ -0,0 +1,47 @@
+"""
+Compare render backends on the example scenes.
+
+    python benchmarks/render_backends.py --width 200 --height 100 -n 4
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from pytracer.render import BACKENDS, render
+from pytracer.scenecache import load_scene_file
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def main(width, height, num_processes, backends, scenes):
+    print(f"{'scene':<28}{'backend':<10}{'seconds':>10}")
+    for scene in scenes:
+        camera, world = load_scene_file(scene)
+        camera.hsize = width
+        camera.vsize = height
+        for backend in backends:
+            start = time.perf_counter()
+            render(
+                camera,
+                world,
+                num_processes=num_processes,
+                show_progress=False,
+                backend=backend,
+            )
+            elapsed = time.perf_counter() - start
+            print(f"{Path(scene).name:<28}{backend:<10}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=50)
+    parser.add_argument("-n", "--num-processes", type=int)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument(
+        "--scenes", nargs="+", default=sorted(str(p) for p in EXAMPLES.glob("*.yaml"))
+    )
+    args = parser.parse_args()
+
+    main(**args.__dict__)
@@ -0,0 +1,99 @@
+"""
+Compare loading a large scene from YAML, with the old pure Python loader
+and with libyaml, against loading its compiled copy.
+
+    python benchmarks/scene_startup.py --shapes 100000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import yaml as pyyaml
+
+from pytracer.scenecache import load_scene_file
+from pytracer.serialization import load
+
+HEADER = """
+camera:
+  hsize: 320
+  vsize: 240
+  field_of_view: "pi/3"
+  view_transform:
+    from: [0, 1.5, -5]
+    to: [0, 1, 0]
+    up: [0, 1, 0]
+
+materials:
+  red:
+    color:
+      rgb: [255, 0, 0]
+
+lights:
+  - position: [-10, 10, -10]
+
+shapes:
+"""
+
+SPHERE = """  - sphere:
+      material: red
+      transforms:
+        - scaling: [{scale}, {scale}, {scale}]
+        - rotation_y: "pi / 4"
+        - translation: [{x}, {y}, {z}]
+"""
+
+
+def generate_scene(filename: Path, shapes: int) -> None:
+    rng = random.Random(0)
+    with open(filename, "w") as f:
+        f.write(HEADER)
+        for _ in range(shapes):
+            f.write(
+                SPHERE.format(
+                    scale=round(rng.uniform(0.05, 0.2), 3),
+                    x=round(rng.uniform(-10, 10), 3),
+                    y=round(rng.uniform(0, 5), 3),
+                    z=round(rng.uniform(0, 20), 3),
+                )
+            )
+
+
+def pure_python(filename):
+    with open(filename) as f:
+        return load(pyyaml.load(f.read(), pyyaml.Loader))
+
+
+def libyaml(filename):
+    return load_scene_file(filename, use_cache=False)
+
+
+def compiled(filename):
+    return load_scene_file(filename)
+
+
+def main(shapes):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = Path(directory) / "scene.yaml"
+        generate_scene(filename, shapes)
+        # The first load compiles the scene
+        load_scene_file(str(filename))
+        print(f"{'loader':<16}{'seconds':>10}")
+        for name, run in (
+            ("pure python", pure_python),
+            ("libyaml", libyaml),
+            ("compiled", compiled),
+        ):
+            start = time.perf_counter()
+            run(str(filename))
+            print(f"{name:<16}{time.perf_counter() - start:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shapes", type=int, default=20000)
+    args = parser.parse_args()
+
+    main(**args.__dict__)
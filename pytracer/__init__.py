@@ -1,13 +1,70 @@
-from .camera import Camera  # noqa
-from .canvas import Canvas  # noqa
-from .color import Color  # noqa
-from .image import PPM  # noqa
-from .light import PointLight  # noqa
-from .materials import Material  # noqa
-from .matrix import Matrix  # noqa
-from .patterns import Pattern  # noqa
-from .primitives import Point, Vector3  # noqa
-from .ray import Intersection, Ray  # noqa
-from .render import render  # noqa
-from .shapes import Plane, Sphere  # noqa
-from .world import World  # noqa
+"""
+Names are imported from their modules on first use, so ``import pytracer``
+and the CLI don't pay for NumPy, YAML or rich until they are needed.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .camera import Camera  # noqa
+    from .canvas import Canvas  # noqa
+    from .color import Color  # noqa
+    from .image import PPM  # noqa
+    from .light import PointLight  # noqa
+    from .materials import Material  # noqa
+    from .matrix import Matrix  # noqa
+    from .patterns import Pattern  # noqa
+    from .primitives import Point, Vector3  # noqa
+    from .ray import Intersection, Ray  # noqa
+    from .render import render, render_async  # noqa
+    from .shapes import Plane, Sphere  # noqa
+    from .world import World  # noqa
+
+EXPORTS = {
+    "Camera": "camera",
+    "Canvas": "canvas",
+    "Color": "color",
+    "PPM": "image",
+    "PointLight": "light",
+    "Material": "materials",
+    "Matrix": "matrix",
+    "Pattern": "patterns",
+    "Point": "primitives",
+    "Vector3": "primitives",
+    "Intersection": "ray",
+    "Ray": "ray",
+    "render": "render",
+    "render_async": "render",
+    "Plane": "shapes",
+    "Sphere": "shapes",
+    "World": "world",
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name, value):
+        # Importing the pytracer.render module would otherwise replace the
+        # render function
+        if name == "render" and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,247 @@
+"""
+Keyframed animation.
+
+Shape transforms, the camera's view and light positions can be keyframed
+in a scene file's ``animation`` section:
+
+    animation:
+      frames: 48
+      shapes:
+        0:                      # index into shapes
+          - frame: 0
+            transforms:
+              - translation: [0, 1, 0]
+          - frame: 47
+            transforms:
+              - translation: [0, 3, 0]
+      camera:
+        - frame: 0
+          from: [0, 1.5, -5]
+          to: [0, 1, 0]
+          up: [0, 1, 0]
+      lights:
+        0:
+          - frame: 0
+            position: [-10, 10, -10]
+
+Values between keyframes are interpolated linearly, parameter by
+parameter, so the keyframes of a track must share their structure, such
+as the same transforms in the same order. Frames outside a track's
+keyframes hold its first or last value.
+
+Posing a frame only touches what is animated. The scene is parsed once,
+and the bounding volume hierarchy is refit for moved shapes rather than
+rebuilt.
+"""
+
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+import yaml as pyyaml
+
+from .bvh import BVH_MIN_SHAPES
+from .camera import Camera
+from .canvas import Canvas
+from .primitives import Point, Vector3
+from .render import (
+    TILE_SIZE,
+    Tile,
+    generate_tiles,
+    make_executor,
+    render_tile,
+    resolve_backend,
+    resolve_num_processes,
+    write_tile,
+)
+from .serialization import YAML_LOADER, load, load_transforms, p
+from .world import MAX_REFLECTIONS, World
+
+# The frame each process worker's scene is posed at
+_posed_frame: Optional[int] = None
+
+
+def interpolate(a: Any, b: Any, fraction: float) -> Any:
+    """Linearly interpolate between two keyframe values of the same shape"""
+    if fraction == 0:
+        return a
+    if fraction == 1:
+        return b
+    if isinstance(a, dict) and isinstance(b, dict):
+        if a.keys() != b.keys():
+            raise ValueError(f"Keyframes don't match: {a} and {b}")
+        return {key: interpolate(a[key], b[key], fraction) for key in a}
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            raise ValueError(f"Keyframes don't match: {a} and {b}")
+        return [interpolate(x, y, fraction) for x, y in zip(a, b)]
+    start, end = p(a), p(b)
+    return start + (end - start) * fraction
+
+
+@dataclass
+class Keyframe:
+    frame: int
+    value: Any
+
+
+@dataclass
+class Track:
+    keyframes: list[Keyframe]
+
+    def __post_init__(self):
+        if not self.keyframes:
+            raise ValueError("A track needs at least one keyframe")
+        self.keyframes.sort(key=lambda keyframe: keyframe.frame)
+
+    def at(self, frame: int) -> Any:
+        keyframes = self.keyframes
+        if frame <= keyframes[0].frame:
+            return keyframes[0].value
+        for start, end in zip(keyframes, keyframes[1:]):
+            if frame <= end.frame:
+                fraction = (frame - start.frame) / (end.frame - start.frame)
+                return interpolate(start.value, end.value, fraction)
+        return keyframes[-1].value
+
+
+@dataclass
+class Animation:
+    frames: int
+    # Transform specs, by shape index
+    shapes: dict[int, Track] = field(default_factory=dict)
+    # {"from", "to", "up"} view specs
+    camera: Optional[Track] = None
+    # Position specs, by light index
+    lights: dict[int, Track] = field(default_factory=dict)
+
+    def pose(self, camera: Camera, world: World, frame: int) -> None:
+        """Move the animated parts of the scene, in place, to the frame"""
+        for i, track in self.shapes.items():
+            world.shapes[i].transform = load_transforms(track.at(frame))
+        if world.bvh is not None and self.shapes:
+            world.bvh.refit(self.shapes)
+
+        for i, track in self.lights.items():
+            world.lights[i] = replace(world.lights[i], position=Point(*track.at(frame)))
+
+        if self.camera is not None:
+            view = self.camera.at(frame)
+            camera.transform = World.view_transform(
+                from_=Point(*view["from"]),
+                to=Point(*view["to"]),
+                up=Vector3(*view["up"]),
+            )
+
+
+def load_animation(spec: dict) -> Animation:
+    def track(keyframes: list[dict], key: Optional[str] = None) -> Track:
+        try:
+            return Track(
+                [
+                    Keyframe(
+                        keyframe["frame"],
+                        keyframe[key] if key else keyframe,
+                    )
+                    for keyframe in keyframes
+                ]
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid keyframes: {keyframes}") from e
+
+    camera = None
+    if "camera" in spec:
+        camera = track(spec["camera"])
+        for keyframe in camera.keyframes:
+            keyframe.value = {key: keyframe.value[key] for key in ("from", "to", "up")}
+    return Animation(
+        frames=spec["frames"],
+        shapes={
+            int(i): track(keyframes, "transforms")
+            for i, keyframes in spec.get("shapes", {}).items()
+        },
+        camera=camera,
+        lights={
+            int(i): track(keyframes, "position")
+            for i, keyframes in spec.get("lights", {}).items()
+        },
+    )
+
+
+def load_animation_yaml(
+    yaml: str, directory: Optional[str] = None
+) -> tuple[Camera, World, Animation]:
+    """Load a scene and its animation section, which defaults to one frame"""
+    world_dict = pyyaml.load(yaml, YAML_LOADER)
+    camera, world = load(world_dict, directory)
+    animation = load_animation(world_dict.get("animation", {"frames": 1}))
+    for i in animation.shapes:
+        if not 0 <= i < len(world.shapes):
+            raise ValueError(f"Animated shape {i} is not in the scene")
+    for i in animation.lights:
+        if not 0 <= i < len(world.lights):
+            raise ValueError(f"Animated light {i} is not in the scene")
+    return camera, world, animation
+
+
+def render_animation(
+    camera: Camera,
+    world: World,
+    animation: Animation,
+    frames: Optional[Iterable[int]] = None,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+) -> Iterator[tuple[int, Canvas]]:
+    """
+    Yield (frame, canvas) for each frame, defaulting to all of them. The
+    camera and world are posed in place.
+
+    Worlds with at least BVH_MIN_SHAPES shapes get a bounding volume
+    hierarchy, which is refit as shapes move. Process workers are started
+    once, with the unposed scene, and pose their own copy to each frame.
+    """
+    if frames is None:
+        frames = range(animation.frames)
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    if world.bvh is None and len(world.shapes) >= BVH_MIN_SHAPES:
+        world.build_bvh()
+
+    tiles = list(generate_tiles(camera.hsize, camera.vsize, tile_size))
+    executor, task = make_executor(
+        backend, camera, world, num_processes, task=_frame_tile
+    )
+    settings = {"supersampling": supersampling, "max_depth": max_depth}
+    with executor:
+        for frame in frames:
+            animation.pose(camera, world, frame)
+            # Threads share the scene posed above. Processes pose their own.
+            frame_task = partial(
+                task,
+                animation=animation if backend == "process" else None,
+                frame=frame,
+                **settings,
+            )
+            canvas = Canvas(camera.hsize, camera.vsize)
+            for tile, pixels in executor.map(frame_task, tiles):
+                write_tile(canvas, tile, pixels)
+            yield frame, canvas
+
+
+def _frame_tile(
+    camera: Camera,
+    world: World,
+    tile: Tile,
+    animation: Optional[Animation],
+    frame: int,
+    **settings,
+) -> tuple[Tile, np.ndarray]:
+    global _posed_frame
+    if animation is not None and _posed_frame != frame:
+        animation.pose(camera, world, frame)
+        _posed_frame = frame
+    return tile, render_tile(camera, world, tile, **settings)
@@ -0,0 +1,157 @@
+"""
+Render many scene files on one RenderPool.
+
+Scenes are parsed on the pool, and the tiles of several scenes are in
+flight at once, so workers pick up the next image's tiles while the last
+tiles of the previous one finish. Each image is written as soon as all of
+its tiles are done.
+"""
+
+import hashlib
+import os
+import queue
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from .camera import Camera
+from .canvas import Canvas
+from .image import FORMATS
+from .pool import PoolJob, RenderPool
+from .render import TILE_SIZE, generate_tiles, write_tile
+from .serialization import load_yaml
+from .world import MAX_REFLECTIONS, World
+
+
+@dataclass
+class BatchResult:
+    filename: str
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+
+def output_path(
+    filename: str, output_dir: Optional[str] = None, extension: str = ".ppm"
+) -> str:
+    """The image path for a scene, in ``output_dir`` or next to the scene"""
+    path = Path(filename).with_suffix(extension)
+    if output_dir is not None:
+        path = Path(output_dir) / path.name
+    return str(path)
+
+
+def render_batch(
+    filenames: Iterable[str],
+    pool: RenderPool,
+    output_dir: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    lookahead: Optional[int] = None,
+    image_format: str = "p3",
+) -> Iterator[BatchResult]:
+    """
+    Render each scene file to an ``image_format`` image, one of
+    ``image.FORMATS``, yielding a BatchResult as each one is written. A
+    scene that fails to load or render is reported in its result, and the
+    rest of the batch carries on.
+
+    At most ``lookahead`` scenes are parsed or rendered at once, which
+    defaults to twice the number of workers.
+    """
+    writer = FORMATS[image_format]
+    if lookahead is None:
+        lookahead = 2 * (pool.num_processes or 1)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    settings: dict[str, Any] = {
+        "supersampling": supersampling,
+        "max_depth": max_depth,
+    }
+    filenames = iter(filenames)
+    finished: queue.Queue[Future] = queue.Queue()
+    loading: dict[Future, str] = {}
+    jobs: dict[PoolJob, tuple[str, Canvas]] = {}
+    owners: dict[Future, PoolJob] = {}
+
+    def on_done(future: Future) -> None:
+        finished.put(future)
+
+    def start_scenes() -> None:
+        while len(loading) + len(jobs) < lookahead:
+            filename = next(filenames, None)
+            if filename is None:
+                return
+            future = pool.executor.submit(_load_task, filename)
+            loading[future] = filename
+            future.add_done_callback(on_done)
+
+    def forget(job: PoolJob) -> tuple[str, Canvas]:
+        job.cancel()
+        for future in job.futures:
+            owners.pop(future, None)
+        return jobs.pop(job)
+
+    def save(job: PoolJob) -> BatchResult:
+        filename, canvas = forget(job)
+        output = output_path(filename, output_dir, writer.extension)
+        try:
+            with open(output, "wb" if writer.binary else "w") as f:
+                # The file is opened in the mode the writer expects
+                writer.save(canvas, f)  # type: ignore[arg-type]
+        except OSError as e:
+            return BatchResult(filename, error=f"Could not write {output}: {e}")
+        return BatchResult(filename, output=output)
+
+    start_scenes()
+    while loading or jobs:
+        future = finished.get()
+
+        if future in loading:
+            filename = loading.pop(future)
+            try:
+                key, camera, world = future.result()
+            except Exception as e:
+                yield BatchResult(filename, error=f"Could not load scene: {e}")
+                start_scenes()
+                continue
+            tiles = generate_tiles(camera.hsize, camera.vsize, tile_size)
+            job = pool.submit(camera, world, tiles, key, on_done, **settings)
+            jobs[job] = (filename, Canvas(camera.hsize, camera.vsize))
+            owners.update((f, job) for f in job.futures)
+            if job.done:
+                # An empty image has no tiles to wait for
+                yield save(job)
+                start_scenes()
+            continue
+
+        if future not in owners:
+            # A cancelled tile of a failed scene
+            continue
+        job = owners.pop(future)
+        try:
+            result = job.completed(future)
+        except Exception as e:
+            filename, _ = forget(job)
+            yield BatchResult(filename, error=f"Render failed: {e}")
+            start_scenes()
+            continue
+        if result is None:
+            # Resubmitted with the world
+            owners.update((f, job) for f in job.futures)
+            continue
+        write_tile(jobs[job][1], *result)
+        if job.done:
+            yield save(job)
+            start_scenes()
+
+
+def _load_task(filename: str) -> tuple[str, Camera, World]:
+    with open(filename, "rb") as f:
+        data = f.read()
+    directory = os.path.dirname(os.path.abspath(filename))
+    camera, world = load_yaml(data.decode(), directory)
+    # Array files are found relative to the scene
+    key = hashlib.sha256(directory.encode() + b"\0" + data).hexdigest()
+    return key, camera, world
@@ -0,0 +1,206 @@
+import dataclasses
+import math
+import time
+from functools import partial
+from typing import Optional
+
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .progressive import pass_mask
+from .render import (
+    TILE_SIZE,
+    RenderReport,
+    Tile,
+    bind_task,
+    generate_tiles,
+    make_executor,
+    render_pixels,
+    render_tile,
+)
+from .world import MAX_REFLECTIONS, World
+
+# Roughly the most pixels to trace when measuring throughput
+PROBE_PIXELS = 256
+
+# Stop growing the throughput probe after this fraction of the budget
+PROBE_FRACTION = 0.1
+
+# Fraction of the remaining budget to plan for, leaving room for misestimates
+HEADROOM = 0.9
+
+
+@dataclasses.dataclass
+class Estimate:
+    """Seconds per primary ray, measured at depth 1 and at the requested depth"""
+
+    shallow: float
+    deep: float
+    max_depth: int
+
+    def seconds(self, pixels: int, supersampling: int, max_depth: int) -> float:
+        # Interpolate linearly between the two measured depths
+        if self.max_depth > 1:
+            fraction = (max_depth - 1) / (self.max_depth - 1)
+        else:
+            fraction = 1.0
+        per_ray = self.shallow + (self.deep - self.shallow) * fraction
+        return pixels * supersampling**2 * per_ray
+
+
+def render_within_budget(
+    camera: Camera,
+    world: World,
+    budget: float,
+    num_processes: Optional[int],
+    backend: str,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    report: Optional[RenderReport] = None,
+    precision: str = "float64",
+) -> Canvas:
+    """
+    Render in about ``budget`` seconds, at the best quality that fits.
+
+    A probe traces a sample of pixels to measure throughput. If the
+    full quality render would not fit in what is left of the budget,
+    supersampling is lowered first, then recursion depth, and finally
+    resolution. A reduced resolution image is scaled back up to the
+    camera size with nearest neighbour sampling. What was given up is
+    listed in ``report.sacrificed``.
+    """
+    start = time.perf_counter()
+    if report is None:
+        report = RenderReport()
+
+    executor, probe = make_executor(
+        backend, camera, world, num_processes, task=render_pixels
+    )
+    try:
+        estimate = measure(
+            executor, probe, camera, max_depth, num_processes or 1, budget
+        )
+        report.rays_per_second = 1 / estimate.deep if estimate.deep else None
+
+        remaining = budget * HEADROOM - (time.perf_counter() - start)
+        settings = choose_settings(
+            estimate, remaining, camera.hsize, camera.vsize, supersampling, max_depth
+        )
+        width, height, report.supersampling, report.max_depth = settings
+        report.width, report.height = width, height
+        report.sacrificed = describe_sacrifices(
+            (camera.hsize, camera.vsize, supersampling, max_depth), settings
+        )
+
+        scaled_camera = dataclasses.replace(camera, hsize=width, vsize=height)
+        task = partial(
+            bind_task(backend, camera, world, _render_tile_with_camera),
+            scaled_camera,
+            supersampling=report.supersampling,
+            max_depth=report.max_depth,
+            precision=precision,
+        )
+        pixels = np.empty((height, width, 3), dtype=precision)
+        tiles = generate_tiles(width, height, tile_size)
+        for (x0, y0, x1, y1), tile_pixels in executor.map(task, tiles):
+            pixels[y0:y1, x0:x1] = tile_pixels
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    canvas = Canvas(camera.hsize, camera.vsize, dtype=precision)
+    canvas.write_pixels(0, 0, upscale_nearest(pixels, camera.hsize, camera.vsize))
+    report.elapsed = time.perf_counter() - start
+    return canvas
+
+
+def measure(
+    executor, probe, camera: Camera, max_depth: int, workers: int, seconds: float
+) -> Estimate:
+    """
+    Time ``probe`` on a growing sample of pixels, until it has used its
+    share of ``seconds`` or traced PROBE_PIXELS pixels.
+    """
+    width, height = camera.hsize, camera.vsize
+    stride = max(1, int(math.sqrt(width * height / PROBE_PIXELS)))
+    ys, xs = np.nonzero(pass_mask(width, height, stride))
+    # Shuffle, so that small samples are still spread across the image
+    order = np.random.default_rng(0).permutation(len(xs))
+    coords = list(zip(xs[order].tolist(), ys[order].tolist()))
+
+    def seconds_per_ray(depth: int, sample: list[tuple[int, int]]) -> float:
+        batches = [sample[i::workers] for i in range(workers) if sample[i::workers]]
+        start = time.perf_counter()
+        list(executor.map(partial(probe, max_depth=depth), batches))
+        return (time.perf_counter() - start) / len(sample)
+
+    # Early rounds also pay for starting workers, so only the last round
+    # is used.
+    start = time.perf_counter()
+    count = workers
+    while True:
+        sample = coords[:count]
+        deep = seconds_per_ray(max_depth, sample)
+        elapsed = time.perf_counter() - start
+        if count >= len(coords) or elapsed >= seconds * PROBE_FRACTION:
+            break
+        count *= 4
+    shallow = seconds_per_ray(1, sample) if max_depth > 1 else deep
+    return Estimate(shallow=min(shallow, deep), deep=deep, max_depth=max_depth)
+
+
+def choose_settings(
+    estimate: Estimate,
+    seconds: float,
+    width: int,
+    height: int,
+    supersampling: int,
+    max_depth: int,
+) -> tuple[int, int, int, int]:
+    """Returns (width, height, supersampling, max_depth) that fit in seconds"""
+
+    def cost():
+        return estimate.seconds(width * height, supersampling, max_depth)
+
+    while supersampling > 1 and cost() > seconds:
+        supersampling -= 1
+    while max_depth > 1 and cost() > seconds:
+        max_depth -= 1
+    if cost() > seconds:
+        # Cost is proportional to pixel count
+        scale = math.sqrt(max(seconds, 0) / cost())
+        width = max(1, int(width * scale))
+        height = max(1, int(height * scale))
+    return width, height, supersampling, max_depth
+
+
+def describe_sacrifices(
+    requested: tuple[int, int, int, int], chosen: tuple[int, int, int, int]
+) -> list[str]:
+    width, height, supersampling, max_depth = requested
+    new_width, new_height, new_supersampling, new_max_depth = chosen
+    sacrificed = []
+    if new_supersampling != supersampling:
+        sacrificed.append(f"supersampling {supersampling} -> {new_supersampling}")
+    if new_max_depth != max_depth:
+        sacrificed.append(f"max depth {max_depth} -> {new_max_depth}")
+    if (new_width, new_height) != (width, height):
+        sacrificed.append(f"resolution {width}x{height} -> {new_width}x{new_height}")
+    return sacrificed
+
+
+def upscale_nearest(pixels: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Resize a (height, width, 3) array with nearest neighbour sampling"""
+    source_height, source_width, _ = pixels.shape
+    ys = (np.arange(height) + 0.5) * source_height / height
+    xs = (np.arange(width) + 0.5) * source_width / width
+    return pixels[np.ix_(ys.astype(int), xs.astype(int))]
+
+
+def _render_tile_with_camera(
+    _: Camera, world: World, camera: Camera, tile: Tile, **settings
+) -> tuple[Tile, np.ndarray]:
+    # Workers were started with the full size camera, so the scaled one
+    # is passed along with each tile.
+    return tile, render_tile(camera, world, tile, **settings)
@@ -0,0 +1,208 @@
+"""
+Bounding volume hierarchy over a world's shapes.
+
+Shapes with finite bounds are grouped into a binary tree of axis aligned
+boxes, so a ray is only tested against shapes whose boxes lie along it.
+Unbounded shapes, like planes, are always tested. When shapes move,
+``refit`` recomputes the boxes of just those shapes and their ancestors,
+keeping the tree's structure.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+from .utils import EPSILON
+
+if TYPE_CHECKING:
+    from .ray import Ray
+    from .shapes import Shape, Vec
+
+# Most shapes kept in a leaf
+LEAF_SIZE = 4
+
+# Shapes in a world before loaders and renderers build a hierarchy for it
+BVH_MIN_SHAPES = 8
+
+
+@dataclass(slots=True)
+class Bounds:
+    minimum: Vec
+    maximum: Vec
+
+    @classmethod
+    def of_shape(cls, shape: Shape) -> Optional[Bounds]:
+        """World space bounds of the shape, or None if it is unbounded"""
+        local = shape.local_bounds()
+        if local is None:
+            return None
+        points = np.array(_corners(local)) @ shape.transform.cells.T
+        # Pad, so rays grazing the shape don't miss its box to rounding
+        minimum = points[:, :3].min(axis=0) - EPSILON
+        maximum = points[:, :3].max(axis=0) + EPSILON
+        return cls(tuple(minimum.tolist()), tuple(maximum.tolist()))  # type: ignore
+
+    def union(self, other: Bounds) -> Bounds:
+        return Bounds(
+            tuple(map(min, self.minimum, other.minimum)),  # type: ignore
+            tuple(map(max, self.maximum, other.maximum)),  # type: ignore
+        )
+
+    @property
+    def centroid(self) -> Vec:
+        return tuple(
+            (low + high) / 2 for low, high in zip(self.minimum, self.maximum)
+        )  # type: ignore
+
+    def crossed_by(self, origin: Vec, direction: Vec) -> bool:
+        """
+        Whether the line through the ray crosses the box. Intersections
+        behind the ray's origin count, as World.intersect returns them too.
+        """
+        t_min, t_max = -np.inf, np.inf
+        for o, d, low, high in zip(origin, direction, self.minimum, self.maximum):
+            if d == 0:
+                if o < low or o > high:
+                    return False
+                continue
+            t1, t2 = (low - o) / d, (high - o) / d
+            if t1 > t2:
+                t1, t2 = t2, t1
+            t_min, t_max = max(t_min, t1), min(t_max, t2)
+            if t_min > t_max:
+                return False
+        return True
+
+
+@dataclass(slots=True)
+class Node:
+    bounds: Bounds
+    parent: Optional[int] = None
+    children: tuple[int, ...] = ()
+    # Shape indices, for leaves
+    shapes: list[int] = field(default_factory=list)
+
+
+class BVH:
+    def __init__(self, shapes: list[Shape]):
+        self.shapes = shapes
+        self.nodes: list[Node] = []
+        # Leaf node holding each bounded shape
+        self.leaf_of: dict[int, int] = {}
+        self.unbounded: list[int] = []
+
+        bounded = []
+        corners = []
+        # Shapes of a kind share their local bounds
+        corners_of: dict[tuple[Vec, Vec], list[list[float]]] = {}
+        for i, shape in enumerate(shapes):
+            local = shape.local_bounds()
+            if local is None:
+                self.unbounded.append(i)
+                continue
+            if local not in corners_of:
+                corners_of[local] = _corners(local)
+            bounded.append(i)
+            corners.append(corners_of[local])
+        self.shape_bounds: dict[int, Bounds] = {}
+        if not bounded:
+            return
+
+        # Bounds of every shape at once, as in Bounds.of_shape
+        transforms = np.array([shapes[i].transform.cells for i in bounded])
+        points = np.array(corners) @ transforms.transpose((0, 2, 1))
+        minimum = points[:, :, :3].min(axis=1) - EPSILON
+        maximum = points[:, :, :3].max(axis=1) + EPSILON
+        for i, low, high in zip(bounded, minimum.tolist(), maximum.tolist()):
+            self.shape_bounds[i] = Bounds(tuple(low), tuple(high))  # type: ignore
+        self._build(np.array(bounded), minimum, maximum, None)
+
+    def _build(
+        self,
+        indices: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+        parent: Optional[int],
+    ) -> int:
+        """
+        Build the subtree over shapes ``indices``, whose bounds are the
+        rows of ``minimum`` and ``maximum``.
+        """
+        low, high = minimum.min(axis=0), maximum.max(axis=0)
+        node_index = len(self.nodes)
+        node = Node(Bounds(tuple(low.tolist()), tuple(high.tolist())), parent)
+        self.nodes.append(node)
+
+        if len(indices) <= LEAF_SIZE:
+            node.shapes = indices.tolist()
+            for i in node.shapes:
+                self.leaf_of[i] = node_index
+            return node_index
+
+        # Split at the median centroid along the box's longest axis
+        axis = int(np.argmax(high - low))
+        centroids = (minimum[:, axis] + maximum[:, axis]) / 2
+        order = np.argsort(centroids, kind="stable")
+        first, second = np.split(order, [len(indices) // 2])
+        node.children = (
+            self._build(indices[first], minimum[first], maximum[first], node_index),
+            self._build(indices[second], minimum[second], maximum[second], node_index),
+        )
+        return node_index
+
+    def refit(self, moved: Iterable[int]) -> None:
+        """Recompute bounds after the shapes at these indices have moved"""
+        dirty = set()
+        for i in moved:
+            if i not in self.leaf_of:
+                continue
+            bounds = Bounds.of_shape(self.shapes[i])
+            if bounds is None:
+                raise ValueError(f"Shape {i} no longer has bounds")
+            self.shape_bounds[i] = bounds
+            dirty.add(self.leaf_of[i])
+
+        # Walk up from the leaves, deepest first, so each node is redone once
+        while dirty:
+            node_index = max(dirty)
+            dirty.remove(node_index)
+            node = self.nodes[node_index]
+            parts = (
+                [self.shape_bounds[i] for i in node.shapes]
+                if node.shapes
+                else [self.nodes[child].bounds for child in node.children]
+            )
+            bounds = parts[0]
+            for part in parts[1:]:
+                bounds = bounds.union(part)
+            node.bounds = bounds
+            if node.parent is not None:
+                dirty.add(node.parent)
+
+    def candidates(self, ray: Ray) -> list[int]:
+        """Indices of shapes the ray might hit, in world order"""
+        found = list(self.unbounded)
+        if self.nodes:
+            origin = (ray.origin.x, ray.origin.y, ray.origin.z)
+            direction = (ray.direction.x, ray.direction.y, ray.direction.z)
+            stack = [0]
+            while stack:
+                node = self.nodes[stack.pop()]
+                if not node.bounds.crossed_by(origin, direction):
+                    continue
+                if node.shapes:
+                    found += node.shapes
+                else:
+                    stack.extend(node.children)
+        # Keep the order of world.shapes, so intersections with equal t
+        # sort the same as without the hierarchy.
+        found.sort()
+        return found
+
+
+def _corners(bounds: tuple[Vec, Vec]) -> list[list[float]]:
+    (x0, y0, z0), (x1, y1, z1) = bounds
+    return [[x, y, z, 1] for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)]
@@ -1,17 +1,71 @@
+from typing import Iterator, Optional
+
+import numpy as np
+
 from .color import Color
 
+# Pixel data handed to image writers at a time, by Canvas.bands
+BAND_BYTES = 16 * 2**20
+
 
 class Canvas:
-    def __init__(self, width: int, height: int, fill=Color(0, 0, 0)):
+    """
+    Pixels are stored as a ``(height, width, 3)`` array of linear RGB
+    values. ``np.asarray(canvas)`` and ``memoryview(canvas.pixels)`` read
+    it without a copy.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        fill=Color(0, 0, 0),
+        dtype: np.dtype | type | str = np.float64,
+    ):
         self.width = width
         self.height = height
-        self.pixels: list[Color] = [fill for _ in range(width * height)]
+        self.pixels = np.empty((height, width, 3), dtype=dtype)
+        self.pixels[...] = (fill.red, fill.green, fill.blue)
+
+    @classmethod
+    def from_array(cls, pixels: np.ndarray) -> "Canvas":
+        """A canvas using a ``(height, width, 3)`` array as its pixels"""
+        if pixels.ndim != 3 or pixels.shape[2] != 3:
+            raise ValueError(f"Expected a (height, width, 3) array, got {pixels.shape}")
+        canvas = cls.__new__(cls)
+        canvas.height, canvas.width = pixels.shape[:2]
+        canvas.pixels = pixels
+        return canvas
 
     def write_pixel(self, x: int, y: int, color: Color) -> None:
-        self.pixels[self._index_for_coords(x, y)] = color
+        self._index_for_coords(x, y)
+        self.pixels[y, x] = (color.red, color.green, color.blue)
 
     def pixel_at(self, x: int, y: int) -> Color:
-        return self.pixels[self._index_for_coords(x, y)]
+        self._index_for_coords(x, y)
+        return Color(*self.pixels[y, x].tolist())
+
+    def write_pixels(self, x: int, y: int, pixels: np.ndarray) -> None:
+        """Write a ``(rows, columns, 3)`` block of pixels, top left at x, y"""
+        rows, columns = pixels.shape[:2]
+        if rows and columns:
+            self._index_for_coords(x, y)
+            self._index_for_coords(x + columns - 1, y + rows - 1)
+        self._rows(y, y + rows)[:, x : x + columns] = pixels
+
+    def bands(self, rows: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        The pixels top to bottom, in ``(rows, width, 3)`` bands of about
+        BAND_BYTES if ``rows`` isn't given
+        """
+        if rows is None:
+            row_bytes = self.width * 3 * self.pixels.itemsize
+            rows = max(1, BAND_BYTES // max(1, row_bytes))
+        for y in range(0, self.height, rows):
+            yield self._rows(y, min(y + rows, self.height))
+
+    def _rows(self, y0: int, y1: int) -> np.ndarray:
+        return self.pixels[y0:y1]
 
     def _index_for_coords(self, x, y) -> int:
         # x is width, y is height
@@ -22,5 +76,48 @@ class Canvas:
             raise IndexError(f"y out of bounds: {y}")
         return self.width * y + x
 
-    def __iter__(self):
-        return self.pixels.__iter__()
+    def __iter__(self) -> Iterator[Color]:
+        for rgb in self.pixels.reshape(-1, 3).tolist():
+            yield Color(*rgb)
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy=None) -> np.ndarray:
+        if dtype is None or dtype == self.pixels.dtype:
+            return self.pixels.copy() if copy else self.pixels
+        return self.pixels.astype(dtype)
+
+
+class MappedCanvas(Canvas):
+    """
+    A canvas kept in a file on disk rather than in memory, for images too
+    big for RAM. Tiles are written and bands read through short lived
+    mappings of just their rows, so memory use doesn't grow with the image.
+    The file is left in place.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        path: str,
+        fill=Color(0, 0, 0),
+        dtype: np.dtype | type | str = np.float64,
+    ):
+        self.width = width
+        self.height = height
+        self.path = path
+        # New files read as zeros without being written
+        self.pixels = np.memmap(path, dtype=dtype, mode="w+", shape=(height, width, 3))
+        if (fill.red, fill.green, fill.blue) != (0, 0, 0):
+            for band in self.bands():
+                band[...] = (fill.red, fill.green, fill.blue)
+
+    def _rows(self, y0: int, y1: int) -> np.ndarray:
+        if y0 >= y1:
+            return self.pixels[y0:y1]
+        return np.memmap(
+            self.path,
+            dtype=self.pixels.dtype,
+            mode="r+",
+            offset=y0 * self.width * 3 * self.pixels.itemsize,
+            shape=(y1 - y0, self.width, 3),
+        )
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+from typing import Any, BinaryIO, Optional
+
+import numpy as np
+
+from .render import Tile
+
+# Seconds between flushing completed tiles to disk
+CHECKPOINT_INTERVAL = 10.0
+
+
+class Checkpoint:
+    """
+    Append-only record of completed tiles, for resuming interrupted renders.
+
+    The file is a header, followed by a (tile, pixels) pair of .npy arrays
+    for every completed tile. Tiles are only written once all of their
+    samples are done, so supersampled pixels are stored already averaged.
+    Writes are buffered, and synced to disk every ``interval`` seconds.
+
+    ``key`` identifies the scene, e.g. a hash of the scene file, and is
+    checked along with the render settings before resuming.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key: str = "",
+        resume: bool = False,
+        interval: float = CHECKPOINT_INTERVAL,
+    ):
+        self.path = path
+        self.key = key
+        self.resume = resume
+        self.interval = interval
+        self._file: Optional[BinaryIO] = None
+        self._last_sync = 0.0
+
+    def start(self, settings: dict[str, Any]) -> dict[Tile, np.ndarray]:
+        """
+        Open the checkpoint for writing. When resuming, returns the tiles
+        completed by the previous run.
+        """
+        header = json.dumps({"key": self.key, **settings}, sort_keys=True)
+        completed: dict[Tile, np.ndarray] = {}
+
+        if self.resume and os.path.exists(self.path):
+            completed, end = self._read(header)
+            self._file = open(self.path, "r+b")
+            # Drop any partially written tile at the end of the file
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(self.path, "wb")
+            np.save(self._file, np.array(header))
+
+        self._last_sync = time.monotonic()
+        return completed
+
+    def write(self, tile: Tile, pixels: np.ndarray) -> None:
+        if self._file is None:
+            raise ValueError("Checkpoint has not been started")
+        np.save(self._file, np.array(tile))
+        np.save(self._file, pixels)
+        if time.monotonic() - self._last_sync >= self.interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _read(self, header: str) -> tuple[dict[Tile, np.ndarray], int]:
+        completed = {}
+        with open(self.path, "rb") as f:
+            stored = str(np.load(f))
+            if stored != header:
+                raise ValueError(
+                    f"Checkpoint {self.path} was written for a different scene "
+                    "or render settings"
+                )
+            end = f.tell()
+            while True:
+                try:
+                    x0, y0, x1, y1 = np.load(f).tolist()
+                    pixels = np.load(f)
+                except (EOFError, ValueError, OSError):
+                    break
+                completed[(x0, y0, x1, y1)] = pixels
+                end = f.tell()
+        return completed, end
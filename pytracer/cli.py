@@ -1,43 +1,624 @@
 import argparse
+import glob
+import hashlib
+import os
 import sys
+import time
+from contextlib import contextmanager
 
-from pytracer.camera import Camera
-from pytracer.image import PPM
-from pytracer.render import render
-from pytracer.serialization import load_yaml
-from pytracer.world import World
+# Only what the argument parsers need is imported up front, each command
+# imports the rest, so startup doesn't pay for unused features.
+from pytracer.options import (
+    BACKENDS,
+    CACHE_SIZE,
+    IMAGE_FORMATS,
+    MAX_REFLECTIONS,
+    PRECISIONS,
+    WORKER_TIMEOUT,
+)
 
 
-def load_scene_file(filename) -> tuple[Camera, World]:
-    with open(filename) as f:
-        return load_yaml(f.read())
+def main(
+    filename,
+    output,
+    num_processes,
+    width,
+    height,
+    backend,
+    progressive,
+    supersampling,
+    max_depth,
+    budget,
+    checkpoint,
+    resume,
+    workers,
+    worker_timeout,
+    region,
+    gbuffer,
+    watch,
+    cache,
+    cache_size,
+    scene_cache,
+    image_format,
+    stream,
+    canvas_file,
+    precision,
+):
+    from pytracer.image import FORMATS
+    from pytracer.regions import region_comment
+    from pytracer.render import RenderReport, render
+    from pytracer.scenecache import load_scene_file
+    from pytracer.tilecache import TileCache
 
+    if watch:
+        from pytracer.watch import watch as watch_scene
 
-def main(filename, output, num_processes, width, height):
+        try:
+            watch_scene(filename, output, num_processes, backend, max_depth)
+        except KeyboardInterrupt:
+            pass
+        return
 
-    camera, world = load_scene_file(filename)
+    camera, world = load_scene_file(filename, use_cache=scene_cache)
     if width:
         camera.hsize = width
     if height:
         camera.vsize = height
 
-    canvas = render(camera, world, num_processes=num_processes, show_progress=True)
+    comments = []
+    if region is not None:
+        comments.append(region_comment(region, camera.hsize, camera.vsize))
+
+    if stream:
+        from pytracer.render import TILE_SIZE, get_tracking_function
+        from pytracer.stream import render_rows
+
+        x0, y0, x1, y1 = region or (0, 0, camera.hsize, camera.vsize)
+        rows = render_rows(
+            camera,
+            world,
+            num_processes=num_processes,
+            backend=backend,
+            supersampling=supersampling,
+            max_depth=max_depth,
+            region=region,
+            precision=precision,
+        )
+        track = get_tracking_function(True)
+        writer = FORMATS[image_format]
+        with open_output(output, writer.binary) as f:
+            writer.save_rows(
+                x1 - x0,
+                y1 - y0,
+                track(rows, total=-(-(y1 - y0) // TILE_SIZE), transient=True),
+                f,
+                comments,
+            )
+        return
+
+    if progressive:
+        from pytracer.progressive import render_progressive
+
+        # Rewrite the output after every pass, so viewers can pick up
+        # the preview.
+        for canvas in render_progressive(
+            camera,
+            world,
+            num_processes=num_processes,
+            backend=backend,
+            supersampling=supersampling,
+            max_depth=max_depth,
+            precision=precision,
+        ):
+            tmp = f"{output}.tmp"
+            write_image(canvas, tmp, image_format)
+            os.replace(tmp, output)
+        return
+
+    if checkpoint is not None:
+        from pytracer.checkpoint import Checkpoint
+
+        with open(filename, "rb") as f:
+            key = hashlib.sha256(f.read()).hexdigest()
+        checkpoint = Checkpoint(checkpoint, key=key, resume=resume)
+
+    report = RenderReport()
+    if gbuffer is not None:
+        from pytracer.gbuffer import render_with_gbuffer
+
+        canvas = render_with_gbuffer(
+            camera,
+            world,
+            gbuffer,
+            max_depth=max_depth,
+            num_processes=num_processes,
+            backend=backend,
+            show_progress=True,
+            precision=precision,
+        )
+    elif workers:
+        from pytracer.distributed import parse_address, render_distributed
+
+        canvas = render_distributed(
+            camera,
+            world,
+            [parse_address(address) for address in workers.split(",")],
+            supersampling=supersampling,
+            max_depth=max_depth,
+            timeout=worker_timeout,
+        )
+    else:
+        mapped = None
+        if canvas_file is not None:
+            from pytracer.canvas import MappedCanvas
+            from pytracer.render import resolve_precision
+
+            x0, y0, x1, y1 = region or (0, 0, camera.hsize, camera.vsize)
+            mapped = MappedCanvas(
+                x1 - x0, y1 - y0, canvas_file, dtype=resolve_precision(precision)
+            )
+        canvas = render(
+            camera,
+            world,
+            num_processes=num_processes,
+            show_progress=True,
+            backend=backend,
+            supersampling=supersampling,
+            max_depth=max_depth,
+            budget=budget,
+            report=report,
+            checkpoint=checkpoint,
+            region=region,
+            cache=None if cache is None else TileCache(cache, cache_size * 2**20),
+            canvas=mapped,
+            precision=precision,
+        )
+    if cache is not None:
+        print(
+            f"Tile cache: {report.cache_hits} hits, {report.cache_misses} misses",
+            file=sys.stderr,
+        )
+    if budget is not None:
+        print(
+            f"Rendered {report.width}x{report.height} at {report.supersampling}x"
+            f"{report.supersampling} samples, max depth {report.max_depth}, "
+            f"in {report.elapsed:.2f}s. "
+            f"Sacrificed: {', '.join(report.sacrificed) or 'nothing'}",
+            file=sys.stderr,
+        )
+    write_image(canvas, output, image_format, comments)
+    if canvas_file is not None:
+        os.remove(canvas_file)
+    if checkpoint is not None:
+        os.remove(checkpoint.path)
+
+
+@contextmanager
+def open_output(output, binary):
+    """The output file, or stdout if it is None"""
+    if output is None:
+        yield sys.stdout.buffer if binary else sys.stdout
+    else:
+        with open(output, "wb" if binary else "w") as f:
+            yield f
+
+
+def write_image(canvas, output, image_format, comments=()):
+    """Save canvas to the output filename, or to stdout if it is None"""
+    from pytracer.image import FORMATS
+
+    writer = FORMATS[image_format]
+    with open_output(output, writer.binary) as f:
+        writer.save(canvas, f, comments)
+
+
+def read_image(parser, filename):
+    """Load an image file, reporting unreadable ones as usage errors"""
+    from pytracer.image import load_image
+
+    try:
+        with open(filename, "rb") as f:
+            return load_image(f)
+    except (OSError, ValueError) as e:
+        parser.error(f"Could not read {filename}: {e}")
+
+
+def format_arg(parser):
+    parser.add_argument(
+        "--format",
+        dest="image_format",
+        choices=IMAGE_FORMATS,
+        default="p3",
+        help=(
+            "Image format: p3 (text PPM), p6 (binary PPM), png or pfm (float). "
+            "Defaults to p3"
+        ),
+    )
+
+
+def pool_args(parser):
+    parser.add_argument(
+        "-n",
+        "--num-processes",
+        type=int,
+        help="Number of processes to use for rendering. Defaults to CPU count",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help=(
+            "Render backend. Defaults to threads on free-threaded builds "
+            "with the GIL disabled, and processes otherwise"
+        ),
+    )
+
+
+def size_args(parser):
+    parser.add_argument(
+        "--width", type=int, help="Image width in pixels. Overrides scene settings"
+    )
+    parser.add_argument(
+        "--height", type=int, help="Image height in pixels. Overrides scene settings"
+    )
+
+
+def quality_args(parser):
+    parser.add_argument(
+        "--supersampling",
+        type=int,
+        default=1,
+        help="Trace an N x N grid of rays per pixel. Defaults to 1",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=MAX_REFLECTIONS,
+        help=f"Maximum reflection / refraction depth. Defaults to {MAX_REFLECTIONS}",
+    )
+
+
+def region_arg(spec: str):
+    from pytracer.regions import parse_region
+
+    try:
+        return parse_region(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def worker_cli(argv):
+    from pytracer.distributed import DEFAULT_PORT, serve_worker
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer worker",
+        description=(
+            "Render tiles for a pytracer coordinator (pytracer --workers). "
+            "Only listen on trusted networks."
+        ),
+    )
+    parser.add_argument("--host", default="localhost", help="Interface to listen on")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on. 0 picks a free port. Defaults to {DEFAULT_PORT}",
+    )
+    args = parser.parse_args(argv)
+    try:
+        serve_worker(args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+def merge_cli(argv):
+    from pytracer.regions import merge
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer merge",
+        description="Stitch images rendered with --region into one image.",
+    )
+    parser.add_argument("filenames", nargs="+", help="Region PPM images")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="PPM image filename. If not specified, will output PPM data to stdout",
+    )
+    format_arg(parser)
+    args = parser.parse_args(argv)
+
+    parts = [read_image(parser, filename) for filename in args.filenames]
+    try:
+        canvas = merge(parts)
+    except ValueError as e:
+        parser.error(str(e))
+
+    write_image(canvas, args.output, args.image_format)
+
+
+def grade_cli(argv):
+    from pytracer.tonemap import TONEMAPS, grade
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer grade",
+        description=(
+            "Tone map an image, such as a linear render saved with "
+            "--format pfm, without tracing it again."
+        ),
+    )
+    parser.add_argument("filename", help="PFM, or PPM, image")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Image filename. If not specified, will output image data to stdout",
+    )
+    format_arg(parser)
+    parser.add_argument(
+        "--exposure",
+        type=float,
+        default=0.0,
+        help="Scale the image by 2 ** EXPOSURE before tone mapping. Defaults to 0",
+    )
+    parser.add_argument(
+        "--tonemap",
+        choices=tuple(TONEMAPS),
+        default="clamp",
+        help="Curve mapping values into 0 - 1. Defaults to clamp",
+    )
+    parser.add_argument(
+        "--white",
+        type=float,
+        help="Value mapped to full white by the reinhard tone map",
+    )
+    parser.add_argument(
+        "--srgb",
+        action="store_true",
+        help="Encode the tone mapped image with the sRGB gamma curve",
+    )
+    args = parser.parse_args(argv)
+    if args.white is not None and args.tonemap != "reinhard":
+        parser.error("--white requires --tonemap reinhard")
+
+    canvas, comments = read_image(parser, args.filename)
+    graded = grade(
+        canvas,
+        exposure=args.exposure,
+        tonemap=args.tonemap,
+        white=args.white,
+        srgb=args.srgb,
+    )
+    write_image(graded, args.output, args.image_format, comments)
+
+
+def serve_cli(argv):
+    from pytracer.server import HTTP_PORT, serve
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer serve",
+        description=(
+            "Render scenes submitted over HTTP, on a worker pool that stays "
+            "warm between jobs. POST scene YAML to /jobs, poll /jobs/<id>, "
+            "and fetch the image from /jobs/<id>/image."
+        ),
+    )
+    parser.add_argument("--host", default="localhost", help="Interface to listen on")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=HTTP_PORT,
+        help=f"Port to listen on. 0 picks a free port. Defaults to {HTTP_PORT}",
+    )
+    pool_args(parser)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.num_processes, args.backend)
+
+
+def batch_cli(argv):
+    from pytracer.batch import render_batch
+    from pytracer.pool import RenderPool
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer batch",
+        description=(
+            "Render many scene files on one worker pool. Each scene is "
+            "written to an image of the same name as soon as it is done."
+        ),
+    )
+    parser.add_argument(
+        "patterns", nargs="+", help="Scene files, or glob patterns like 'scenes/*.yaml'"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="Directory for the images. Defaults to next to each scene file",
+    )
+    format_arg(parser)
+    pool_args(parser)
+    quality_args(parser)
+    args = parser.parse_args(argv)
+
+    filenames = []
+    for pattern in args.patterns:
+        filenames += (
+            sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        )
+    if not filenames:
+        parser.error("No scene files matched")
+
+    failed = 0
+    start = time.perf_counter()
+    with RenderPool(args.num_processes, args.backend) as pool:
+        for result in render_batch(
+            filenames,
+            pool,
+            output_dir=args.output_dir,
+            supersampling=args.supersampling,
+            max_depth=args.max_depth,
+            image_format=args.image_format,
+        ):
+            if result.error is None:
+                print(f"{result.filename} -> {result.output}")
+            else:
+                failed += 1
+                print(f"{result.filename}: {result.error}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    rendered = len(filenames) - failed
+    print(
+        f"Rendered {rendered} of {len(filenames)} scenes in {elapsed:.2f}s "
+        f"({rendered / elapsed * 3600:.0f} images/hour)",
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
+
+
+def sweep_cli(argv):
+    from pytracer.image import FORMATS
+    from pytracer.serialization import load_sweep_yaml
+    from pytracer.sweep import render_sweep
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer sweep",
+        description=(
+            "Render every variant declared in a scene's sweep section, "
+            "tracing the scene's geometry only once. Each variant is written "
+            "to <scene>-<variant>.ppm, or the extension of --format."
+        ),
+    )
+    parser.add_argument("filename")
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=".",
+        help="Directory for the images. Defaults to the current directory",
+    )
+    format_arg(parser)
+    pool_args(parser)
+    size_args(parser)
+    quality_args(parser)
+    args = parser.parse_args(argv)
+
+    with open(args.filename) as f:
+        camera, world, variants = load_sweep_yaml(
+            f.read(), os.path.dirname(os.path.abspath(args.filename))
+        )
+    if args.width:
+        camera.hsize = args.width
+    if args.height:
+        camera.vsize = args.height
+    canvases = render_sweep(
+        camera,
+        world,
+        variants,
+        num_processes=args.num_processes,
+        backend=args.backend,
+        supersampling=args.supersampling,
+        max_depth=args.max_depth,
+        show_progress=True,
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.filename))[0]
+    extension = FORMATS[args.image_format].extension
+    for variant, canvas in zip(variants, canvases):
+        name = f"{stem}-{variant.name}" if variant.name else stem
+        output = os.path.join(args.output_dir, name + extension)
+        write_image(canvas, output, args.image_format)
+        print(output)
+
+
+def frames_arg(spec: str) -> range:
     try:
-        if output is None:
-            output = sys.stdout
-        else:
-            output = open(output, "w")
-        PPM.save(canvas, output)
-    finally:
-        if output is not None:
-            if hasattr(output, "close"):
-                output.close()
-
-
-def cli():
+        start, _, stop = spec.partition(":")
+        if not stop:
+            return range(int(start), int(start) + 1)
+        return range(int(start or 0), int(stop))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid frame range: {spec}")
+
+
+def animate_cli(argv):
+    from pytracer.animation import load_animation_yaml, render_animation
+    from pytracer.image import FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog="pytracer animate",
+        description=(
+            "Render the frames of a scene's animation section. Each frame is "
+            "written to <scene>-<frame>.ppm, or the extension of --format."
+        ),
+    )
+    parser.add_argument("filename")
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=".",
+        help="Directory for the frames. Defaults to the current directory",
+    )
+    format_arg(parser)
+    parser.add_argument(
+        "--frames",
+        type=frames_arg,
+        help="Frame, or START:STOP range (STOP exclusive), to render. Defaults to all",
+    )
+    pool_args(parser)
+    size_args(parser)
+    quality_args(parser)
+    args = parser.parse_args(argv)
+
+    with open(args.filename) as f:
+        camera, world, animation = load_animation_yaml(
+            f.read(), os.path.dirname(os.path.abspath(args.filename))
+        )
+    if args.width:
+        camera.hsize = args.width
+    if args.height:
+        camera.vsize = args.height
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.filename))[0]
+    extension = FORMATS[args.image_format].extension
+    for frame, canvas in render_animation(
+        camera,
+        world,
+        animation,
+        frames=args.frames,
+        num_processes=args.num_processes,
+        backend=args.backend,
+        supersampling=args.supersampling,
+        max_depth=args.max_depth,
+    ):
+        output = os.path.join(args.output_dir, f"{stem}-{frame:04}{extension}")
+        write_image(canvas, output, args.image_format)
+        print(output)
+
+
+SUBCOMMANDS = {
+    "worker": worker_cli,
+    "merge": merge_cli,
+    "grade": grade_cli,
+    "serve": serve_cli,
+    "batch": batch_cli,
+    "sweep": sweep_cli,
+    "animate": animate_cli,
+}
+
+
+def cli(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
     parser = argparse.ArgumentParser(
         prog="pytracer",
         description="Python raytracer. Renders YAML scene files to PPM images.",
+        epilog=(
+            "Run 'pytracer worker --help' to start a distributed render worker, "
+            "'pytracer merge --help' to stitch --region images together, "
+            "'pytracer grade --help' to tone map PFM renders, "
+            "'pytracer serve --help' to render scenes submitted over HTTP, "
+            "'pytracer batch --help' to render many scenes at once, "
+            "'pytracer sweep --help' to render material and light variants, "
+            "and 'pytracer animate --help' to render animation frames."
+        ),
     )
     parser.add_argument("filename")
     parser.add_argument(
@@ -45,19 +626,222 @@ def cli():
         "--output",
         help="PPM image filename. If not specified, will output PPM data to stdout",
     )
+    format_arg(parser)
+    pool_args(parser)
     parser.add_argument(
-        "-n",
-        "--num-processes",
-        help="Number of processes to use for rendering. Defaults to CPU count",
+        "--precision",
+        choices=PRECISIONS,
+        help=(
+            "Element type of the rendered pixels. float32 halves the memory "
+            "of the image and of tiles passed back from workers. Defaults to "
+            "float64"
+        ),
     )
+    size_args(parser)
+    quality_args(parser)
     parser.add_argument(
-        "--width", type=int, help="Image width in pixels. Overrides scene settings."
+        "--budget",
+        type=float,
+        help=(
+            "Wall clock budget in seconds. Supersampling, depth and resolution "
+            "are reduced as needed to finish in time"
+        ),
     )
     parser.add_argument(
-        "--height", type=int, help="Image height in pixels. Overrides scene settings"
+        "--checkpoint",
+        help=(
+            "Record completed tiles in this file while rendering. It is "
+            "removed once the image has been written"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip tiles already completed in the --checkpoint file",
+    )
+    parser.add_argument(
+        "--region",
+        type=region_arg,
+        help=(
+            "Only render the x0,y0,x1,y1 rectangle of the full image "
+            "(x1 and y1 exclusive). Combine regions with 'pytracer merge'"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        help=(
+            "Comma separated host:port list of 'pytracer worker' processes "
+            "to render on, instead of rendering locally"
+        ),
+    )
+    parser.add_argument(
+        "--worker-timeout",
+        type=float,
+        default=WORKER_TIMEOUT,
+        help=(
+            "Seconds to wait on a --workers worker, including while it renders "
+            "a tile, before handing its tiles to the others. "
+            f"Defaults to {WORKER_TIMEOUT:g}"
+        ),
+    )
+    parser.add_argument(
+        "--progressive",
+        action="store_true",
+        help=(
+            "Render in coarse to fine passes, rewriting the output file "
+            "after each pass. Requires --output"
+        ),
+    )
+    parser.add_argument(
+        "--gbuffer",
+        help=(
+            "Cache primary hits in this file. Later renders with the same "
+            "camera and geometry only reshade, so light and material edits "
+            "render quickly"
+        ),
+    )
+
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Keep rendered tiles in this directory, and reuse them when the "
+            "same scene is rendered with the same settings again"
+        ),
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=CACHE_SIZE // 2**20,
+        help=(
+            "Size bound of the --cache directory in MiB, least recently used "
+            f"tiles are evicted first. Defaults to {CACHE_SIZE // 2**20}"
+        ),
+    )
+    parser.add_argument(
+        "--no-scene-cache",
+        dest="scene_cache",
+        action="store_false",
+        help=(
+            "Always parse the scene file. By default a compiled copy is kept "
+            "next to it, in SCENE.cache, and reused while the file is unchanged"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running, and re-render to the output file whenever the "
+            "scene file changes. Light and material edits only reshade. "
+            "Requires --output"
+        ),
+    )
+    parser.add_argument(
+        "--canvas-file",
+        help=(
+            "Keep the image in this file instead of in memory while rendering, "
+            "for images too big for RAM. It is removed once the image has "
+            "been written"
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Write rows of the image as soon as they are rendered, holding "
+            "only a few bands of rows in memory. For very large images"
+        ),
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.progressive and args.output is None:
+        parser.error("--progressive requires --output")
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume requires --checkpoint")
+    if args.checkpoint and (args.budget is not None or args.progressive):
+        parser.error("--checkpoint can't be combined with --budget or --progressive")
+    if args.workers and (
+        args.budget is not None or args.progressive or args.checkpoint
+    ):
+        parser.error(
+            "--workers can't be combined with --budget, --progressive "
+            "or --checkpoint"
+        )
+    if args.region and (args.budget is not None or args.progressive or args.workers):
+        parser.error(
+            "--region can't be combined with --budget, --progressive or --workers"
+        )
+    if args.region and args.image_format == "pfm":
+        # PFM has no comments to record the region in, for merge
+        parser.error("--region can't be combined with --format pfm")
+    if args.gbuffer and (
+        args.supersampling != 1
+        or args.budget is not None
+        or args.progressive
+        or args.checkpoint
+        or args.workers
+        or args.region
+    ):
+        parser.error(
+            "--gbuffer can't be combined with --supersampling, --budget, "
+            "--progressive, --checkpoint, --workers or --region"
+        )
+    if args.cache and (
+        args.budget is not None
+        or args.progressive
+        or args.workers
+        or args.gbuffer
+        or args.watch
+    ):
+        parser.error(
+            "--cache can't be combined with --budget, --progressive, "
+            "--workers, --gbuffer or --watch"
+        )
+    if args.watch and args.output is None:
+        parser.error("--watch requires --output")
+    if args.watch and (
+        args.supersampling != 1
+        or args.budget is not None
+        or args.progressive
+        or args.checkpoint
+        or args.workers
+        or args.region
+        or args.gbuffer
+        or args.width
+        or args.height
+        or args.image_format != "p3"
+    ):
+        parser.error(
+            "--watch can't be combined with --supersampling, --budget, "
+            "--progressive, --checkpoint, --workers, --region, --gbuffer, "
+            "--width, --height or --format"
+        )
+    if args.stream and (
+        args.budget is not None
+        or args.progressive
+        or args.checkpoint
+        or args.workers
+        or args.gbuffer
+        or args.cache
+        or args.watch
+    ):
+        parser.error(
+            "--stream can't be combined with --budget, --progressive, "
+            "--checkpoint, --workers, --gbuffer, --cache or --watch"
+        )
+    if args.precision and (args.workers or args.watch):
+        parser.error("--precision can't be combined with --workers or --watch")
+    if args.canvas_file and (
+        args.budget is not None
+        or args.progressive
+        or args.workers
+        or args.gbuffer
+        or args.watch
+        or args.stream
+    ):
+        parser.error(
+            "--canvas-file can't be combined with --budget, --progressive, "
+            "--workers, --gbuffer, --watch or --stream"
+        )
     main(**args.__dict__)
 
 
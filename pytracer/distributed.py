@@ -0,0 +1,216 @@
+"""
+Render tiles on other machines.
+
+Start a worker on each machine with ``pytracer worker --port PORT``. Each
+worker renders one tile at a time, so run one per core. The coordinator
+(``pytracer scene.yaml --workers host:port,...``) sends the scene to each
+worker once, then hands out tiles until none are left. Tiles held by a
+worker that disconnects are handed to the remaining workers.
+
+Messages are pickled, so only run workers on a trusted network.
+"""
+
+import io
+import pickle
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .render import (
+    TILE_SIZE,
+    Tile,
+    generate_tiles,
+    get_tracking_function,
+    render_tile,
+    write_tile,
+)
+from .world import MAX_REFLECTIONS, World
+
+DEFAULT_PORT = 9876
+
+# Messages are prefixed with their length as an unsigned 64 bit int
+HEADER = struct.Struct("!Q")
+
+Address = tuple[str, int]
+
+Stream = Union[BinaryIO, io.BufferedIOBase]
+
+
+def send_message(stream: Stream, message) -> None:
+    send_bytes(stream, pickle.dumps(message))
+
+
+def send_bytes(stream: Stream, data: bytes) -> None:
+    stream.write(HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def receive_message(stream: Stream):
+    (length,) = HEADER.unpack(_read_exactly(stream, HEADER.size))
+    return pickle.loads(_read_exactly(stream, length))
+
+
+def _read_exactly(stream: Stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Connection closed")
+    return data
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """Renders tiles for a single coordinator connection"""
+
+    def handle(self):
+        camera = world = None
+        settings: dict = {}
+        while True:
+            try:
+                message = receive_message(self.rfile)
+            except EOFError:
+                return
+            match message:
+                case ("scene", camera, world, settings):
+                    pass
+                case ("tile", tile):
+                    pixels = render_tile(camera, world, tile, **settings)
+                    send_message(self.wfile, ("pixels", tile, pixels))
+                case _:
+                    raise ValueError(f"Unexpected message: {message!r}")
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: Address):
+        super().__init__(address, WorkerHandler)
+
+
+def render_distributed(
+    camera: Camera,
+    world: World,
+    workers: list[Address],
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    show_progress: bool = True,
+    timeout: Optional[float] = None,
+) -> Canvas:
+    """
+    Render on remote workers. Raises RuntimeError if every worker is lost
+    before the image is done. ``timeout`` applies to each socket operation,
+    so a hung worker is treated as lost.
+    """
+    canvas = Canvas(camera.hsize, camera.vsize)
+    tiles = list(generate_tiles(canvas.width, canvas.height, tile_size))
+    pending: queue.Queue[Tile] = queue.Queue()
+    for tile in tiles:
+        pending.put(tile)
+
+    # Pickle the scene once, rather than once per worker
+    scene = pickle.dumps(
+        (
+            "scene",
+            camera,
+            world,
+            {"supersampling": supersampling, "max_depth": max_depth},
+        )
+    )
+    results: queue.Queue[Optional[tuple[Tile, np.ndarray]]] = queue.Queue()
+    done = threading.Event()
+    threads = [
+        threading.Thread(
+            target=_drive_worker,
+            args=(address, scene, pending, results, done, timeout),
+            daemon=True,
+        )
+        for address in workers
+    ]
+    for thread in threads:
+        thread.start()
+
+    def completed_tiles():
+        remaining, alive = len(tiles), len(threads)
+        while remaining:
+            result = results.get()
+            if result is None:
+                alive -= 1
+                if alive == 0:
+                    raise RuntimeError(
+                        f"All workers were lost with {remaining} tiles left"
+                    )
+                continue
+            remaining -= 1
+            yield result
+
+    tracking_function = get_tracking_function(show_progress)
+    try:
+        for tile, pixels in tracking_function(
+            completed_tiles(), total=len(tiles), transient=True
+        ):
+            write_tile(canvas, tile, pixels)
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    return canvas
+
+
+def _drive_worker(
+    address: Address,
+    scene: bytes,
+    pending: "queue.Queue[Tile]",
+    results: "queue.Queue[Optional[tuple[Tile, np.ndarray]]]",
+    done: threading.Event,
+    timeout: Optional[float],
+) -> None:
+    """
+    Feed tiles to one worker until the render is done. If the worker is
+    lost or sends a bad reply, its tile goes back on the queue and None is
+    put on results.
+    """
+    tile = None
+    try:
+        with socket.create_connection(address, timeout=timeout) as sock:
+            stream = sock.makefile("rwb")
+            send_bytes(stream, scene)
+            while not done.is_set():
+                try:
+                    tile = pending.get(timeout=0.1)
+                except queue.Empty:
+                    # Keep waiting, in case another worker is lost and
+                    # its tile is put back.
+                    continue
+                send_message(stream, ("tile", tile))
+                match receive_message(stream):
+                    case ("pixels", rendered, pixels) if rendered == tile:
+                        results.put((rendered, pixels))
+                    case _:
+                        raise ValueError(f"Unexpected reply for tile {tile}")
+                tile = None
+    except Exception:
+        # Whatever went wrong, the worker is no use, and the render must
+        # hear about it so it doesn't wait for a result forever
+        if tile is not None:
+            pending.put(tile)
+        results.put(None)
+
+
+def parse_address(address: str) -> Address:
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port)
+
+
+def serve_worker(host: str, port: int) -> None:
+    with WorkerServer((host, port)) as server:
+        bound_host, bound_port = server.server_address[:2]
+        print(f"pytracer worker listening on {bound_host!s}:{bound_port}", flush=True)
+        server.serve_forever()
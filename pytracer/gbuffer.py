@@ -0,0 +1,366 @@
+"""
+G-buffers: the primary hit under every pixel, kept as arrays.
+
+Rendering through a G-buffer traces each primary ray once. Later renders
+with the same camera and geometry reshade from the buffer, casting shadow
+rays only for lights that moved, and only the secondary rays needed by
+reflective and transparent materials.
+
+Hit data is stored at the render precision, but light positions are kept
+in float64, so moved lights are still spotted exactly.
+
+Refractive indices decide n1 and n2, which are stored, so they are part of
+the scene key along with the camera and geometry. Changing any of them
+means the buffer is rebuilt.
+"""
+
+import hashlib
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from functools import partial
+from typing import Optional
+
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .primitives import FourTuple, Point, Vector3
+from .ray import Intersection
+from .render import (
+    TILE_SIZE,
+    Tile,
+    generate_tiles,
+    get_tracking_function,
+    make_executor,
+    resolve_backend,
+    resolve_num_processes,
+    resolve_precision,
+    write_tile,
+)
+from .utils import EPSILON
+from .world import MAX_REFLECTIONS, Comps, World
+
+
+def scene_key(camera: Camera, world: World) -> str:
+    """Hash of everything that decides primary hits"""
+    digest = hashlib.sha256()
+    digest.update(repr((camera.hsize, camera.vsize, camera.field_of_view)).encode())
+    digest.update(camera.transform.cells.tobytes())
+    for shape in world.shapes:
+        digest.update(type(shape).__name__.encode())
+        digest.update(repr(shape.material.refractive_index).encode())
+        digest.update(shape.transform.cells.tobytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class GBuffer:
+    """
+    Primary hits of a height x width image. Points and vectors are stored
+    with all four components, so shading from them is exact.
+    """
+
+    key: str
+    # Index into world.shapes, or -1 where the ray hits nothing
+    shape_id: np.ndarray
+    t: np.ndarray
+    position: np.ndarray
+    # Normals face the eye
+    normal: np.ndarray
+    eye: np.ndarray
+    inside: np.ndarray
+    n1: np.ndarray
+    n2: np.ndarray
+    # Positions of the lights the buffer was built with, and whether each
+    # hit is in shadow from each of them
+    light_positions: np.ndarray
+    shadows: np.ndarray
+
+    @classmethod
+    def empty(
+        cls,
+        key: str,
+        width: int,
+        height: int,
+        lights: int,
+        precision: str = "float64",
+    ) -> "GBuffer":
+        return cls(
+            key=key,
+            shape_id=np.full((height, width), -1, dtype=np.int32),
+            t=np.zeros((height, width), dtype=precision),
+            position=np.zeros((height, width, 4), dtype=precision),
+            normal=np.zeros((height, width, 4), dtype=precision),
+            eye=np.zeros((height, width, 4), dtype=precision),
+            inside=np.zeros((height, width), dtype=bool),
+            n1=np.ones((height, width), dtype=precision),
+            n2=np.ones((height, width), dtype=precision),
+            light_positions=np.zeros((lights, 4)),
+            shadows=np.zeros((height, width, lights), dtype=bool),
+        )
+
+    @property
+    def width(self) -> int:
+        return self.shape_id.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.shape_id.shape[0]
+
+    @property
+    def precision(self) -> str:
+        return self.t.dtype.name
+
+    def matches(self, camera: Camera, world: World) -> bool:
+        return self.key == scene_key(camera, world)
+
+    def save(self, path: str) -> None:
+        # Write through a file object, so numpy doesn't append ".npz"
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **asdict(self))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GBuffer":
+        with np.load(path) as data:
+            arrays = {field.name: data[field.name] for field in fields(cls)}
+        return cls(**{**arrays, "key": str(arrays["key"])})
+
+    def tile(self, tile: Tile) -> "GBuffer":
+        """The part of the buffer covering a tile"""
+        x0, y0, x1, y1 = tile
+        per_pixel = {
+            field.name: getattr(self, field.name)[y0:y1, x0:x1]
+            for field in fields(self)
+            if field.name not in ("key", "light_positions")
+        }
+        return replace(self, **per_pixel)
+
+    def paste(self, tile: Tile, part: "GBuffer") -> None:
+        """Copy a tile's buffer, from trace_tile, into place"""
+        x0, y0, x1, y1 = tile
+        for field in fields(self):
+            if field.name not in ("key", "light_positions"):
+                getattr(self, field.name)[y0:y1, x0:x1] = getattr(part, field.name)
+
+    def comps(self, x: int, y: int, world: World) -> Optional[Comps]:
+        """Rebuild prepare_computations() for the hit at (x, y)"""
+        shape_id = int(self.shape_id[y, x])
+        if shape_id < 0:
+            return None
+        position = Point(*self.position[y, x].tolist())
+        normalv = Vector3(*self.normal[y, x].tolist())
+        eyev = Vector3(*self.eye[y, x].tolist())
+        # eyev is the negated ray direction, and negation is exact
+        direction = -eyev
+        return Comps(
+            t=float(self.t[y, x]),
+            shape=world.shapes[shape_id],
+            position=position,
+            over_point=position + normalv * EPSILON,
+            under_point=position - normalv * EPSILON,
+            eyev=eyev,
+            normalv=normalv,
+            reflectv=direction.reflect(normalv),
+            inside=bool(self.inside[y, x]),
+            n1=float(self.n1[y, x]),
+            n2=float(self.n2[y, x]),
+        )
+
+
+def build_gbuffer(
+    camera: Camera,
+    world: World,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    show_progress: bool = False,
+    precision: Optional[str] = None,
+) -> GBuffer:
+    """
+    Trace the primary hit, and its shadow rays, under every pixel. Hits
+    are stored as ``precision``, as in ``render``.
+    """
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    precision = resolve_precision(precision)
+    gbuffer = empty_gbuffer(camera, world, precision)
+    tiles = list(generate_tiles(camera.hsize, camera.vsize, tile_size))
+    executor, task = make_executor(
+        backend, camera, world, num_processes, task=trace_tile
+    )
+    task = partial(task, precision=precision)
+    tracking_function = get_tracking_function(show_progress)
+    with executor:
+        for tile, part in tracking_function(
+            zip(tiles, executor.map(task, tiles)), total=len(tiles), transient=True
+        ):
+            gbuffer.paste(tile, part)
+    return gbuffer
+
+
+def reshade(
+    camera: Camera,
+    world: World,
+    gbuffer: GBuffer,
+    max_depth: int = MAX_REFLECTIONS,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    show_progress: bool = False,
+) -> Canvas:
+    """
+    Render from the G-buffer. The result matches render() of the same
+    camera and world, at the buffer's precision. Raises ValueError if the
+    buffer was built for a different camera, geometry or refractive indices.
+    """
+    if not gbuffer.matches(camera, world):
+        raise ValueError("G-buffer was built for a different camera or geometry")
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    canvas = Canvas(camera.hsize, camera.vsize, dtype=gbuffer.precision)
+    tiles = list(generate_tiles(camera.hsize, camera.vsize, tile_size))
+    executor, task = make_executor(
+        backend, camera, world, num_processes, task=shade_tile
+    )
+    task = partial(task, max_depth=max_depth)
+    tracking_function = get_tracking_function(show_progress)
+    with executor:
+        results = executor.map(task, tiles, [gbuffer.tile(tile) for tile in tiles])
+        for tile, pixels in tracking_function(
+            zip(tiles, results), total=len(tiles), transient=True
+        ):
+            write_tile(canvas, tile, pixels)
+    return canvas
+
+
+def render_with_gbuffer(
+    camera: Camera,
+    world: World,
+    path: str,
+    max_depth: int = MAX_REFLECTIONS,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    show_progress: bool = False,
+    precision: Optional[str] = None,
+) -> Canvas:
+    """
+    Reshade from the G-buffer saved at ``path`` if it matches the scene
+    and ``precision``. Otherwise build it, save it for next time, and
+    shade from it.
+    """
+    precision = resolve_precision(precision)
+    gbuffer = None
+    if os.path.exists(path):
+        gbuffer = GBuffer.load(path)
+        if not gbuffer.matches(camera, world) or gbuffer.precision != precision:
+            gbuffer = None
+    if gbuffer is None:
+        gbuffer = build_gbuffer(
+            camera, world, num_processes, backend, tile_size, show_progress, precision
+        )
+        gbuffer.save(path)
+    return reshade(
+        camera,
+        world,
+        gbuffer,
+        max_depth,
+        num_processes,
+        backend,
+        tile_size,
+        show_progress,
+    )
+
+
+def _light_positions(world: World) -> np.ndarray:
+    return np.array([_components(light.position) for light in world.lights]).reshape(
+        (len(world.lights), 4)
+    )
+
+
+def _components(t: FourTuple) -> tuple[float, float, float, float]:
+    return t.x, t.y, t.z, t.w
+
+
+def empty_gbuffer(camera: Camera, world: World, precision: str = "float64") -> GBuffer:
+    """A G-buffer for the scene, with nothing hit yet"""
+    gbuffer = GBuffer.empty(
+        scene_key(camera, world),
+        camera.hsize,
+        camera.vsize,
+        len(world.lights),
+        precision,
+    )
+    gbuffer.light_positions = _light_positions(world)
+    return gbuffer
+
+
+def trace_tile(
+    camera: Camera, world: World, tile: Tile, precision: str = "float64"
+) -> GBuffer:
+    """The G-buffer of one tile, for pasting into the full buffer"""
+    x0, y0, x1, y1 = tile
+    part = GBuffer.empty("", x1 - x0, y1 - y0, len(world.lights), precision)
+    part.light_positions = _light_positions(world)
+    shape_index = {id(shape): i for i, shape in enumerate(world.shapes)}
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            ray = camera.ray_for_pixel(x, y)
+            intersections = world.intersect(ray)
+            hit = Intersection.hit(intersections)
+            if hit is None:
+                continue
+            comps = world.prepare_computations(hit, ray, intersections)
+            i, j = y - y0, x - x0
+            part.shape_id[i, j] = shape_index[id(comps.shape)]
+            part.t[i, j] = comps.t
+            part.position[i, j] = _components(comps.position)
+            part.normal[i, j] = _components(comps.normalv)
+            part.eye[i, j] = _components(comps.eyev)
+            part.inside[i, j] = comps.inside
+            part.n1[i, j] = comps.n1
+            part.n2[i, j] = comps.n2
+            for k, light in enumerate(world.lights):
+                part.shadows[i, j, k] = world.is_shadowed(comps.over_point, light)
+    return part
+
+
+def shade_tile(
+    camera: Camera,
+    world: World,
+    tile: Tile,
+    gbuffer: GBuffer,
+    max_depth: int = MAX_REFLECTIONS,
+) -> np.ndarray:
+    """Shade one tile from its G-buffer, as a (height, width, 3) array"""
+    x0, y0, x1, y1 = tile
+    # Reuse stored shadow flags for lights that haven't moved
+    stored = {
+        tuple(position): k
+        for k, position in enumerate(gbuffer.light_positions.tolist())
+    }
+    lights = [
+        (light, stored.get(_components(light.position))) for light in world.lights
+    ]
+
+    pixels = np.zeros((y1 - y0, x1 - x0, 3), dtype=gbuffer.precision)
+    if max_depth == 0:
+        return pixels
+    for y in range(y1 - y0):
+        for x in range(x1 - x0):
+            comps = gbuffer.comps(x, y, world)
+            if comps is None:
+                continue
+            shadows = [
+                (
+                    bool(gbuffer.shadows[y, x, k])
+                    if k is not None
+                    else world.is_shadowed(comps.over_point, light)
+                )
+                for light, k in lights
+            ]
+            color = world.shade_hit(comps, remaining=max_depth, shadows=shadows)
+            pixels[y, x] = color.red, color.green, color.blue
+    return pixels
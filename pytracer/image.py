@@ -1,5 +1,13 @@
-from io import StringIO
-from typing import Generator, TextIO
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import StringIO, TextIOWrapper
+from typing import BinaryIO, Generator, Iterable, Optional, TextIO
+
+import numpy as np
 
 from .canvas import Canvas
 from .color import Color
@@ -8,34 +16,129 @@ from .color import Color
 class PPM:
     identifier = "P3"
     max_color_val = 255
+    binary = False
+    extension = ".ppm"
+
+    # Pixel data lines are broken once they reach this many characters
+    line_length = 59
+
+    @classmethod
+    def save(
+        self, canvas: Canvas, destination: TextIO, comments: Iterable[str] = ()
+    ) -> None:
+        self.save_rows(
+            canvas.width, canvas.height, canvas.bands(), destination, comments
+        )
+
+    @classmethod
+    def load(cls, source: TextIO) -> tuple[Canvas, list[str]]:
+        """Read a P3 image, returning the canvas and any header comments"""
+        comments = []
+        tokens: list[str] = []
+        for line in source:
+            if line.startswith("#"):
+                comments.append(line[1:].strip())
+            else:
+                tokens += line.split()
+
+        if not tokens or tokens[0] != cls.identifier:
+            raise ValueError(f"Not a {cls.identifier} PPM image")
+        width, height, max_color_val = (int(t) for t in tokens[1:4])
+        values = np.array(tokens[4:], dtype=float) / max_color_val
+        if len(values) != width * height * 3:
+            raise ValueError(
+                f"Expected {width * height * 3} color values, got {len(values)}"
+            )
+        return Canvas.from_array(values.reshape((height, width, 3))), comments
+
+    @classmethod
+    def save_rows(
+        cls,
+        width: int,
+        height: int,
+        rows: Iterable[np.ndarray],
+        destination: TextIO,
+        comments: Iterable[str] = (),
+    ) -> None:
+        """
+        Write an image given as bands of ``(rows, width, 3)`` arrays, top to
+        bottom, writing each band as it arrives. Same output as ``save``.
+        """
+        for line in cls._header_lines(width, height, comments):
+            destination.write(f"{line}\n")
+        # Pixels on the last, unfinished line of a band
+        rest = np.empty((0, 3), dtype=np.intp)
+        for band in rows:
+            values = np.concatenate(
+                [rest, quantize(band, cls.max_color_val).reshape(-1, 3)]
+            )
+            body, rest = cls._pixel_text(values)
+            destination.write(body)
+        destination.write(cls._end_text(rest))
 
     @classmethod
-    def save(self, canvas: Canvas, destination: TextIO) -> None:
+    def _pixel_text(cls, values: np.ndarray) -> tuple[str, np.ndarray]:
+        """
+        The finished lines of quantized pixel values, and the values of the
+        pixels left over on an unfinished line.
+        """
+        values = values.reshape(-1)
+        digits, lengths = _digit_table(cls.max_color_val)
+        value_lengths = lengths[values]
+        pixel_lengths = value_lengths.reshape(-1, 3).sum(axis=1) + 2
+        breaks = _line_breaks(pixel_lengths, cls.line_length)
+        finished = np.flatnonzero(breaks)[-1] + 1 if breaks.any() else 0
+        rest = values[finished * 3 :].reshape(-1, 3)
+        values, value_lengths = values[: finished * 3], value_lengths[: finished * 3]
 
-        for line in self.lines(canvas):
-            destination.write(line)
-            destination.write("\n")
+        # Every value gets its digits and a separator: a space within a
+        # pixel and between pixels, a newline at the end of a line.
+        cells = np.empty((len(values), digits.shape[1] + 1), dtype=np.uint8)
+        cells[:, :-1] = digits[values]
+        cells[:, -1] = ord(" ")
+        cells[2::3, -1][breaks[:finished]] = ord("\n")
+        mask = np.ones(cells.shape, dtype=bool)
+        mask[:, :-1] = np.arange(digits.shape[1]) < value_lengths[:, np.newaxis]
+        return cells[mask].tobytes().decode("ascii"), rest
 
     @classmethod
-    def lines(cls, canvas: Canvas) -> Generator[str, None, None]:
-        yield from cls.header(canvas)
-        yield from cls.pixels(canvas.pixels)
+    def _end_text(cls, rest: np.ndarray) -> str:
+        # The unfinished line, then the data is followed by two blank lines
+        line = " ".join(" ".join(map(str, pixel)) for pixel in rest.tolist())
+        return f"{line}\n\n\n"
 
     @classmethod
-    def header(cls, canvas: Canvas) -> Generator[str, None, None]:
+    def lines(
+        cls, canvas: Canvas, comments: Iterable[str] = ()
+    ) -> Generator[str, None, None]:
+        yield from cls.header(canvas, comments)
+        yield from cls.pixels(canvas)
+
+    @classmethod
+    def header(
+        cls, canvas: Canvas, comments: Iterable[str] = ()
+    ) -> Generator[str, None, None]:
+        yield from cls._header_lines(canvas.width, canvas.height, comments)
+
+    @classmethod
+    def _header_lines(
+        cls, width: int, height: int, comments: Iterable[str] = ()
+    ) -> Generator[str, None, None]:
         yield cls.identifier
-        yield f"{canvas.width} {canvas.height}"
+        for comment in comments:
+            yield f"# {comment}"
+        yield f"{width} {height}"
         yield str(cls.max_color_val)
 
     @classmethod
-    def pixels(cls, pixels: list[Color]) -> Generator[str, None, None]:
+    def pixels(cls, pixels: Iterable[Color]) -> Generator[str, None, None]:
         # limit line length to 70 chars.
         buff = StringIO()
         for pixel in pixels:
             buff.write(f"{cls.pixel_to_color_string(pixel)}")
             # A color string can be ~11 chars, assuming a three digit
             # max color, so stop writing to this line at 59 chars,
-            if buff.tell() >= 59:
+            if buff.tell() >= cls.line_length:
                 yield buff.getvalue()
                 buff = StringIO()
             else:
@@ -50,3 +153,366 @@ class PPM:
         green = max(0, min(round(pixel.green * cls.max_color_val), cls.max_color_val))
         blue = max(0, min(round(pixel.blue * cls.max_color_val), cls.max_color_val))
         return f"{red} {green} {blue}"
+
+
+class BinaryPPM:
+    """
+    P6 images, with one byte per channel. Much smaller and faster to write
+    than P3, and read by the same tools.
+    """
+
+    identifier = "P6"
+    max_color_val = 255
+    binary = True
+    extension = ".ppm"
+
+    @classmethod
+    def save(
+        cls, canvas: Canvas, destination: BinaryIO, comments: Iterable[str] = ()
+    ) -> None:
+        cls.save_rows(
+            canvas.width, canvas.height, canvas.bands(), destination, comments
+        )
+
+    @classmethod
+    def save_rows(
+        cls,
+        width: int,
+        height: int,
+        rows: Iterable[np.ndarray],
+        destination: BinaryIO,
+        comments: Iterable[str] = (),
+    ) -> None:
+        """
+        Write an image given as bands of ``(rows, width, 3)`` arrays, top to
+        bottom, writing each band as it arrives
+        """
+        destination.write(cls._header(width, height, comments))
+        for band in rows:
+            destination.write(
+                quantize(band, cls.max_color_val).astype(np.uint8).tobytes()
+            )
+
+    @classmethod
+    def _header(cls, width: int, height: int, comments: Iterable[str]) -> bytes:
+        lines = [cls.identifier, *(f"# {comment}" for comment in comments)]
+        lines += [f"{width} {height}", str(cls.max_color_val)]
+        return "".join(f"{line}\n" for line in lines).encode()
+
+    @classmethod
+    def load(cls, source: BinaryIO) -> tuple[Canvas, list[str]]:
+        """Read a P6 image, returning the canvas and any header comments"""
+        comments = []
+        tokens: list[bytes] = []
+        while len(tokens) < 4:
+            line = source.readline()
+            if not line:
+                break
+            if line.startswith(b"#"):
+                comments.append(line[1:].strip().decode())
+            else:
+                tokens += line.split()
+        if len(tokens) != 4 or tokens[0] != cls.identifier.encode():
+            raise ValueError(f"Not a {cls.identifier} PPM image")
+
+        width, height, max_color_val = (int(t) for t in tokens[1:])
+        if max_color_val > 255:
+            raise ValueError("Only one byte per channel P6 images are supported")
+        data = source.read()
+        if len(data) != width * height * 3:
+            raise ValueError(f"Expected {width * height * 3} bytes, got {len(data)}")
+        values = np.frombuffer(data, dtype=np.uint8) / max_color_val
+        return Canvas.from_array(values.reshape((height, width, 3))), comments
+
+
+class PNG:
+    """
+    PNG images, 8 bits per channel, written with zlib.
+
+    Each row gets the PNG filter that best predicts it, picked for all rows
+    at once with NumPy. The filtered rows are compressed in pieces on a
+    thread pool, zlib releases the GIL, each piece as a separate deflate
+    stream. Pieces end on a byte boundary without being the final block,
+    so joined together they form the single stream PNG expects.
+    """
+
+    signature = b"\x89PNG\r\n\x1a\n"
+    max_color_val = 255
+    binary = True
+    extension = ".png"
+
+    # zlib compression level, 0 to 9
+    level = 6
+
+    # Filtered bytes compressed as one piece. Smaller pieces share work
+    # better between threads, at a small cost in compression.
+    piece_bytes = 2**18
+
+    @classmethod
+    def save(
+        cls,
+        canvas: Canvas,
+        destination: BinaryIO,
+        comments: Iterable[str] = (),
+        level: Optional[int] = None,
+        threads: Optional[int] = None,
+    ) -> None:
+        cls.save_rows(
+            canvas.width,
+            canvas.height,
+            canvas.bands(),
+            destination,
+            comments,
+            level=level,
+            threads=threads,
+        )
+
+    @classmethod
+    def save_rows(
+        cls,
+        width: int,
+        height: int,
+        rows: Iterable[np.ndarray],
+        destination: BinaryIO,
+        comments: Iterable[str] = (),
+        level: Optional[int] = None,
+        threads: Optional[int] = None,
+    ) -> None:
+        """
+        Write an image given as bands of ``(rows, width, 3)`` arrays, top to
+        bottom, compressing and writing each band as it arrives. ``threads``
+        defaults to the CPU count.
+        """
+        level = cls.level if level is None else level
+        threads = threads or os.cpu_count() or 1
+        destination.write(cls.signature)
+        # 8 bit RGB, no interlacing
+        cls._write_chunk(
+            destination, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+        )
+        for comment in comments:
+            text = b"Comment\0" + comment.encode("latin-1", errors="replace")
+            cls._write_chunk(destination, b"tEXt", text)
+
+        # One zlib stream across all the IDAT chunks: a header, the pieces,
+        # an empty final block, then a checksum of all the filtered bytes.
+        cls._write_chunk(destination, b"IDAT", _zlib_header(level))
+        checksum = zlib.adler32(b"")
+        previous = np.zeros(width * 3, dtype=np.uint8)
+        with ThreadPoolExecutor(threads) as executor:
+            pending: deque = deque()
+            for band in rows:
+                pixels = quantize(band, cls.max_color_val).astype(np.uint8)
+                pixels = pixels.reshape((-1, width * 3))
+                if not len(pixels):
+                    continue
+                filtered = filter_rows(pixels, previous)
+                previous = pixels[-1]
+                checksum = zlib.adler32(filtered.data, checksum)
+                piece_rows = max(1, cls.piece_bytes // filtered.shape[1])
+                for y in range(0, len(filtered), piece_rows):
+                    piece = filtered[y : y + piece_rows].tobytes()
+                    pending.append(executor.submit(_deflate, piece, level))
+                # Bound the compressed data waiting to be written
+                while len(pending) > 2 * threads:
+                    cls._write_chunk(destination, b"IDAT", pending.popleft().result())
+            while pending:
+                cls._write_chunk(destination, b"IDAT", pending.popleft().result())
+        end = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS).flush()
+        cls._write_chunk(destination, b"IDAT", end + struct.pack(">I", checksum))
+        cls._write_chunk(destination, b"IEND", b"")
+
+    @classmethod
+    def _write_chunk(cls, destination: BinaryIO, kind: bytes, data: bytes) -> None:
+        checksum = zlib.crc32(data, zlib.crc32(kind))
+        destination.write(
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", checksum)
+        )
+
+
+class PFM:
+    """
+    Portable float map images: linear 32 bit float RGB, without clamping,
+    so bright highlights survive for tone mapping later. Rows are stored
+    bottom to top. The format has no comments, so any are dropped.
+    """
+
+    identifier = "PF"
+    binary = True
+    extension = ".pfm"
+
+    # A negative scale marks little endian data
+    scale = -1.0
+
+    @classmethod
+    def save(
+        cls, canvas: Canvas, destination: BinaryIO, comments: Iterable[str] = ()
+    ) -> None:
+        cls.save_rows(
+            canvas.width, canvas.height, canvas.bands(), destination, comments
+        )
+
+    @classmethod
+    def save_rows(
+        cls,
+        width: int,
+        height: int,
+        rows: Iterable[np.ndarray],
+        destination: BinaryIO,
+        comments: Iterable[str] = (),
+    ) -> None:
+        """
+        Write an image given as bands of ``(rows, width, 3)`` arrays, top to
+        bottom. As rows are stored bottom up, bands are written in place as
+        they arrive if the destination can seek, and held until the end
+        otherwise.
+        """
+        header = cls._header(width, height)
+        destination.write(header)
+        if not destination.seekable():
+            bands = [np.asarray(band, dtype="<f4") for band in rows]
+            pixels = np.concatenate(bands) if bands else np.empty((0, width, 3))
+            destination.write(pixels[::-1].astype("<f4").tobytes())
+            return
+
+        start = destination.tell()
+        row_bytes = width * 3 * 4
+        y = 0
+        for band in rows:
+            y += len(band)
+            destination.seek(start + (height - y) * row_bytes)
+            destination.write(np.asarray(band, dtype="<f4")[::-1].tobytes())
+        destination.seek(start + height * row_bytes)
+
+    @classmethod
+    def load(cls, source: BinaryIO) -> tuple[Canvas, list[str]]:
+        """Read a PFM image. There are never any comments."""
+        tokens: list[bytes] = []
+        while len(tokens) < 4:
+            line = source.readline()
+            if not line:
+                break
+            tokens += line.split()
+        if len(tokens) != 4 or tokens[0] != cls.identifier.encode():
+            raise ValueError("Not an RGB PFM image")
+        width, height = int(tokens[1]), int(tokens[2])
+        dtype = "<f4" if float(tokens[3]) < 0 else ">f4"
+        data = source.read()
+        if len(data) != width * height * 3 * 4:
+            raise ValueError(
+                f"Expected {width * height * 3 * 4} bytes, got {len(data)}"
+            )
+        pixels = np.frombuffer(data, dtype=dtype).reshape((height, width, 3))
+        return Canvas.from_array(pixels[::-1].astype(np.float32)), []
+
+    @classmethod
+    def _header(cls, width: int, height: int) -> bytes:
+        return f"{cls.identifier}\n{width} {height}\n{cls.scale}\n".encode()
+
+
+def filter_rows(pixels: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """
+    PNG filter ``(rows, width * 3)`` bytes of RGB pixels, given the row
+    above the first. Each row is prefixed with the filter type that gives
+    it the smallest sum of absolute differences, the usual heuristic.
+    """
+    x = pixels.astype(np.int16)
+    up = np.vstack([previous[np.newaxis], pixels[:-1]]).astype(np.int16)
+    # One pixel, 3 bytes, to the left. Zero off the left edge.
+    left = np.zeros_like(x)
+    left[:, 3:] = x[:, :-3]
+    up_left = np.zeros_like(x)
+    up_left[:, 3:] = up[:, :-3]
+
+    # Paeth picks whichever neighbour is closest to left + up - up_left
+    to_left, to_up = np.abs(up - up_left), np.abs(left - up_left)
+    to_up_left = np.abs(left + up - 2 * up_left)
+    paeth = np.where(
+        (to_left <= to_up) & (to_left <= to_up_left),
+        left,
+        np.where(to_up <= to_up_left, up, up_left),
+    )
+    # None, Sub, Up, Average and Paeth, in PNG filter type order
+    candidates = np.stack(
+        [x, x - left, x - up, x - (left + up) // 2, x - paeth]
+    ).astype(np.uint8)
+    scores = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+    best = scores.argmin(axis=0)
+
+    filtered = np.empty((len(pixels), pixels.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = best
+    filtered[:, 1:] = candidates[best, np.arange(len(pixels))]
+    return filtered
+
+
+def _zlib_header(level: int) -> bytes:
+    # 32K window deflate, and the compression level as zlib reports it
+    method = 0x78
+    flags = (0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3) << 6
+    return bytes([method, flags + 31 - (method * 256 + flags) % 31])
+
+
+def _deflate(data: bytes, level: int) -> bytes:
+    """Raw deflate ``data``, ending on a byte boundary without a final block"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+# Image classes by --format name
+FORMATS: dict[str, type[PPM] | type[BinaryPPM] | type[PNG] | type[PFM]] = {
+    "p3": PPM,
+    "p6": BinaryPPM,
+    "png": PNG,
+    "pfm": PFM,
+}
+
+
+def load_image(source: BinaryIO) -> tuple[Canvas, list[str]]:
+    """Read a P3, P6 or PFM image, returning the canvas and any header comments"""
+    magic = source.read(len(PNG.signature))
+    source.seek(0)
+    if magic[:2] == BinaryPPM.identifier.encode():
+        return BinaryPPM.load(source)
+    if magic[:2] == PFM.identifier.encode():
+        return PFM.load(source)
+    if magic[:2] == PPM.identifier.encode():
+        return PPM.load(TextIOWrapper(source, encoding="ascii"))
+    if magic == PNG.signature:
+        raise ValueError("PNG images can't be read, only P3, P6 and PFM")
+    raise ValueError("Not a P3, P6 or PFM image")
+
+
+def quantize(canvas: Canvas | np.ndarray, max_color_val: int) -> np.ndarray:
+    """Pixels as integers from 0 to ``max_color_val``, rounding half to even"""
+    values = np.rint(np.asarray(canvas, dtype=np.float64) * max_color_val)
+    return np.clip(values, 0, max_color_val).astype(np.intp)
+
+
+@cache
+def _digit_table(max_color_val: int) -> tuple[np.ndarray, np.ndarray]:
+    """ASCII digits of every value up to max_color_val, and their lengths"""
+    strings = [str(value).encode() for value in range(max_color_val + 1)]
+    digits = np.zeros((len(strings), len(strings[-1])), dtype=np.uint8)
+    for value, string in enumerate(strings):
+        digits[value, : len(string)] = list(string)
+    return digits, np.array([len(string) for string in strings])
+
+
+def _line_breaks(pixel_lengths: np.ndarray, line_length: int) -> np.ndarray:
+    """
+    Which pixels end a line, when pixels are written separated by spaces and
+    a line is broken once it reaches ``line_length`` characters.
+    """
+    # ends[i] is where pixel i - 1 ends, counting the space after it, if
+    # all pixels were on one line
+    ends = np.zeros(len(pixel_lengths) + 1, dtype=np.int64)
+    np.cumsum(pixel_lengths + 1, out=ends[1:])
+    # For a line starting at each pixel, the pixel after the one that
+    # reaches line_length (its trailing space not counted)
+    next_start = np.searchsorted(ends, ends[:-1] + line_length + 1).tolist()
+    breaks = np.zeros(len(pixel_lengths), dtype=bool)
+    start = 0
+    while start < len(next_start) and next_start[start] <= len(pixel_lengths):
+        start = next_start[start]
+        breaks[start - 1] = True
+    return breaks
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import math
 from functools import cached_property
+from typing import Optional
 
 import numpy as np
 
@@ -10,6 +11,7 @@ from .primitives import FourTuple
 
 class Matrix:
     def __init__(self, cells: list[list[float | int]]):
+        self._inverse: Optional[Matrix] = None
         self.cells = np.array(cells, dtype=np.float64)
         if cells:
             width = len(cells[0])
@@ -35,10 +37,7 @@ class Matrix:
     @classmethod
     def identity(cls, size) -> Matrix:
         """Build identity matrix of shape size x size"""
-        result = Matrix.with_shape(size, size)
-        for i in range(size):
-            result[i, i] = 1
-        return result
+        return Matrix.from_np_array(np.identity(size))
 
     @classmethod
     def translation(cls, x: int | float, y: int | float, z: int | float) -> Matrix:
@@ -136,10 +135,15 @@ class Matrix:
         return self.determinant != 0
 
     def inverse(self) -> Matrix:
-        """Return the inverse of this matrix"""
+        """
+        Return the inverse of this matrix. It is computed once, and shared
+        by every caller, so don't modify it.
+        """
         # if not self.is_invertible():
         #     raise ValueError(f"Matrix is not invertible: {self}")
-        return Matrix.from_np_array(np.linalg.inv(self.cells))
+        if self._inverse is None:
+            self._inverse = Matrix.from_np_array(np.linalg.inv(self.cells))
+        return self._inverse
 
     def __getitem__(self, key: tuple[int, int]) -> float | int:
         col, row = key
@@ -148,6 +152,9 @@ class Matrix:
     def __setitem__(self, key: tuple[int, int], value):
         col, row = key
         self.cells[col][row] = value
+        # Drop what was computed from the old cells
+        self._inverse = None
+        self.__dict__.pop("determinant", None)
 
     def __eq__(self, other) -> bool:
         return (
@@ -0,0 +1,26 @@
+"""
+Names and defaults of render options. Nothing here imports NumPy, so the
+CLI can build its argument parsers without loading the renderer.
+"""
+
+BACKENDS = ("process", "thread", "serial")
+
+# Element types of the pixel arrays of tiles and canvases. float32 halves
+# their memory and the data passed back from workers. Rays are always
+# traced in float64.
+PRECISIONS = ("float64", "float32")
+
+# Keys of image.FORMATS
+IMAGE_FORMATS = ("p3", "p6", "png", "pfm")
+
+# Width and height, in pixels, of the square tiles handed to workers
+TILE_SIZE = 16
+
+MAX_REFLECTIONS = 5
+
+# Seconds a distributed render waits on a worker, including while it
+# renders a tile, before treating it as lost
+WORKER_TIMEOUT = 300.0
+
+# Default size bound of a tile cache, in bytes
+CACHE_SIZE = 256 * 1024 * 1024
@@ -0,0 +1,235 @@
+"""
+A render pool that outlives any one render.
+
+Process workers keep an LRU cache of worlds, keyed by a hash of the
+scene. The pickled world goes along with every tile of the first render
+of a scene. After that, tiles are submitted with just the key, and the
+world is only sent again to workers that report it missing. The camera
+is small, so it is sent with every tile, letting renders of one scene at
+different sizes share a cache entry.
+"""
+
+import hashlib
+import pickle
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Iterable, Optional
+
+from .camera import Camera
+from .canvas import Canvas
+from .render import (
+    TILE_SIZE,
+    Tile,
+    generate_tiles,
+    render_tile,
+    resolve_backend,
+    resolve_num_processes,
+    write_tile,
+)
+from .world import MAX_REFLECTIONS, World
+
+# Worlds kept by each process worker
+SCENE_CACHE_SIZE = 8
+
+# Returned by workers in place of pixels when the world is not cached
+MISSING = "missing"
+
+_worlds: OrderedDict[str, World] = OrderedDict()
+
+
+class RenderPool:
+    def __init__(
+        self, num_processes: Optional[int] = None, backend: Optional[str] = None
+    ):
+        self.num_processes = resolve_num_processes(num_processes)
+        self.backend = resolve_backend(backend, self.num_processes)
+        self.executor: Executor
+        if self.backend == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.num_processes)
+        else:
+            max_workers = 1 if self.backend == "serial" else self.num_processes
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Keys of worlds already sent to the workers
+        self._sent: set[str] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self, cancel: bool = False) -> None:
+        self.executor.shutdown(cancel_futures=cancel)
+
+    def render(
+        self,
+        camera: Camera,
+        world: World,
+        key: Optional[str] = None,
+        tile_size: int = TILE_SIZE,
+        supersampling: int = 1,
+        max_depth: int = MAX_REFLECTIONS,
+    ) -> Canvas:
+        """
+        Render on the pool. ``key`` identifies the world, e.g. a hash of
+        its scene file, and defaults to a hash of the pickled world.
+        """
+        canvas = Canvas(camera.hsize, camera.vsize)
+        tiles = generate_tiles(camera.hsize, camera.vsize, tile_size)
+        settings: dict[str, Any] = {
+            "supersampling": supersampling,
+            "max_depth": max_depth,
+        }
+        for tile, pixels in self.render_tiles(camera, world, tiles, key, **settings):
+            write_tile(canvas, tile, pixels)
+        return canvas
+
+    def render_tiles(
+        self, camera, world, tiles, key=None, task: Callable = render_tile, **settings
+    ):
+        """
+        Yield (tile, pixels) for the tiles, in the order they complete.
+        ``task`` is called as ``task(camera, world, tile, **settings)`` and
+        must be picklable for the process backend. Tiles can be anything
+        the task accepts.
+        """
+        job = self.submit(camera, world, tiles, key, task=task, **settings)
+        try:
+            while job.futures:
+                done, _ = wait(job.futures, return_when="FIRST_COMPLETED")
+                for future in done:
+                    result = job.completed(future)
+                    if result is not None:
+                        yield result
+        finally:
+            # Closed early, so drop the tiles that haven't started
+            job.cancel()
+
+    def submit(
+        self,
+        camera: Camera,
+        world: World,
+        tiles: Iterable[Tile],
+        key: Optional[str] = None,
+        callback: Optional[Callable[[Future], None]] = None,
+        task: Callable = render_tile,
+        **settings,
+    ) -> "PoolJob":
+        """
+        Start rendering the tiles without waiting for them. ``callback``
+        is added to every future submitted for the job, including any
+        resubmitted to workers missing the world.
+        """
+        return PoolJob(self, camera, world, list(tiles), key, callback, task, settings)
+
+
+class PoolJob:
+    """The tiles of one image, in flight on a RenderPool"""
+
+    def __init__(
+        self,
+        pool: RenderPool,
+        camera: Camera,
+        world: World,
+        tiles: list[Tile],
+        key: Optional[str],
+        callback: Optional[Callable[[Future], None]],
+        task: Callable,
+        settings: dict,
+    ):
+        self.pool = pool
+        self.task = task
+        self.camera = camera
+        self.world = world
+        self.settings = settings
+        self.callback = callback
+        self.remaining = len(tiles)
+        self.futures: set[Future] = set()
+
+        if pool.backend != "process":
+            # Threads share the world, so there is nothing to cache
+            for tile in tiles:
+                self._submit(_thread_task, task, camera, world, tile, settings)
+            return
+
+        self._scene: Optional[bytes] = None
+        if key is None:
+            self._scene = pickle.dumps(world)
+            key = hashlib.sha256(self._scene).hexdigest()
+        self.key = key
+        first_scene = None
+        if key not in pool._sent:
+            first_scene = self._scene = self._scene or pickle.dumps(world)
+            pool._sent.add(key)
+        for tile in tiles:
+            self._submit(_pool_task, task, key, first_scene, camera, tile, settings)
+
+    @property
+    def done(self) -> bool:
+        return self.remaining == 0
+
+    def completed(self, future: Future) -> Optional[tuple[Any, Any]]:
+        """
+        Returns the (tile, pixels) of a finished future of this job, or None
+        if the tile had to be resubmitted with the world.
+        """
+        self.futures.discard(future)
+        tile, pixels = future.result()
+        if not (isinstance(pixels, str) and pixels == MISSING):
+            self.remaining -= 1
+            return tile, pixels
+        # This worker hasn't seen the world yet
+        if self._scene is None:
+            self._scene = pickle.dumps(self.world)
+        self._submit(
+            _pool_task,
+            self.task,
+            self.key,
+            self._scene,
+            self.camera,
+            tile,
+            self.settings,
+        )
+        return None
+
+    def cancel(self) -> None:
+        for future in self.futures:
+            future.cancel()
+
+    def _submit(self, task, *args) -> None:
+        future = self.pool.executor.submit(task, *args)
+        self.futures.add(future)
+        if self.callback is not None:
+            future.add_done_callback(self.callback)
+
+
+def _thread_task(
+    task: Callable, camera: Camera, world: World, tile, settings: dict
+) -> tuple[Any, Any]:
+    return tile, task(camera, world, tile, **settings)
+
+
+def _pool_task(
+    task: Callable,
+    key: str,
+    scene: Optional[bytes],
+    camera: Camera,
+    tile,
+    settings: dict,
+) -> tuple[Any, Any]:
+    world = _worlds.get(key)
+    if world is None:
+        if scene is None:
+            return tile, MISSING
+        world = pickle.loads(scene)
+        _worlds[key] = world
+        if len(_worlds) > SCENE_CACHE_SIZE:
+            _worlds.popitem(last=False)
+    _worlds.move_to_end(key)
+    return tile, task(camera, world, tile, **settings)
@@ -0,0 +1,94 @@
+from functools import partial
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .render import (
+    make_executor,
+    render_pixels,
+    resolve_backend,
+    resolve_num_processes,
+    resolve_precision,
+)
+from .world import MAX_REFLECTIONS, World
+
+# Each pass traces every Nth pixel along both axes: 1/64, 1/16, 1/4, then all
+DEFAULT_STRIDES = (8, 4, 2, 1)
+
+# Number of pixels handed to a worker at a time
+BATCH_SIZE = 256
+
+
+def render_progressive(
+    camera: Camera,
+    world: World,
+    strides: tuple[int, ...] = DEFAULT_STRIDES,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    precision: Optional[str] = None,
+) -> Iterator[Canvas]:
+    """
+    Render in coarse to fine passes, yielding the canvas after each one.
+
+    A pass traces every pixel whose x and y are multiples of its stride,
+    skipping pixels traced by earlier passes, and fills the gaps with the
+    nearest traced pixel above and to the left. The same canvas is
+    updated in place and yielded after every pass, so stop iterating to
+    abort the render.
+
+    The last stride should be 1 for the final pass to trace every pixel.
+    Pixels are stored as ``precision``, as in ``render``.
+    """
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    precision = resolve_precision(precision)
+    executor, task = make_executor(
+        backend, camera, world, num_processes, task=render_pixels
+    )
+    task = partial(
+        task, supersampling=supersampling, max_depth=max_depth, precision=precision
+    )
+
+    width, height = camera.hsize, camera.vsize
+    canvas = Canvas(width, height, dtype=precision)
+    samples = np.zeros((height, width, 3), dtype=precision)
+    traced = np.zeros((height, width), dtype=bool)
+
+    try:
+        for stride in strides:
+            ys, xs = np.nonzero(pass_mask(width, height, stride) & ~traced)
+            coords = list(zip(xs.tolist(), ys.tolist()))
+            batches = [
+                coords[i : i + BATCH_SIZE] for i in range(0, len(coords), BATCH_SIZE)
+            ]
+            for batch, pixels in zip(batches, executor.map(task, batches)):
+                batch_xs, batch_ys = zip(*batch)
+                samples[batch_ys, batch_xs] = pixels
+            traced[ys, xs] = True
+
+            canvas.write_pixels(0, 0, fill_nearest(samples, stride))
+            yield canvas
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def pass_mask(width: int, height: int, stride: int) -> np.ndarray:
+    """Boolean (height, width) mask of the pixels traced by a pass"""
+    mask = np.zeros((height, width), dtype=bool)
+    mask[::stride, ::stride] = True
+    return mask
+
+
+def fill_nearest(samples: np.ndarray, stride: int) -> np.ndarray:
+    """
+    Copy each pixel on the stride grid to the stride x stride block
+    below and to the right of it.
+    """
+    height, width, _ = samples.shape
+    ys = np.arange(height)
+    xs = np.arange(width)
+    return samples[np.ix_(ys - ys % stride, xs - xs % stride)]
@@ -0,0 +1,85 @@
+"""
+Render parts of an image separately, and stitch them back together.
+
+A region image is saved with a header comment recording where it sits
+in the full image, which ``merge`` uses to place it.
+"""
+
+from typing import Iterable, Optional
+
+from .canvas import Canvas
+from .render import Tile
+
+COMMENT_PREFIX = "pytracer region"
+
+
+def parse_region(spec: str) -> Tile:
+    """Parse an "x0,y0,x1,y1" region. x1 and y1 are exclusive"""
+    try:
+        x0, y0, x1, y1 = (int(value) for value in spec.split(","))
+    except ValueError as e:
+        raise ValueError(f"Invalid region, expected x0,y0,x1,y1: {spec}") from e
+    return x0, y0, x1, y1
+
+
+def region_comment(region: Tile, width: int, height: int) -> str:
+    x0, y0, x1, y1 = region
+    return f"{COMMENT_PREFIX} {x0} {y0} {x1} {y1} of {width} {height}"
+
+
+def find_region(
+    comments: Iterable[str],
+) -> Optional[tuple[Tile, tuple[int, int]]]:
+    """Returns the region, and full image (width, height), from comments"""
+    for comment in comments:
+        if comment.startswith(COMMENT_PREFIX):
+            x0, y0, x1, y1, _, width, height = comment[len(COMMENT_PREFIX) :].split()
+            region = (int(x0), int(y0), int(x1), int(y1))
+            return region, (int(width), int(height))
+    return None
+
+
+def merge(parts: Iterable[tuple[Canvas, list[str]]]) -> Canvas:
+    """
+    Paste region images into one canvas. An image without a region
+    comment must be the whole frame. Pixels not covered by any region are
+    left black, and later parts overwrite earlier ones.
+
+    Raises ValueError if parts don't fit together, including when none of
+    several parts say where they go.
+    """
+    located = [(canvas, find_region(comments)) for canvas, comments in parts]
+    frames = {found[1] for _, found in located if found is not None}
+    if not frames and len(located) > 1:
+        raise ValueError("None of the images have a region comment")
+
+    merged: Optional[Canvas] = None
+    for canvas, found in located:
+        if found is None:
+            size = (canvas.width, canvas.height)
+            if frames and size not in frames:
+                raise ValueError(
+                    f"A {canvas.width}x{canvas.height} image has no region "
+                    "comment, and is not the whole frame"
+                )
+            found = (0, 0, *size), size
+        (x0, y0, x1, y1), (width, height) = found
+
+        if (x1 - x0, y1 - y0) != (canvas.width, canvas.height):
+            raise ValueError(
+                f"Region {(x0, y0, x1, y1)} does not match image size "
+                f"{canvas.width}x{canvas.height}"
+            )
+        if merged is None:
+            merged = Canvas(width, height)
+        elif (merged.width, merged.height) != (width, height):
+            raise ValueError(
+                f"Can't merge a region of a {width}x{height} image into a "
+                f"{merged.width}x{merged.height} image"
+            )
+
+        merged.write_pixels(x0, y0, canvas.pixels)
+
+    if merged is None:
+        raise ValueError("Nothing to merge")
+    return merged
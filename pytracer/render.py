@@ -1,60 +1,530 @@
 import os
 import sys
-from concurrent.futures import ProcessPoolExecutor
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from functools import partial
-from typing import Callable
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+)
 
-from pytracer import Camera, Canvas
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .options import BACKENDS, PRECISIONS, TILE_SIZE
+from .world import MAX_REFLECTIONS, World
+
+if TYPE_CHECKING:
+    from .checkpoint import Checkpoint
+    from .tilecache import TileCache
 
 # Set this env var to override default process count
 NUM_PROCESS_ENV_VAR = "PYTRACER_NUM_PROCESSES"
 
+# Set this env var to override the default render backend
+BACKEND_ENV_VAR = "PYTRACER_BACKEND"
+
+# Set this env var to override the default precision
+PRECISION_ENV_VAR = "PYTRACER_PRECISION"
+
+
+# (x0, y0, x1, y1), with x1 and y1 exclusive
+Tile = tuple[int, int, int, int]
+
 _camera = None
 _world = None
 
 
-def render(camera: Camera, world, num_processes=None, show_progress=True) -> Canvas:
-    if num_processes is None:
-        if NUM_PROCESS_ENV_VAR in os.environ:
-            num_processes = int(os.environ[NUM_PROCESS_ENV_VAR])
-        else:
-            num_processes = os.cpu_count()
-    canvas = Canvas(camera.hsize, camera.vsize)
-    CHUNKSIZE = 500
+@dataclass
+class RenderReport:
+    """What a render did. Filled in by render() when passed as ``report``"""
 
-    tracking_function = get_tracking_function(show_progress)
+    elapsed: float = 0.0
+    width: int = 0
+    height: int = 0
+    supersampling: int = 1
+    max_depth: int = MAX_REFLECTIONS
+    # Primary rays (pixels x samples) traced per second by the budget probe
+    rays_per_second: Optional[float] = None
+    # Human readable list of quality reductions made to meet a budget
+    sacrificed: list[str] = field(default_factory=list)
+    # Tiles read from, and traced despite, the tile cache
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+def render(
+    camera: Camera,
+    world: World,
+    num_processes: Optional[int] = None,
+    show_progress: bool = True,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    budget: Optional[float] = None,
+    report: Optional[RenderReport] = None,
+    checkpoint: Optional["Checkpoint"] = None,
+    region: Optional[Tile] = None,
+    cache: Optional["TileCache"] = None,
+    canvas: Optional[Canvas] = None,
+    precision: Optional[str] = None,
+) -> Canvas:
+    """
+    Render the world through the camera.
+
+    ``backend`` is one of ``BACKENDS``. If not given, it is read from the
+    PYTRACER_BACKEND env var, and otherwise picked by ``resolve_backend``.
 
-    if num_processes == 1:
-        init_worker(camera, world)
-        for x, y, color in tracking_function(
-            map(worker, generate_pixel_coords(canvas.height, canvas.width)),
-            total=camera.hsize + camera.vsize,
+    Each pixel is the average of a ``supersampling`` x ``supersampling``
+    grid of rays, each followed for at most ``max_depth`` bounces.
+
+    Given a ``budget`` in seconds, supersampling, depth and resolution are
+    lowered as needed to finish in time. See ``budget.render_within_budget``.
+
+    Completed tiles are recorded in ``checkpoint``, if given, and tiles it
+    already holds from an interrupted render are not traced again.
+
+    Only the pixels inside ``region``, an (x0, y0, x1, y1) rectangle of
+    the full image, are traced if given. The returned canvas is the size
+    of the region.
+
+    Tiles found in ``cache`` are read back instead of traced, and traced
+    tiles are added to it.
+
+    Pixels are written to ``canvas`` if given, such as a ``MappedCanvas``
+    for images too big for memory. It must be the size of the region.
+
+    Pixels are stored as ``precision``, one of ``PRECISIONS``. If not
+    given, it is read from the PYTRACER_PRECISION env var, and otherwise
+    float64.
+    """
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    precision = resolve_precision(precision)
+    if report is None:
+        report = RenderReport()
+    if region is None:
+        region = (0, 0, camera.hsize, camera.vsize)
+    check_region(region, camera.hsize, camera.vsize)
+
+    if budget is not None:
+        if region != (0, 0, camera.hsize, camera.vsize):
+            raise ValueError("A budget can't be combined with a region")
+        if cache is not None:
+            raise ValueError("A budget can't be combined with a tile cache")
+        if canvas is not None:
+            raise ValueError("A budget can't be combined with a canvas")
+        from .budget import render_within_budget
+
+        return render_within_budget(
+            camera,
+            world,
+            budget,
+            num_processes=num_processes,
+            backend=backend,
+            tile_size=tile_size,
+            supersampling=supersampling,
+            max_depth=max_depth,
+            report=report,
+            precision=precision,
+        )
+
+    start = time.perf_counter()
+    x0, y0, x1, y1 = region
+    if canvas is None:
+        canvas = Canvas(x1 - x0, y1 - y0, dtype=precision)
+    elif (canvas.width, canvas.height) != (x1 - x0, y1 - y0):
+        raise ValueError(
+            f"A {canvas.width}x{canvas.height} canvas can't hold a "
+            f"{x1 - x0}x{y1 - y0} render"
+        )
+    tiles = list(generate_tiles(camera.hsize, camera.vsize, tile_size, region))
+    renderer = RENDERERS[backend]
+
+    if checkpoint is not None:
+        completed = checkpoint.start(
+            {
+                "width": camera.hsize,
+                "height": camera.vsize,
+                "region": list(region),
+                "tile_size": tile_size,
+                "supersampling": supersampling,
+                "max_depth": max_depth,
+                "precision": precision,
+            }
+        )
+        for tile, pixels in completed.items():
+            write_tile(canvas, tile, pixels, origin=(x0, y0))
+        tiles = [tile for tile in tiles if tile not in completed]
+
+    if cache is not None:
+        from .tilecache import scene_fingerprint
+
+        fingerprint = scene_fingerprint(
+            camera,
+            world,
+            supersampling=supersampling,
+            max_depth=max_depth,
+            precision=precision,
+        )
+        missing = []
+        for tile in tiles:
+            cached = cache.get(fingerprint, tile)
+            if cached is None:
+                missing.append(tile)
+                continue
+            write_tile(canvas, tile, cached, origin=(x0, y0))
+            if checkpoint is not None:
+                checkpoint.write(tile, cached)
+        report.cache_hits = len(tiles) - len(missing)
+        report.cache_misses = len(missing)
+        tiles = missing
+
+    tracking_function = get_tracking_function(show_progress)
+    try:
+        for tile, pixels in tracking_function(
+            renderer(
+                camera,
+                world,
+                canvas,
+                tiles,
+                num_processes,
+                origin=(x0, y0),
+                supersampling=supersampling,
+                max_depth=max_depth,
+                precision=precision,
+            ),
+            total=len(tiles),
             transient=True,
         ):
-            canvas.write_pixel(x, y, color)
+            if checkpoint is not None:
+                checkpoint.write(tile, pixels)
+            if cache is not None:
+                cache.put(fingerprint, tile, pixels)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    report.elapsed = time.perf_counter() - start
+    report.width, report.height = canvas.width, canvas.height
+    report.supersampling, report.max_depth = supersampling, max_depth
+    return canvas
+
+
+async def render_async(
+    camera: Camera,
+    world: World,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+) -> AsyncIterator[tuple[int, int, np.ndarray]]:
+    """
+    Render tiles in an executor, yielding ``(x0, y0, pixels)`` for each
+    tile as it completes. Tiles nearest the center of the image are
+    scheduled first.
+
+    Closing the generator (or cancelling the task iterating it) cancels
+    any tiles that have not started yet. Use ``contextlib.aclosing`` when
+    breaking out of the loop early, so that happens right away.
+    """
+    # Slow to import, and only async callers need it
+    import asyncio
+
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    executor, task = make_executor(backend, camera, world, num_processes)
+
+    tiles = center_out(
+        generate_tiles(camera.hsize, camera.vsize, tile_size),
+        camera.hsize,
+        camera.vsize,
+    )
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(executor, task, tile) for tile in tiles]
+    try:
+        for next_completed in asyncio.as_completed(futures):
+            (x0, y0, _, _), pixels = await next_completed
+            yield x0, y0, pixels
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def make_executor(
+    backend: str,
+    camera: Camera,
+    world: World,
+    num_processes: Optional[int],
+    task: Optional[Callable] = None,
+) -> tuple[Executor, Callable]:
+    """
+    Build an executor for the backend, along with ``task`` bound to the
+    scene by ``bind_task``. ``task`` defaults to rendering a tile.
+
+    The serial backend gets a single worker thread.
+    """
+    if backend == "process":
+        executor: Executor = ProcessPoolExecutor(
+            max_workers=num_processes,
+            initializer=init_worker,
+            initargs=(camera, world),
+        )
     else:
+        max_workers = 1 if backend == "serial" else num_processes
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    return executor, bind_task(backend, camera, world, task or _tile_task)
 
-        with ProcessPoolExecutor(
-            max_workers=num_processes, initializer=init_worker, initargs=(camera, world)
-        ) as executor:
-            for x, y, color in tracking_function(
-                executor.map(
-                    worker,
-                    generate_pixel_coords(canvas.height, canvas.width),
-                    chunksize=CHUNKSIZE,
-                ),
-                total=camera.hsize * camera.vsize,
-                transient=True,
-            ):
-                canvas.write_pixel(x, y, color)
 
-    return canvas
+def bind_task(backend: str, camera: Camera, world: World, task: Callable) -> Callable:
+    """
+    ``task`` takes the camera and world as its first two arguments. Returns
+    a callable taking the remaining arguments, to submit to an executor
+    made by ``make_executor``. Process workers supply their own copy of
+    the scene, so it is not pickled with every call.
+    """
+    if backend == "process":
+        return partial(_with_worker_scene, task)
+    return partial(task, camera, world)
+
 
+def center_out(tiles: Iterable[Tile], width: int, height: int) -> list[Tile]:
+    """Sort tiles by the distance of their center from the image center"""
 
-def worker(args):
-    x, y = args
-    color = _world.color_at(_camera.ray_for_pixel(x, y))
-    return (x, y, color)
+    def distance(tile: Tile) -> float:
+        x0, y0, x1, y1 = tile
+        return (x0 + x1 - width) ** 2 + (y0 + y1 - height) ** 2
+
+    return sorted(tiles, key=distance)
+
+
+def resolve_num_processes(num_processes: Optional[int]) -> Optional[int]:
+    if num_processes is None:
+        if NUM_PROCESS_ENV_VAR in os.environ:
+            return int(os.environ[NUM_PROCESS_ENV_VAR])
+        return os.cpu_count()
+    return num_processes
+
+
+def gil_enabled() -> bool:
+    """False only on free-threaded builds running with the GIL disabled"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    if is_gil_enabled is None:
+        return True
+    return is_gil_enabled()
+
+
+def resolve_backend(backend: Optional[str], num_processes: Optional[int]) -> str:
+    if backend is None:
+        backend = os.environ.get(BACKEND_ENV_VAR)
+    if backend is None:
+        if num_processes == 1:
+            return "serial"
+        # Threads share the scene without pickling, but only pay off
+        # when they can actually run in parallel.
+        return "process" if gil_enabled() else "thread"
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown render backend: {backend}. Expected one of {BACKENDS}"
+        )
+    return backend
+
+
+def resolve_precision(precision: Optional[str]) -> str:
+    if precision is None:
+        precision = os.environ.get(PRECISION_ENV_VAR, "float64")
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unknown precision: {precision}. Expected one of {PRECISIONS}"
+        )
+    return precision
+
+
+def generate_tiles(
+    width: int,
+    height: int,
+    tile_size: int = TILE_SIZE,
+    region: Optional[Tile] = None,
+):
+    """
+    Yield tiles covering a width x height image, or just the region of it
+    if given, in row-major order.
+    """
+    x_start, y_start, x_end, y_end = region or (0, 0, width, height)
+    for y0 in range(y_start, y_end, tile_size):
+        for x0 in range(x_start, x_end, tile_size):
+            yield (x0, y0, min(x0 + tile_size, x_end), min(y0 + tile_size, y_end))
+
+
+def check_region(region: Tile, width: int, height: int) -> None:
+    x0, y0, x1, y1 = region
+    if not (0 <= x0 < x1 <= width and 0 <= y0 < y1 <= height):
+        raise ValueError(f"Region {region} is not inside the {width}x{height} image")
+
+
+def render_tile(
+    camera: Camera,
+    world: World,
+    tile: Tile,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    precision: str = "float64",
+) -> np.ndarray:
+    """Render a tile to a (height, width, 3) array of RGB values"""
+    x0, y0, x1, y1 = tile
+    pixels = np.empty((y1 - y0, x1 - x0, 3), dtype=precision)
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            pixels[y - y0, x - x0] = trace_pixel(
+                camera, world, x, y, supersampling, max_depth
+            )
+    return pixels
+
+
+def render_pixels(
+    camera: Camera,
+    world: World,
+    coords: list[tuple[int, int]],
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    precision: str = "float64",
+) -> np.ndarray:
+    """Render a list of (x, y) pixel coords to an (n, 3) array of RGB values"""
+    pixels = np.empty((len(coords), 3), dtype=precision)
+    for i, (x, y) in enumerate(coords):
+        pixels[i] = trace_pixel(camera, world, x, y, supersampling, max_depth)
+    return pixels
+
+
+def sample_offsets(supersampling: int) -> list[float]:
+    """
+    Evenly spaced subpixel offsets along one axis. ray_for_pixel aims at
+    the center of the pixel, so offsets are relative to the center.
+    """
+    return [(i + 0.5) / supersampling - 0.5 for i in range(supersampling)]
+
+
+def trace_pixel(
+    camera: Camera,
+    world: World,
+    x: int,
+    y: int,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+) -> tuple[float, float, float]:
+    """
+    Average the colors of a supersampling x supersampling grid of rays,
+    evenly spaced across the pixel.
+    """
+    if supersampling == 1:
+        color = world.color_at(camera.ray_for_pixel(x, y), remaining=max_depth)
+        return color.red, color.green, color.blue
+
+    offsets = sample_offsets(supersampling)
+    red = green = blue = 0.0
+    for offset_y in offsets:
+        for offset_x in offsets:
+            ray = camera.ray_for_pixel(x + offset_x, y + offset_y)
+            color = world.color_at(ray, remaining=max_depth)
+            red += color.red
+            green += color.green
+            blue += color.blue
+    samples = supersampling**2
+    return red / samples, green / samples, blue / samples
+
+
+def write_tile(
+    canvas: Canvas,
+    tile: Tile,
+    pixels: np.ndarray,
+    origin: tuple[int, int] = (0, 0),
+) -> None:
+    """
+    Write tile pixels to the canvas. ``origin`` is the position of the
+    canvas in the full image, when rendering a region.
+    """
+    x0, y0, _, _ = tile
+    origin_x, origin_y = origin
+    canvas.write_pixels(x0 - origin_x, y0 - origin_y, pixels)
+
+
+def _render_serial(
+    camera: Camera,
+    world: World,
+    canvas: Canvas,
+    tiles: Iterable[Tile],
+    num_processes: Optional[int],
+    origin: tuple[int, int] = (0, 0),
+    **settings,
+) -> Iterator[tuple[Tile, np.ndarray]]:
+    for tile in tiles:
+        pixels = render_tile(camera, world, tile, **settings)
+        write_tile(canvas, tile, pixels, origin)
+        yield tile, pixels
+
+
+def _render_threads(
+    camera: Camera,
+    world: World,
+    canvas: Canvas,
+    tiles: Iterable[Tile],
+    num_processes: Optional[int],
+    origin: tuple[int, int] = (0, 0),
+    **settings,
+) -> Iterator[tuple[Tile, np.ndarray]]:
+    # Tiles never overlap, so threads write straight into the shared canvas.
+    def render_and_write(tile: Tile) -> tuple[Tile, np.ndarray]:
+        pixels = render_tile(camera, world, tile, **settings)
+        write_tile(canvas, tile, pixels, origin)
+        return tile, pixels
+
+    with ThreadPoolExecutor(max_workers=num_processes) as executor:
+        yield from executor.map(render_and_write, tiles)
+
+
+def _render_processes(
+    camera: Camera,
+    world: World,
+    canvas: Canvas,
+    tiles: Iterable[Tile],
+    num_processes: Optional[int],
+    origin: tuple[int, int] = (0, 0),
+    **settings,
+) -> Iterator[tuple[Tile, np.ndarray]]:
+    with ProcessPoolExecutor(
+        max_workers=num_processes, initializer=init_worker, initargs=(camera, world)
+    ) as executor:
+        for tile, pixels in executor.map(partial(worker, **settings), tiles):
+            write_tile(canvas, tile, pixels, origin)
+            yield tile, pixels
+
+
+RENDERERS = {
+    "serial": _render_serial,
+    "thread": _render_threads,
+    "process": _render_processes,
+}
+
+
+def worker(tile: Tile, **settings) -> tuple[Tile, np.ndarray]:
+    return _with_worker_scene(_tile_task, tile, **settings)
+
+
+def _with_worker_scene(task: Callable, *args, **kwargs):
+    return task(_camera, _world, *args, **kwargs)
+
+
+def _tile_task(
+    camera: Camera, world: World, tile: Tile, **settings
+) -> tuple[Tile, np.ndarray]:
+    return tile, render_tile(camera, world, tile, **settings)
 
 
 def init_worker(camera, world):
@@ -64,12 +534,6 @@ def init_worker(camera, world):
     _world = world
 
 
-def generate_pixel_coords(vsize, hsize):
-    for y in range(vsize):
-        for x in range(hsize):
-            yield (x, y)
-
-
 def _null_tracker(iter, **kwargs):
     yield from iter
 
@@ -0,0 +1,236 @@
+"""
+Compiled scene files, for fast startup.
+
+Loading a scene from YAML parses the file, evaluates expressions and
+multiplies out every shape's transforms. The first load of a scene file
+also writes a compiled copy next to it, ``scene.yaml.cache``, holding the
+result as arrays: tables of materials and transform matrices, and the
+kind, material and transform of every shape. Later loads of the same file contents
+read the arrays back and only create the objects. Array files the scene
+refers to are checked for changes too.
+
+Scenes the cache can't represent, like materials with patterns, are
+always loaded from YAML.
+"""
+
+import hashlib
+import os
+import zipfile
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .bvh import BVH_MIN_SHAPES
+from .camera import Camera
+from .color import Color
+from .light import PointLight
+from .materials import Material
+from .matrix import Matrix
+from .primitives import Point
+from .shapes import Plane, Shape, Sphere
+from .world import World
+
+CACHE_SUFFIX = ".cache"
+
+# Bump when the layout of the arrays changes
+FORMAT_VERSION = 2
+
+SHAPE_KINDS: tuple[type[Shape], ...] = (Sphere, Plane)
+
+MATERIAL_FIELDS = (
+    "ambient",
+    "diffuse",
+    "specular",
+    "shininess",
+    "reflective",
+    "transparency",
+    "refractive_index",
+)
+
+
+def cache_path(filename: str) -> str:
+    return f"{filename}{CACHE_SUFFIX}"
+
+
+def load_scene_file(filename: str, use_cache: bool = True) -> tuple[Camera, World]:
+    """
+    Load a YAML scene file, from its compiled copy if that was made from
+    the same contents and array files. Otherwise parse it, and compile it
+    for next time.
+    """
+    with open(filename, "rb") as f:
+        contents = f.read()
+    directory = os.path.dirname(os.path.abspath(filename))
+    if not use_cache:
+        camera, world, _ = parse_scene(contents, directory)
+        return camera, world
+
+    key = f"{FORMAT_VERSION}:{hashlib.sha256(contents).hexdigest()}"
+    path = cache_path(filename)
+    scene = read_compiled(path, key)
+    if scene is not None:
+        return scene
+    camera, world, dependencies = parse_scene(contents, directory)
+    try:
+        write_compiled(path, key, camera, world, dependencies)
+    except OSError:
+        # A read only directory only costs the speedup
+        pass
+    return camera, world
+
+
+def parse_scene(contents: bytes, directory: str) -> tuple[Camera, World, list[str]]:
+    """The scene in YAML ``contents``, and the array files it refers to"""
+    # Imported here, so loading a compiled scene doesn't pay for them
+    import yaml as pyyaml
+
+    from .serialization import YAML_LOADER, array_files, load
+
+    world_dict = pyyaml.load(contents, YAML_LOADER)
+    dependencies = array_files(world_dict, directory)
+    camera, world = load(world_dict, directory)
+    return camera, world, dependencies
+
+
+def compile_scene(camera: Camera, world: World) -> Optional[dict[str, np.ndarray]]:
+    """The scene as arrays, or None if it can't be represented"""
+    # Shared materials and transforms stay shared
+    materials: list[Material] = []
+    material_index: dict[int, int] = {}
+    transforms: list[Matrix] = []
+    transform_index: dict[int, int] = {}
+    kinds, shape_materials, shape_transforms = [], [], []
+    for shape in world.shapes:
+        if type(shape) not in SHAPE_KINDS or shape.material.pattern is not None:
+            return None
+        kinds.append(SHAPE_KINDS.index(type(shape)))
+        if id(shape.material) not in material_index:
+            material_index[id(shape.material)] = len(materials)
+            materials.append(shape.material)
+        shape_materials.append(material_index[id(shape.material)])
+        if id(shape.transform) not in transform_index:
+            transform_index[id(shape.transform)] = len(transforms)
+            transforms.append(shape.transform)
+        shape_transforms.append(transform_index[id(shape.transform)])
+
+    return {
+        "camera_size": np.array([camera.hsize, camera.vsize]),
+        "camera_field_of_view": np.array(camera.field_of_view, dtype=float),
+        "camera_transform": camera.transform.cells,
+        "material_color": np.array(
+            [_rgb(material.color) for material in materials], dtype=float
+        ).reshape((len(materials), 3)),
+        "material_values": np.array(
+            [
+                [getattr(material, name) for name in MATERIAL_FIELDS]
+                for material in materials
+            ],
+            dtype=float,
+        ).reshape((len(materials), len(MATERIAL_FIELDS))),
+        "shape_kind": np.array(kinds, dtype=np.int8),
+        "shape_material": np.array(shape_materials, dtype=np.int32),
+        "shape_transform": np.array(shape_transforms, dtype=np.int32),
+        "transforms": np.array(
+            [transform.cells for transform in transforms], dtype=float
+        ).reshape((len(transforms), 4, 4)),
+        "light_position": np.array(
+            [
+                (light.position.x, light.position.y, light.position.z)
+                for light in world.lights
+            ],
+            dtype=float,
+        ).reshape((len(world.lights), 3)),
+        "light_intensity": np.array(
+            [_rgb(light.intensity) for light in world.lights], dtype=float
+        ).reshape((len(world.lights), 3)),
+    }
+
+
+def decompile_scene(arrays: dict[str, np.ndarray]) -> tuple[Camera, World]:
+    materials = [
+        Material(
+            color=Color(*color),
+            **dict(zip(MATERIAL_FIELDS, values)),
+        )
+        for color, values in zip(
+            arrays["material_color"].tolist(), arrays["material_values"].tolist()
+        )
+    ]
+    transforms = [Matrix.from_np_array(cells) for cells in arrays["transforms"]]
+    shapes = []
+    for kind, material, transform in zip(
+        arrays["shape_kind"].tolist(),
+        arrays["shape_material"].tolist(),
+        arrays["shape_transform"].tolist(),
+    ):
+        shape = SHAPE_KINDS[kind](material=materials[material])
+        shape.transform = transforms[transform]
+        shapes.append(shape)
+    lights = [
+        PointLight(Point(*position), Color(*intensity))
+        for position, intensity in zip(
+            arrays["light_position"].tolist(), arrays["light_intensity"].tolist()
+        )
+    ]
+    hsize, vsize = arrays["camera_size"].tolist()
+    camera = Camera(hsize, vsize, float(arrays["camera_field_of_view"]))
+    camera.transform = Matrix.from_np_array(arrays["camera_transform"])
+    world = World(shapes=shapes, lights=lights)
+    if len(shapes) >= BVH_MIN_SHAPES:
+        world.build_bvh()
+    return camera, world
+
+
+def write_compiled(
+    path: str,
+    key: str,
+    camera: Camera,
+    world: World,
+    dependencies: Sequence[str] = (),
+) -> bool:
+    """
+    Write the compiled scene, noting the array files it was loaded from.
+    False if it can't be compiled.
+    """
+    arrays = compile_scene(camera, world)
+    if arrays is None:
+        return False
+    arrays["dependencies"] = np.array(dependencies, dtype=str)
+    arrays["dependency_stats"] = np.array(
+        [_stat(dependency) for dependency in dependencies], dtype=np.int64
+    ).reshape((len(dependencies), 2))
+    # Write through a file object, so numpy doesn't append ".npz"
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, key=np.array(key), **arrays)
+    os.replace(tmp, path)
+    return True
+
+
+def read_compiled(path: str, key: str) -> Optional[tuple[Camera, World]]:
+    """
+    The compiled scene at path, if it was compiled from ``key`` and its
+    array files haven't changed since.
+    """
+    try:
+        with np.load(path) as data:
+            if str(data["key"]) != key:
+                return None
+            arrays = {name: data[name] for name in data.files}
+        for dependency, stat in zip(
+            arrays["dependencies"].tolist(), arrays["dependency_stats"].tolist()
+        ):
+            if list(_stat(dependency)) != stat:
+                return None
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+    return decompile_scene(arrays)
+
+
+def _stat(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _rgb(color: Color) -> tuple[float, float, float]:
+    return color.red, color.green, color.blue
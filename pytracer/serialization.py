@@ -1,10 +1,15 @@
+import itertools
 import operator
-from functools import reduce
+import os
+from copy import deepcopy
+from functools import lru_cache, reduce
 from math import pi
-from typing import Any, Union
+from typing import Any, Optional, Union
 
+import numpy as np
 import yaml as pyyaml
 
+from .bvh import BVH_MIN_SHAPES
 from .camera import Camera
 from .color import Color
 from .light import PointLight
@@ -12,19 +17,64 @@ from .materials import Material
 from .matrix import Matrix
 from .primitives import Point, Vector3
 from .shapes import Plane, Shape, Sphere
+from .sweep import Variant
 from .world import World
 
+# libyaml's loader, when pyyaml was built with it, parses much faster
+YAML_LOADER = getattr(pyyaml, "CSafeLoader", pyyaml.SafeLoader)
 
-def load_yaml(yaml: str) -> tuple[Camera, World]:
-    return load(pyyaml.load(yaml, pyyaml.Loader))
 
+def parse_yaml(yaml: str) -> dict[str, Any]:
+    world_dict = pyyaml.load(yaml, YAML_LOADER)
+    if not isinstance(world_dict, dict):
+        raise ValueError("A scene must be a YAML mapping")
+    return world_dict
 
-def load(world_dict: dict[str, Any]) -> tuple[Camera, World]:
+
+def load_yaml(yaml: str, directory: Optional[str] = None) -> tuple[Camera, World]:
+    """
+    Load a scene. ``directory`` is where array files referenced by the
+    scene are found, which isn't allowed if not given.
+    """
+    return load(parse_yaml(yaml), directory)
+
+
+def load_sweep_yaml(
+    yaml: str, directory: Optional[str] = None
+) -> tuple[Camera, World, list[Variant]]:
+    """Load a scene along with the variants declared in its sweep section"""
+    world_dict = parse_yaml(yaml)
+    # load() fills in material colors in place, so copy the specs first
+    material_specs = resolve_material_specs(deepcopy(world_dict.get("materials", {})))
     colors = load_colors(world_dict.get("colors", {}))
     materials = load_materials(world_dict.get("materials", {}), colors)
-    shapes = load_shapes(world_dict.get("shapes", []), materials, colors)
+    camera, world = load(world_dict, directory, materials)
+    variants = load_variants(
+        world_dict.get("sweep", {}), material_specs, materials, world.shapes, colors
+    )
+    return camera, world, variants
+
+
+def load(
+    world_dict: dict[str, Any],
+    directory: Optional[str] = None,
+    materials: Optional[dict[str, Material]] = None,
+) -> tuple[Camera, World]:
+    """
+    Load a parsed scene. Named ``materials`` already loaded from it can be
+    passed in, so its shapes use those objects.
+    """
+    colors = load_colors(world_dict.get("colors", {}))
+    if materials is None:
+        materials = load_materials(world_dict.get("materials", {}), colors)
+    transforms = TransformLoader(world_dict.get("transforms", {}))
+    shapes = load_shapes(
+        world_dict.get("shapes", []), materials, colors, directory, transforms
+    )
     lights = load_lights(world_dict.get("lights", []), colors)
     world = World(shapes=shapes, lights=lights)
+    if len(shapes) >= BVH_MIN_SHAPES:
+        world.build_bvh()
     camera = load_camera(world_dict["camera"], world)
     return camera, world
 
@@ -69,20 +119,125 @@ def load_material(spec, colors: dict[str, Color]) -> Material:
 
 def load_materials(materialsdict, colors: dict[str, Color]) -> dict[str, Material]:
     materials: dict[str, Material] = {}
-    for name, spec in materialsdict.items():
+    for name, spec in resolve_material_specs(materialsdict).items():
         materials[name] = load_material(spec, colors)
     return materials
 
 
+def resolve_material_specs(materialsdict: dict[str, dict]) -> dict[str, dict]:
+    """
+    Fill in materials that extend another, by name:
+
+        materials:
+          white:
+            color: white
+            diffuse: 0.7
+          shinyWhite:
+            extend: white
+            reflective: 0.3
+
+    Extended materials are copies of their base with their own settings
+    applied on top. Other specs are returned as they are.
+    """
+    resolved: dict[str, dict] = {}
+
+    def resolve(name: str, extending: tuple[str, ...]) -> dict:
+        if name in resolved:
+            return resolved[name]
+        if name not in materialsdict:
+            raise ValueError(f"Undefined material name: {name}")
+        if name in extending:
+            raise ValueError(f"Materials extend each other: {extending}")
+        spec = materialsdict[name]
+        if isinstance(spec, dict) and "extend" in spec:
+            base = resolve(spec["extend"], extending + (name,))
+            own = {key: value for key, value in spec.items() if key != "extend"}
+            spec = {**base, **own}
+        resolved[name] = spec
+        return spec
+
+    for name in materialsdict:
+        resolve(name, ())
+    return resolved
+
+
 def p(val):
     """
     Support use of "pi" in values, e.g. "rotation_x: pi / 2"
     """
     if isinstance(val, str):
-        return eval(val, {"pi": pi, "__builtins__": {}})
+        return _evaluate(val)
     return val
 
 
+@lru_cache(maxsize=1024)
+def _evaluate(expression: str):
+    # Scenes repeat the same few expressions, like "pi / 2"
+    return eval(expression, {"pi": pi, "__builtins__": {}})
+
+
+class TransformLoader:
+    """
+    Builds the transforms of shapes, which can use chains named in the
+    scene's ``transforms`` section:
+
+        transforms:
+          onFloor:
+            - translation: [0, 1, 0]
+          small:
+            - scaling: [0.5, 0.5, 0.5]
+            - onFloor           # chains can include other chains
+
+        shapes:
+          - sphere:
+              transforms: small         # a chain by name
+          - sphere:
+              transforms:
+                - small
+                - rotation_y: pi / 4
+
+    Each distinct chain is only multiplied out once, and every shape using
+    it shares the one Matrix, and so its cached inverse.
+    """
+
+    def __init__(self, defined: Optional[dict[str, list]] = None):
+        self.defined = defined or {}
+        self._matrices: dict[Any, Matrix] = {}
+
+    def load(self, transforms: Union[str, list]) -> Matrix:
+        steps = self.expand(transforms)
+        key = _hashable(steps)
+        if key not in self._matrices:
+            self._matrices[key] = load_transforms(steps)
+        return self._matrices[key]
+
+    def expand(
+        self, transforms: Union[str, list], expanding: tuple[str, ...] = ()
+    ) -> list[dict]:
+        """The chain with names replaced by the transforms they stand for"""
+        if isinstance(transforms, str):
+            transforms = [transforms]
+        steps = []
+        for step in transforms:
+            if not isinstance(step, str):
+                steps.append(step)
+                continue
+            if step not in self.defined:
+                raise ValueError(f"Undefined transforms name: {step}")
+            if step in expanding:
+                raise ValueError(f"Transforms include each other: {expanding}")
+            steps += self.expand(self.defined[step], expanding + (step,))
+        return steps
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
 def load_transforms(transforms: list[dict]) -> Matrix:
     # File format list transforms in semantic order, but
     # our transforms must be applied in reverse
@@ -110,30 +265,49 @@ def load_transforms(transforms: list[dict]) -> Matrix:
 
 
 def load_shape(
-    spec, materials: dict[str, Material], colors: dict[str, Color]
+    spec,
+    materials: dict[str, Material],
+    colors: dict[str, Color],
+    transforms: Optional[TransformLoader] = None,
 ) -> tuple[Material, Matrix]:
     material_spec = spec["material"]
     if isinstance(material_spec, str):
         material = materials[material_spec]
     else:
         material = load_material(material_spec, colors)
-    transform = load_transforms(spec.get("transforms", []))
+    transform = (transforms or TransformLoader()).load(spec.get("transforms", []))
     return material, transform
 
 
+SHAPE_TYPES: dict[str, type[Shape]] = {"sphere": Sphere, "plane": Plane}
+
+
 def load_shapes(
-    shapeslist: list[dict], materials: dict[str, Material], colors: dict[str, Color]
+    shapeslist: list[dict],
+    materials: dict[str, Material],
+    colors: dict[str, Color],
+    directory: Optional[str] = None,
+    transforms: Optional[TransformLoader] = None,
 ) -> list[Shape]:
     shapes: list[Shape] = []
+    transforms = transforms or TransformLoader()
     for spec in shapeslist:
         match spec:
+            case {"array": arraySpec}:
+                shapes += load_shape_array(
+                    arraySpec, materials, colors, directory, transforms
+                )
             case {"sphere": shapeSpec}:
-                material, transform = load_shape(shapeSpec, materials, colors)
+                material, transform = load_shape(
+                    shapeSpec, materials, colors, transforms
+                )
                 sphere = Sphere(material=material)
                 sphere.transform = transform
                 shapes.append(sphere)
             case {"plane": shapeSpec}:
-                material, transform = load_shape(shapeSpec, materials, colors)
+                material, transform = load_shape(
+                    shapeSpec, materials, colors, transforms
+                )
                 plane = Plane(material=material)
                 plane.transform = transform
                 shapes.append(plane)
@@ -142,6 +316,104 @@ def load_shapes(
     return shapes
 
 
+def load_shape_array(
+    spec: dict,
+    materials: dict[str, Material],
+    colors: dict[str, Color],
+    directory: Optional[str] = None,
+    transforms: Optional[TransformLoader] = None,
+) -> list[Shape]:
+    """
+    Many copies of one shape, declared with arrays:
+
+        - array:
+            sphere:                     # the shape, placed at the origin
+              material: glass
+              transforms:
+                - scaling: [1, 2, 1]
+            positions: [[0, 1, 0], [2, 1, 0]]   # or a .npy file of them
+            scales: [0.5, 0.25]         # optional, one, or one per axis
+            materials: [red, blue]      # optional, per copy by index
+            material_indices: [0, 1]
+
+    Each copy is scaled then moved to its position, after the shape's own
+    transforms. Any of the lists can instead name a .npy file, relative to
+    the scene file. Copies share their material objects.
+    """
+    try:
+        ((kind, shape_spec),) = (
+            (key, value) for key, value in spec.items() if key in SHAPE_TYPES
+        )
+    except ValueError as e:
+        raise ValueError(f"A shape array needs exactly one shape: {spec}") from e
+    shape_type = SHAPE_TYPES[kind]
+    transforms = transforms or TransformLoader()
+
+    positions = load_array(spec["positions"], directory, float)
+    count = len(positions)
+    if positions.shape != (count, 3):
+        raise ValueError(f"Expected a list of [x, y, z] positions: {spec}")
+    scales = np.ones((count, 3))
+    if "scales" in spec:
+        scales = load_array(spec["scales"], directory, float)
+        if scales.ndim == 1:
+            scales = np.repeat(scales[:, np.newaxis], 3, axis=1)
+        if scales.shape != (count, 3):
+            raise ValueError(f"Expected {count} scales: {spec}")
+
+    if "materials" in spec:
+        table = [
+            materials[name] if isinstance(name, str) else load_material(name, colors)
+            for name in spec["materials"]
+        ]
+        if "material_indices" not in spec:
+            raise ValueError(f"Array materials need material_indices: {spec}")
+        indices = load_array(spec["material_indices"], directory, int)
+        if indices.shape != (count,):
+            raise ValueError(f"Expected {count} material indices: {spec}")
+        if count and not 0 <= indices.min() <= indices.max() < len(table):
+            raise ValueError(f"Material index out of range: {spec}")
+        copy_materials = [table[i] for i in indices.tolist()]
+    else:
+        material = load_shape(shape_spec, materials, colors, transforms)[0]
+        copy_materials = [material] * count
+
+    prototype = transforms.load(shape_spec.get("transforms", [])).cells
+    # translation(position) * scaling(scale) * prototype, for every copy
+    cells = (
+        prototype[np.newaxis]
+        * np.append(scales, np.ones((count, 1)), axis=1)[:, :, np.newaxis]
+    )
+    cells[:, :3, :] += positions[:, :, np.newaxis] * cells[:, 3:4, :]
+
+    shapes = []
+    for transform, material in zip(cells, copy_materials):
+        shape = shape_type(material=material)
+        shape.transform = Matrix.from_np_array(transform)
+        shapes.append(shape)
+    return shapes
+
+
+def load_array(value, directory: Optional[str], dtype: type) -> np.ndarray:
+    """An inline list, or the name of a .npy file in directory"""
+    if isinstance(value, str):
+        if directory is None:
+            raise ValueError(f"Array files can only be used from scene files: {value}")
+        value = np.load(os.path.join(directory, value), allow_pickle=False)
+    return np.asarray(value, dtype=dtype)
+
+
+def array_files(world_dict: dict[str, Any], directory: str) -> list[str]:
+    """Paths of the array files a scene references"""
+    return [
+        os.path.join(directory, value)
+        for spec in world_dict.get("shapes", [])
+        if isinstance(spec, dict) and isinstance(spec.get("array"), dict)
+        for key in ("positions", "scales", "material_indices")
+        if isinstance(value := spec["array"].get(key), str)
+    ]
+
+
 def load_light(spec: dict, colors: dict[str, Color]) -> PointLight:
     try:
         x, y, z = spec["position"]
@@ -162,6 +434,71 @@ def load_lights(specs: list, colors: dict[str, Color]) -> list[PointLight]:
     return [load_light(spec, colors) for spec in specs]
 
 
+def load_variants(
+    spec: dict,
+    material_specs: dict[str, dict],
+    materials: dict[str, Material],
+    shapes: list[Shape],
+    colors: dict[str, Color],
+) -> list[Variant]:
+    """
+    Build a variant for every combination of the options in a sweep spec:
+
+        sweep:
+          materials:
+            robinEgg:           # a named material
+              - color: red      # overrides for each option
+              - color:
+                  rgb: [255, 0, 0]
+                reflective: 0.5
+          lights:
+            - position: [5, 5, 5]       # a light, or a list of lights
+            - - position: [-5, 5, 5]
+              - position: [5, 5, 5]
+
+    Material options apply to every shape using the named material, found
+    by identity among the loaded ``shapes``, so copies in shape arrays are
+    included. Light options replace all of the scene's lights.
+    """
+    axes: list[list[Variant]] = []
+    for name, overrides in spec.get("materials", {}).items():
+        if name not in material_specs:
+            raise ValueError(f"Undefined material name: {name}")
+        indices = [
+            i for i, shape in enumerate(shapes) if shape.material is materials[name]
+        ]
+        options = []
+        for j, override in enumerate(overrides):
+            material = load_material(
+                {**deepcopy(material_specs[name]), **override}, colors
+            )
+            options.append(Variant(f"{name}{j}", {i: material for i in indices}))
+        axes.append(options)
+
+    if "lights" in spec:
+        axes.append(
+            [
+                Variant(
+                    f"lights{j}",
+                    lights=load_lights(
+                        lights if isinstance(lights, list) else [lights], colors
+                    ),
+                )
+                for j, lights in enumerate(spec["lights"])
+            ]
+        )
+
+    variants = []
+    for combination in itertools.product(*axes):
+        variant = Variant("-".join(option.name for option in combination))
+        for option in combination:
+            variant.materials.update(option.materials)
+            if option.lights is not None:
+                variant.lights = option.lights
+        variants.append(variant)
+    return variants
+
+
 def load_camera(spec: dict, world: World) -> Camera:
     camera = Camera(
         hsize=spec["hsize"],
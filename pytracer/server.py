@@ -0,0 +1,259 @@
+"""
+HTTP render service, started with ``pytracer serve``.
+
+    POST /jobs              Scene YAML as the request body. The query
+                            parameters width, height, supersampling and
+                            max_depth override scene and render settings.
+                            Responds 202 with the job status.
+    GET  /jobs/<id>         Job status as JSON
+    GET  /jobs/<id>/image   The rendered PPM image, once the job is done
+
+Jobs are rendered one at a time on a RenderPool that lives as long as the
+server, and parsed scenes are kept in an LRU cache keyed by a hash of
+their YAML, so repeated requests skip parsing as well as pool startup.
+
+Expressions in scene YAML, like "pi / 2", are passed to ``eval``, so only
+let trusted clients reach the service.
+"""
+
+import dataclasses
+import hashlib
+import json
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from .camera import Camera
+from .image import PPM
+from .pool import RenderPool
+from .serialization import load_yaml
+from .world import World
+
+HTTP_PORT = 8765
+
+# Parsed scenes kept in memory
+SCENE_CACHE_SIZE = 32
+
+# Finished jobs are forgotten, oldest first, beyond this many
+MAX_JOBS = 1000
+
+OVERRIDES = ("width", "height", "supersampling", "max_depth")
+
+
+@dataclasses.dataclass
+class Job:
+    id: str
+    scene_key: str
+    camera: Camera
+    world: World
+    settings: dict[str, int]
+    status: str = "queued"
+    error: Optional[str] = None
+    elapsed: Optional[float] = None
+    image: Optional[bytes] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "elapsed": self.elapsed,
+        }
+
+
+class SceneCache:
+    """LRU cache of parsed scenes, keyed by a hash of their YAML"""
+
+    def __init__(self, size: int = SCENE_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._scenes: OrderedDict[str, tuple[Camera, World]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scene_yaml: str) -> tuple[str, Camera, World]:
+        key = hashlib.sha256(scene_yaml.encode()).hexdigest()
+        with self._lock:
+            if key in self._scenes:
+                self.hits += 1
+                self._scenes.move_to_end(key)
+                camera, world = self._scenes[key]
+                return key, camera, world
+        # Parse outside the lock. Two requests for a new scene may both
+        # parse it, which is harmless.
+        camera, world = load_yaml(scene_yaml)
+        with self._lock:
+            self.misses += 1
+            self._scenes[key] = (camera, world)
+            if len(self._scenes) > self.size:
+                self._scenes.popitem(last=False)
+        return key, camera, world
+
+
+class RenderService:
+    def __init__(self, pool: RenderPool, scene_cache_size: int = SCENE_CACHE_SIZE):
+        self.pool = pool
+        self.scenes = SceneCache(scene_cache_size)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: queue.Queue[Optional[Job]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, scene_yaml: str, overrides: dict[str, int]) -> Job:
+        """Parse the scene and queue a job. Raises ValueError for bad input"""
+        unknown = set(overrides) - set(OVERRIDES)
+        if unknown:
+            raise ValueError(f"Unknown overrides: {', '.join(sorted(unknown))}")
+        try:
+            key, camera, world = self.scenes.get(scene_yaml)
+        except Exception as e:
+            # Malformed scenes fail in many ways deep inside the loader
+            raise ValueError(f"Invalid scene: {e!r}") from e
+
+        # The cached camera is shared, so overrides go on a copy
+        camera = dataclasses.replace(
+            camera,
+            hsize=overrides.get("width", camera.hsize),
+            vsize=overrides.get("height", camera.vsize),
+        )
+        settings: dict[str, int] = {
+            name: overrides[name]
+            for name in ("supersampling", "max_depth")
+            if name in overrides
+        }
+        job = Job(
+            id=uuid.uuid4().hex,
+            scene_key=key,
+            camera=camera,
+            world=world,
+            settings=settings,
+        )
+        with self._lock:
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while (job := self._queue.get()) is not None:
+            job.status = "rendering"
+            start = time.perf_counter()
+            try:
+                canvas = self.pool.render(
+                    job.camera, job.world, key=job.scene_key, **job.settings
+                )
+                image = StringIO()
+                PPM.save(canvas, image)
+                job.image = image.getvalue().encode("ascii")
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            job.elapsed = time.perf_counter() - start
+
+    def _forget_old_jobs(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.status in ("done", "failed")
+        ]
+        for job_id in finished[: max(0, len(self.jobs) - MAX_JOBS)]:
+            del self.jobs[job_id]
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: "RenderServer"
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/jobs":
+            return self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+        try:
+            overrides = {
+                name: int(values[-1]) for name, values in parse_qs(url.query).items()
+            }
+            length = int(self.headers.get("Content-Length", 0))
+            scene_yaml = self.rfile.read(length).decode()
+            job = self.server.service.submit(scene_yaml, overrides)
+        except (ValueError, UnicodeDecodeError) as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        self._send_json(HTTPStatus.ACCEPTED, job.as_dict(), f"/jobs/{job.id}")
+
+    def do_GET(self):
+        match urlparse(self.path).path.strip("/").split("/"):
+            case ["jobs", job_id]:
+                job = self.server.service.get(job_id)
+                if job is None:
+                    return self._send_error(HTTPStatus.NOT_FOUND, "No such job")
+                self._send_json(HTTPStatus.OK, job.as_dict())
+            case ["jobs", job_id, "image"]:
+                job = self.server.service.get(job_id)
+                if job is None:
+                    return self._send_error(HTTPStatus.NOT_FOUND, "No such job")
+                if job.image is None:
+                    return self._send_error(HTTPStatus.CONFLICT, f"Job is {job.status}")
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "image/x-portable-pixmap")
+                self.send_header("Content-Length", str(len(job.image)))
+                self.end_headers()
+                self.wfile.write(job.image)
+            case _:
+                self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def _send_json(self, status: HTTPStatus, body: dict, location=None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if location is not None:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RenderService):
+        super().__init__(address, RequestHandler)
+        self.service = service
+
+
+def serve(
+    host: str,
+    port: int,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> None:
+    with RenderPool(num_processes=num_processes, backend=backend) as pool:
+        service = RenderService(pool)
+        with RenderServer((host, port), service) as server:
+            bound_host, bound_port = server.server_address[:2]
+            print(f"pytracer serving on http://{bound_host!s}:{bound_port}")
+            print("Press Ctrl-C to stop", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                service.close()
@@ -10,6 +10,8 @@ from .primitives import Point, Vector3
 from .ray import Intersection, Ray
 from .utils import EPSILON
 
+Vec = tuple[float, float, float]
+
 
 class Shape(abc.ABC):
     def __init__(self, material: Optional[Material] = None):
@@ -24,8 +26,15 @@ class Shape(abc.ABC):
     def normal_at(self, point: Point) -> Vector3:
         pass
 
+    def local_bounds(self) -> Optional[tuple[Vec, Vec]]:
+        """Object space (minimum, maximum) corners, or None if unbounded"""
+        return None
+
 
 class Sphere(Shape):
+    def local_bounds(self) -> Optional[tuple[Vec, Vec]]:
+        return (-1, -1, -1), (1, 1, 1)
+
     def normal_at(self, point: Point) -> Vector3:
         object_point = self.transform.inverse() * point
         object_normal = object_point - Point(0, 0, 0)
@@ -0,0 +1,99 @@
+"""
+Streaming renders, for images too big to hold in memory at once.
+
+Tiles are rendered a band of tile rows at a time, and each band is handed
+on as soon as all of its tiles are done, so it can be written out while
+later bands are still rendering.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import partial
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .camera import Camera
+from .render import (
+    TILE_SIZE,
+    Tile,
+    check_region,
+    generate_tiles,
+    make_executor,
+    resolve_backend,
+    resolve_num_processes,
+    resolve_precision,
+)
+from .world import MAX_REFLECTIONS, World
+
+# Bands rendering or finished but waiting on an earlier band. Bounds memory
+# to this many bands, while keeping workers busy past a slow tile.
+WINDOW = 4
+
+
+def render_rows(
+    camera: Camera,
+    world: World,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    region: Optional[Tile] = None,
+    window: int = WINDOW,
+    precision: Optional[str] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Render the image, or the (x0, y0, x1, y1) ``region`` of it, yielding it
+    top to bottom as ``(rows, width, 3)`` bands, ``tile_size`` rows high.
+
+    At most ``window`` bands are held at once. Stop iterating to abort the
+    render. Bands are ``precision`` arrays, as in ``render``.
+    """
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    precision = resolve_precision(precision)
+    if region is None:
+        region = (0, 0, camera.hsize, camera.vsize)
+    check_region(region, camera.hsize, camera.vsize)
+    x0, y0, x1, y1 = region
+    band_tops = range(y0, y1, tile_size)
+
+    executor, task = make_executor(backend, camera, world, num_processes)
+    task = partial(
+        task, supersampling=supersampling, max_depth=max_depth, precision=precision
+    )
+    bands: dict[int, np.ndarray] = {}
+    remaining: dict[int, int] = {}
+    pending: dict[Future, int] = {}
+
+    def start(band: int) -> None:
+        top = band_tops[band]
+        bottom = min(top + tile_size, y1)
+        tiles = list(
+            generate_tiles(camera.hsize, camera.vsize, tile_size, (x0, top, x1, bottom))
+        )
+        bands[band] = np.empty((bottom - top, x1 - x0, 3), dtype=precision)
+        remaining[band] = len(tiles)
+        for tile in tiles:
+            pending[executor.submit(task, tile)] = band
+
+    try:
+        started = 0
+        for band in range(len(band_tops)):
+            while started < min(band + window, len(band_tops)):
+                start(started)
+                started += 1
+            while remaining[band]:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    done_band = pending.pop(future)
+                    (tx0, ty0, tx1, ty1), pixels = future.result()
+                    top, band_pixels = band_tops[done_band], bands[done_band]
+                    band_pixels[ty0 - top : ty1 - top, tx0 - x0 : tx1 - x0] = pixels
+                    remaining[done_band] -= 1
+            del remaining[band]
+            yield bands.pop(band)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
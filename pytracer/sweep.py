@@ -0,0 +1,237 @@
+"""
+Render many material and light variants of one scene.
+
+Primary visibility, the hit and surface geometry under every sample, is
+traced once and shared by all of the variants, as are shadow tests for
+lights they have in common. Each variant then only re-runs shading, plus
+any reflected or refracted rays its materials call for, so a sweep over
+the colors of an opaque material costs little more than one render.
+"""
+
+from copy import copy
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Optional
+
+import numpy as np
+
+from .camera import Camera
+from .canvas import Canvas
+from .light import PointLight
+from .materials import Material
+from .primitives import Point
+from .ray import Intersection
+from .render import (
+    TILE_SIZE,
+    Tile,
+    generate_tiles,
+    get_tracking_function,
+    make_executor,
+    resolve_backend,
+    resolve_num_processes,
+    sample_offsets,
+    write_tile,
+)
+from .world import MAX_REFLECTIONS, Comps, World
+
+
+@dataclass
+class Variant:
+    """Materials to swap in, by shape index, and optionally new lights"""
+
+    name: str = ""
+    materials: dict[int, Material] = field(default_factory=dict)
+    lights: Optional[list[PointLight]] = None
+
+    def apply(self, world: World) -> World:
+        shapes = []
+        for i, shape in enumerate(world.shapes):
+            if i in self.materials:
+                shape = copy(shape)
+                shape.material = self.materials[i]
+            shapes.append(shape)
+        lights = world.lights if self.lights is None else self.lights
+        # Shapes keep their order, so the BVH's indices still hold
+        return World(shapes=shapes, lights=lights, bvh=world.bvh)
+
+
+@dataclass
+class PrimaryHit:
+    comps: Comps
+    intersections: list[Intersection]
+    # Index of the hit in intersections
+    index: int
+
+
+def trace_primary(
+    camera: Camera, world: World, tile: Tile, supersampling: int = 1
+) -> list[Optional[PrimaryHit]]:
+    """
+    The hit under every sample of the tile, in row order, with the samples
+    of each pixel together. None where a ray hits nothing.
+    """
+    x0, y0, x1, y1 = tile
+    if supersampling == 1:
+        offsets: list[tuple[float, float]] = [(0, 0)]
+    else:
+        steps = sample_offsets(supersampling)
+        offsets = [(dx, dy) for dy in steps for dx in steps]
+
+    hits: list[Optional[PrimaryHit]] = []
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            for dx, dy in offsets:
+                ray = camera.ray_for_pixel(x + dx, y + dy)
+                intersections = world.intersect(ray)
+                hit = Intersection.hit(intersections)
+                if hit is None:
+                    hits.append(None)
+                    continue
+                comps = world.prepare_computations(hit, ray, intersections)
+                hits.append(PrimaryHit(comps, intersections, intersections.index(hit)))
+    return hits
+
+
+def sweep_tile(
+    camera: Camera,
+    world: World,
+    tile: Tile,
+    variants: list[Variant],
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    worlds: Optional[list[World]] = None,
+) -> tuple[Tile, list[np.ndarray]]:
+    """
+    Render a tile of every variant, as (height, width, 3) arrays.
+    ``worlds`` are the variants applied to the world. Without them, each
+    process applies the variants once and reuses them for later tiles.
+    """
+    if worlds is None:
+        worlds = _applied_worlds(world, variants)
+    x0, y0, x1, y1 = tile
+    hits = trace_primary(camera, world, tile, supersampling)
+    shape_index = {id(shape): i for i, shape in enumerate(world.shapes)}
+    # is_shadowed results for each sample, by light position
+    shadows: dict[Point, list[bool]] = {}
+
+    def shadows_for(light: PointLight) -> list[bool]:
+        if light.position not in shadows:
+            shadows[light.position] = [
+                hit is not None and world.is_shadowed(hit.comps.over_point, light)
+                for hit in hits
+            ]
+        return shadows[light.position]
+
+    results = []
+    samples = supersampling**2
+    for variant, variant_world in zip(variants, worlds):
+        # n1 and n2 only need recomputing if refractive indices changed
+        refraction_changed = any(
+            material.refractive_index != world.shapes[i].material.refractive_index
+            for i, material in variant.materials.items()
+        )
+        light_shadows = [shadows_for(light) for light in variant_world.lights]
+
+        colors = np.empty((len(hits), 3))
+        for k, hit in enumerate(hits):
+            if max_depth == 0 or hit is None:
+                colors[k] = 0, 0, 0
+                continue
+            comps = _variant_comps(
+                hit, variant_world.shapes, shape_index, refraction_changed
+            )
+            color = variant_world.shade_hit(
+                comps,
+                remaining=max_depth,
+                shadows=[flags[k] for flags in light_shadows],
+            )
+            colors[k] = color.red, color.green, color.blue
+
+        if supersampling == 1:
+            pixels = colors
+        else:
+            # Sum samples in the same order as trace_pixel, so the result
+            # matches render() exactly.
+            pixels = np.empty((len(hits) // samples, 3))
+            for i in range(len(pixels)):
+                red = green = blue = 0.0
+                for red_, green_, blue_ in colors[i * samples : (i + 1) * samples]:
+                    red += red_
+                    green += green_
+                    blue += blue_
+                pixels[i] = red / samples, green / samples, blue / samples
+        results.append(pixels.reshape((y1 - y0, x1 - x0, 3)))
+    return tile, results
+
+
+# The variants last applied in this process, with the world and the worlds
+# they made
+_applied: Optional[tuple[World, list[Variant], list[World]]] = None
+
+
+def _applied_worlds(world: World, variants: list[Variant]) -> list[World]:
+    global _applied
+    if _applied is None or _applied[0] is not world or _applied[1] != variants:
+        _applied = world, variants, [variant.apply(world) for variant in variants]
+    return _applied[2]
+
+
+def _variant_comps(
+    hit: PrimaryHit,
+    shapes: list,
+    shape_index: dict[int, int],
+    refraction_changed: bool,
+) -> Comps:
+    shape = shapes[shape_index[id(hit.comps.shape)]]
+    if not refraction_changed:
+        return replace(hit.comps, shape=shape)
+    intersections = [
+        Intersection(i.t, shapes[shape_index[id(i.shape)]]) for i in hit.intersections
+    ]
+    n1, n2 = World._find_n1_and_n2(intersections[hit.index], intersections)
+    return replace(hit.comps, shape=shape, n1=n1, n2=n2)
+
+
+def render_sweep(
+    camera: Camera,
+    world: World,
+    variants: list[Variant],
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    tile_size: int = TILE_SIZE,
+    supersampling: int = 1,
+    max_depth: int = MAX_REFLECTIONS,
+    show_progress: bool = False,
+) -> list[Canvas]:
+    """
+    Render every variant of the world, returning a canvas for each. Each
+    canvas matches rendering ``variant.apply(world)`` with render().
+    """
+    num_processes = resolve_num_processes(num_processes)
+    backend = resolve_backend(backend, num_processes)
+    canvases = [Canvas(camera.hsize, camera.vsize) for _ in variants]
+    tiles = list(generate_tiles(camera.hsize, camera.vsize, tile_size))
+    executor, task = make_executor(
+        backend, camera, world, num_processes, task=sweep_tile
+    )
+    settings = {
+        "variants": variants,
+        # Threads share the worlds applied here. Processes apply their own
+        # once, rather than having them pickled with every tile.
+        "worlds": (
+            None
+            if backend == "process"
+            else [variant.apply(world) for variant in variants]
+        ),
+        "supersampling": supersampling,
+        "max_depth": max_depth,
+    }
+    tracking_function = get_tracking_function(show_progress)
+    with executor:
+        results = executor.map(partial(task, **settings), tiles)
+        for tile, tile_pixels in tracking_function(
+            results, total=len(tiles), transient=True
+        ):
+            for canvas, pixels in zip(canvases, tile_pixels):
+                write_tile(canvas, tile, pixels)
+    return canvases
@@ -0,0 +1,145 @@
+"""
+On-disk cache of rendered tiles.
+
+Each tile is stored under a hash of everything that decides its pixels:
+the camera, every shape, material and light in the world, the render
+settings and the tile's coordinates, so rendering an unchanged scene
+again only reads tiles back. Reflections and shadows let any part of the
+scene reach any pixel, so an edit anywhere in the scene changes the key
+of every tile. The cache is bounded in size, evicting the least recently
+used tiles first.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+from .camera import Camera
+from .matrix import Matrix
+from .options import CACHE_SIZE
+from .render import Tile
+from .world import World
+
+SUFFIX = ".npy"
+
+
+def scene_fingerprint(camera: Camera, world: World, **settings) -> str:
+    """Hash of the camera, the world and render settings"""
+    digest = hashlib.sha256()
+    _feed(digest, camera)
+    _feed(digest, world)
+    _feed(digest, sorted(settings.items()))
+    return digest.hexdigest()
+
+
+def _feed(digest, value: Any) -> None:
+    """Add a canonical encoding of value to the digest"""
+    if isinstance(value, Matrix):
+        digest.update(b"M")
+        digest.update(np.ascontiguousarray(value.cells, dtype=float).tobytes())
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Ints and equal floats render the same. repr round trips floats.
+        digest.update(f"n:{float(value)!r};".encode())
+    elif value is None or isinstance(value, (bool, str)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"[{len(value)}".encode())
+        for item in value:
+            _feed(digest, item)
+        digest.update(b"]")
+    else:
+        if is_dataclass(value):
+            # Fields excluded from comparison, like World.bvh, are derived
+            items = [
+                (f.name, getattr(value, f.name)) for f in fields(value) if f.compare
+            ]
+        else:
+            # Underscored attributes are caches
+            items = [
+                (name, attribute)
+                for name, attribute in sorted(vars(value).items())
+                if not name.startswith("_")
+            ]
+        digest.update(f"{type(value).__name__}{{".encode())
+        for name, attribute in items:
+            digest.update(f"{name}=".encode())
+            _feed(digest, attribute)
+        digest.update(b"}")
+
+
+class TileCache:
+    """
+    A directory of tile pixel arrays, at most ``max_bytes`` in total.
+    Files are written atomically, so renders in several processes can
+    share a directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Size of each cached file, least recently used first
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        entries.sort()
+        self._sizes: OrderedDict[str, int] = OrderedDict(
+            (name, size) for _, name, size in entries
+        )
+        self.size = sum(self._sizes.values())
+
+    def get(self, fingerprint: str, tile: Tile) -> Optional[np.ndarray]:
+        name = self._name(fingerprint, tile)
+        path = os.path.join(self.directory, name)
+        try:
+            pixels = np.load(path)
+            # Bump the modified time, so the order survives reopening
+            os.utime(path)
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        x0, y0, x1, y1 = tile
+        if pixels.shape != (y1 - y0, x1 - x0, 3):
+            self.misses += 1
+            return None
+        if name in self._sizes:
+            self._sizes.move_to_end(name)
+        self.hits += 1
+        return pixels
+
+    def put(self, fingerprint: str, tile: Tile, pixels: np.ndarray) -> None:
+        name = self._name(fingerprint, tile)
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, pixels)
+        os.replace(tmp, path)
+
+        self.size -= self._sizes.pop(name, 0)
+        self._sizes[name] = os.path.getsize(path)
+        self.size += self._sizes[name]
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._sizes:
+            name, size = self._sizes.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Evicted by another process sharing the directory
+                pass
+
+    @staticmethod
+    def _name(fingerprint: str, tile: Tile) -> str:
+        key = hashlib.sha256(f"{fingerprint}:{tile}".encode()).hexdigest()
+        return f"{key}{SUFFIX}"
@@ -0,0 +1,98 @@
+"""
+Tone mapping, for grading linear images such as PFM renders without
+tracing them again.
+
+A grade scales the image by an exposure, maps it into 0 - 1 with one of
+``TONEMAPS``, and optionally encodes it for display with the sRGB curve.
+Every step works on the whole image at once.
+"""
+
+from functools import cache
+from typing import Callable, Optional
+
+import numpy as np
+
+from .canvas import Canvas
+
+# Entries in the sRGB lookup table. Enough that neighbouring entries never
+# round to 8 bit values more than one apart.
+SRGB_TABLE_SIZE = 4096
+
+
+def clamp(pixels: np.ndarray) -> np.ndarray:
+    """Clip to 0 - 1, the same as writing the image directly"""
+    return np.clip(pixels, 0, 1)
+
+
+def reinhard(pixels: np.ndarray, white: Optional[float] = None) -> np.ndarray:
+    """
+    x / (1 + x) per channel. Given a ``white`` point, values at or above it
+    map to 1 instead of only approaching it.
+    """
+    pixels = np.maximum(pixels, 0)
+    if white is None:
+        return pixels / (1 + pixels)
+    return np.minimum(pixels * (1 + pixels / white**2) / (1 + pixels), 1)
+
+
+def aces(pixels: np.ndarray) -> np.ndarray:
+    """Krzysztof Narkowicz's fit of the ACES filmic curve"""
+    pixels = np.maximum(pixels, 0)
+    return np.clip(
+        pixels * (2.51 * pixels + 0.03) / (pixels * (2.43 * pixels + 0.59) + 0.14),
+        0,
+        1,
+    )
+
+
+TONEMAPS: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "clamp": clamp,
+    "reinhard": reinhard,
+    "aces": aces,
+}
+
+
+def srgb_encode(pixels: np.ndarray) -> np.ndarray:
+    """Linear 0 - 1 values to sRGB, through a lookup table"""
+    table = _srgb_table(SRGB_TABLE_SIZE)
+    indices = np.rint(np.clip(pixels, 0, 1) * (len(table) - 1)).astype(np.intp)
+    return table[indices]
+
+
+@cache
+def _srgb_table(size: int) -> np.ndarray:
+    linear = np.linspace(0, 1, size)
+    return np.where(
+        linear <= 0.0031308,
+        linear * 12.92,
+        1.055 * linear ** (1 / 2.4) - 0.055,
+    )
+
+
+def grade(
+    canvas: Canvas,
+    exposure: float = 0.0,
+    tonemap: str = "clamp",
+    white: Optional[float] = None,
+    srgb: bool = False,
+) -> Canvas:
+    """
+    A new canvas with the image scaled by 2 ** ``exposure`` stops, mapped
+    by ``tonemap``, one of ``TONEMAPS``, and sRGB encoded if ``srgb``.
+    ``white`` is the white point for reinhard.
+    """
+    if tonemap not in TONEMAPS:
+        raise ValueError(
+            f"Unknown tone map: {tonemap}. Expected one of {tuple(TONEMAPS)}"
+        )
+    if white is not None and tonemap != "reinhard":
+        raise ValueError("Only the reinhard tone map takes a white point")
+
+    pixels = np.asarray(canvas) * 2.0**exposure
+    if tonemap == "reinhard":
+        pixels = reinhard(pixels, white)
+    else:
+        pixels = TONEMAPS[tonemap](pixels)
+    if srgb:
+        pixels = srgb_encode(pixels)
+    return Canvas.from_array(pixels)
@@ -0,0 +1,227 @@
+"""
+Re-render a scene file whenever it changes, with ``pytracer --watch``.
+
+Workers stay up between edits. When an edit only touches the camera, the
+previously loaded world is kept, so workers keep their copy of it. Every
+render records a G-buffer, and when the new camera, geometry and
+refractive indices still match it, only shading is redone. The output is
+rewritten as tiles complete, nearest the center of the image first.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import yaml as pyyaml
+
+from .camera import Camera
+from .canvas import Canvas
+from .gbuffer import GBuffer, empty_gbuffer, shade_tile, trace_tile
+from .image import PPM
+from .pool import RenderPool
+from .render import TILE_SIZE, Tile, center_out, generate_tiles, write_tile
+from .serialization import load, load_camera, parse_yaml
+from .world import MAX_REFLECTIONS, World
+
+# Seconds between rewrites of the output while rendering
+REFRESH_INTERVAL = 0.5
+
+# Seconds between checks of the scene file
+POLL_INTERVAL = 0.25
+
+
+def world_key(world_dict: dict) -> str:
+    """Hash of every section of a scene, except the camera"""
+    rest = {name: value for name, value in world_dict.items() if name != "camera"}
+    return hashlib.sha256(
+        json.dumps(rest, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class SceneWatcher:
+    def __init__(
+        self,
+        filename: str,
+        output: str,
+        pool: RenderPool,
+        max_depth: int = MAX_REFLECTIONS,
+        tile_size: int = TILE_SIZE,
+    ):
+        self.filename = filename
+        self.output = output
+        self.pool = pool
+        self.max_depth = max_depth
+        self.tile_size = tile_size
+        self.camera: Optional[Camera] = None
+        self.world: Optional[World] = None
+        self.gbuffer: Optional[GBuffer] = None
+        self._text: Optional[str] = None
+        self._world_key: Optional[str] = None
+
+    def update(self, stale: Callable[[], bool] = lambda: False) -> Optional[str]:
+        """
+        Re-render if the scene has changed since the last update. Returns
+        "render" or "reshade" for what was done, "interrupted" if ``stale``
+        became true part way through, and None if the scene is unchanged.
+        Raises if the scene can't be loaded, leaving the last render as is.
+        """
+        with open(self.filename) as f:
+            text = f.read()
+        if text == self._text:
+            return None
+
+        world_dict = parse_yaml(text)
+        key = world_key(world_dict)
+        if key == self._world_key and self.world is not None:
+            world = self.world
+            camera = load_camera(world_dict["camera"], world)
+        else:
+            camera, world = load(
+                world_dict, os.path.dirname(os.path.abspath(self.filename))
+            )
+        self.camera, self.world, self._world_key = camera, world, key
+        self._text = text
+
+        if self.gbuffer is not None and self.gbuffer.matches(camera, world):
+            done = self._reshade(camera, world, key, stale)
+            kind = "reshade"
+        else:
+            done = self._render(camera, world, key, stale)
+            kind = "render"
+        if not done:
+            # Render this version again on the next update, unless it changes
+            self._text = None
+            return "interrupted"
+        return kind
+
+    def _render(
+        self, camera: Camera, world: World, key: str, stale: Callable[[], bool]
+    ) -> bool:
+        self.gbuffer = None
+        gbuffer = empty_gbuffer(camera, world)
+        results = self.pool.render_tiles(
+            camera,
+            world,
+            self._tiles(camera),
+            key,
+            task=_trace_and_shade,
+            max_depth=self.max_depth,
+        )
+
+        def paste(tile, result):
+            part, pixels = result
+            gbuffer.paste(tile, part)
+            return pixels
+
+        if not self._refresh(camera, results, paste, stale):
+            return False
+        self.gbuffer = gbuffer
+        return True
+
+    def _reshade(
+        self, camera: Camera, world: World, key: str, stale: Callable[[], bool]
+    ) -> bool:
+        assert self.gbuffer is not None
+        tiles = [(tile, self.gbuffer.tile(tile)) for tile in self._tiles(camera)]
+        results = self.pool.render_tiles(
+            camera, world, tiles, key, task=_shade_item, max_depth=self.max_depth
+        )
+        return self._refresh(
+            camera, results, lambda item, pixels: pixels, stale, item_tile=True
+        )
+
+    def _tiles(self, camera: Camera) -> list[Tile]:
+        return center_out(
+            generate_tiles(camera.hsize, camera.vsize, self.tile_size),
+            camera.hsize,
+            camera.vsize,
+        )
+
+    def _refresh(self, camera, results, pixels_of, stale, item_tile=False) -> bool:
+        """Write tiles to the output as they arrive. False if interrupted"""
+        canvas = Canvas(camera.hsize, camera.vsize)
+        last_write = time.monotonic()
+        try:
+            for item, result in results:
+                pixels = pixels_of(item, result)
+                write_tile(canvas, item[0] if item_tile else item, pixels)
+                if stale():
+                    return False
+                if time.monotonic() - last_write >= REFRESH_INTERVAL:
+                    self._write(canvas)
+                    last_write = time.monotonic()
+        finally:
+            results.close()
+        self._write(canvas)
+        return True
+
+    def _write(self, canvas: Canvas) -> None:
+        tmp = f"{self.output}.tmp"
+        with open(tmp, "w") as f:
+            PPM.save(canvas, f)
+        os.replace(tmp, self.output)
+
+
+def _trace_and_shade(
+    camera: Camera, world: World, tile: Tile, max_depth: int = MAX_REFLECTIONS
+) -> tuple[GBuffer, np.ndarray]:
+    part = trace_tile(camera, world, tile)
+    return part, shade_tile(camera, world, tile, part, max_depth)
+
+
+def _shade_item(
+    camera: Camera,
+    world: World,
+    item: tuple[Tile, GBuffer],
+    max_depth: int = MAX_REFLECTIONS,
+) -> np.ndarray:
+    tile, part = item
+    return shade_tile(camera, world, tile, part, max_depth)
+
+
+def watch(
+    filename: str,
+    output: str,
+    num_processes: Optional[int] = None,
+    backend: Optional[str] = None,
+    max_depth: int = MAX_REFLECTIONS,
+    poll_interval: float = POLL_INTERVAL,
+) -> None:
+    """Render the scene to ``output`` every time it is saved, until interrupted"""
+
+    def modified() -> Optional[int]:
+        try:
+            return os.stat(filename).st_mtime_ns
+        except FileNotFoundError:
+            # Some editors replace the file when saving
+            return None
+
+    with RenderPool(num_processes, backend) as pool:
+        watcher = SceneWatcher(filename, output, pool, max_depth)
+        seen = None
+        print(f"Watching {filename}. Press Ctrl-C to stop", file=sys.stderr)
+        while True:
+            current = modified()
+            if current is not None and current != seen:
+                seen = current
+                start = time.perf_counter()
+                try:
+                    kind = watcher.update(stale=lambda: modified() != seen)
+                except (
+                    OSError,
+                    pyyaml.YAMLError,
+                    ValueError,
+                    KeyError,
+                    TypeError,
+                ) as e:
+                    # Including files half saved, or gone again since the stat
+                    print(f"Could not load {filename}: {e}", file=sys.stderr)
+                else:
+                    if kind is not None:
+                        elapsed = time.perf_counter() - start
+                        print(f"{kind}: {elapsed:.2f}s", file=sys.stderr)
+            time.sleep(poll_interval)
@@ -2,23 +2,28 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from math import sqrt
-from typing import Optional
+from typing import Optional, Sequence
 
+from .bvh import BVH
 from .color import Color
 from .light import PointLight
 from .matrix import Matrix
+from .options import MAX_REFLECTIONS
 from .primitives import Point, Vector3
 from .ray import Intersection, Ray
 from .shapes import Shape
 from .utils import EPSILON
 
-MAX_REFLECTIONS = 5
-
 
 @dataclass
 class World:
     shapes: list[Shape] = field(default_factory=list)
     lights: list[PointLight] = field(default_factory=list)
+    # Built by build_bvh(). Rebuild after adding or removing shapes.
+    bvh: Optional[BVH] = field(default=None, repr=False, compare=False)
+
+    def build_bvh(self) -> None:
+        self.bvh = BVH(self.shapes)
 
     def color_at(self, ray, remaining=MAX_REFLECTIONS) -> Color:
         if remaining == 0:
@@ -45,7 +50,11 @@ class World:
     def intersect(self, ray: Ray) -> list[Intersection]:
         """Returns list of Intersections sorted by t"""
         intersections = []
-        for sphere in self.shapes:
+        if self.bvh is None:
+            shapes = self.shapes
+        else:
+            shapes = [self.shapes[i] for i in self.bvh.candidates(ray)]
+        for sphere in shapes:
             intersections += ray.intersects(sphere)
         intersections.sort(key=lambda i: i.t)
         return intersections
@@ -83,11 +92,22 @@ class World:
             n2=n2,
         )
 
-    def shade_hit(self, comps: Comps, remaining=MAX_REFLECTIONS) -> Color:
-        """Computes color for each light and return the sum"""
+    def shade_hit(
+        self,
+        comps: Comps,
+        remaining=MAX_REFLECTIONS,
+        shadows: Optional[Sequence[bool]] = None,
+    ) -> Color:
+        """
+        Computes color for each light and return the sum. ``shadows`` are
+        precomputed is_shadowed results for each light, if known.
+        """
         color = Color(0, 0, 0)
-        for light in self.lights:
-            is_shadowed = self.is_shadowed(comps.over_point, light)
+        for i, light in enumerate(self.lights):
+            if shadows is None:
+                is_shadowed = self.is_shadowed(comps.over_point, light)
+            else:
+                is_shadowed = shadows[i]
 
             surface = comps.shape.material.lighting(
                 light,
@@ -1,8 +1,42 @@
 from copy import copy
+from math import pi
 
 import pytest
 
-from pytracer import Color, Material, Matrix, Point, PointLight, Sphere, World
+from pytracer import (
+    Camera,
+    Color,
+    Material,
+    Matrix,
+    Point,
+    PointLight,
+    Sphere,
+    Vector3,
+    World,
+)
+
+
+class CountingWorld(World):
+    """
+    Counts ray casts against the scene geometry, and colored rays. The
+    counts are shared by all instances, so only use serial or thread
+    backends with it.
+    """
+
+    intersections = 0
+    colors = 0
+
+    @classmethod
+    def reset(cls):
+        cls.intersections = cls.colors = 0
+
+    def intersect(self, ray):
+        CountingWorld.intersections += 1
+        return super().intersect(ray)
+
+    def color_at(self, ray, **kwargs):
+        CountingWorld.colors += 1
+        return super().color_at(ray, **kwargs)
 
 
 @pytest.fixture
@@ -38,3 +72,12 @@ def world(sphere):
 
     light = PointLight(position=Point(-10, 10, -10), intensity=Color(1, 1, 1))
     return World(shapes=[s1, s2], lights=[light])
+
+
+@pytest.fixture
+def camera():
+    c = Camera(11, 7, pi / 2)
+    c.transform = World.view_transform(
+        from_=Point(0, 0, -5), to=Point(0, 0, 0), up=Vector3(0, 1, 0)
+    )
+    return c
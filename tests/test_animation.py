@@ -0,0 +1,129 @@
+from math import pi
+from textwrap import dedent
+
+import pytest
+
+from pytracer import Matrix, Point, Vector3, World
+from pytracer.animation import (
+    Animation,
+    Keyframe,
+    Track,
+    interpolate,
+    load_animation_yaml,
+    render_animation,
+)
+
+
+@pytest.fixture
+def animation():
+    return Animation(
+        frames=3,
+        shapes={
+            1: Track(
+                [
+                    Keyframe(0, [{"translation": [0, 0, 0]}]),
+                    Keyframe(2, [{"translation": [0.5, 0.5, -1]}]),
+                ]
+            )
+        },
+        lights={0: Track([Keyframe(0, [-10, 10, -10]), Keyframe(2, [10, 10, -10])])},
+    )
+
+
+def test_interpolate():
+    assert interpolate([0, {"a": 2}], [1, {"a": 4}], 0.25) == [0.25, {"a": 2.5}]
+    assert interpolate("pi", 0, 0.5) == pytest.approx(pi / 2)
+
+
+def test_interpolate_mismatched_keyframes():
+    with pytest.raises(ValueError):
+        interpolate([{"scaling": [1, 1, 1]}], [{"translation": [1, 1, 1]}], 0.5)
+
+
+def test_track_holds_first_and_last_values():
+    track = Track([Keyframe(5, 1), Keyframe(10, 2)])
+
+    assert [track.at(frame) for frame in (0, 5, 10, 20)] == [1, 1, 2, 2]
+    assert track.at(6) == pytest.approx(1.2)
+
+
+@pytest.mark.parametrize("backend", ["serial", "process"])
+def test_frames_match_posed_render(camera, world, animation, backend):
+    frames = list(
+        render_animation(camera, world, animation, num_processes=2, backend=backend)
+    )
+
+    assert [frame for frame, _ in frames] == [0, 1, 2]
+    for frame, canvas in frames:
+        animation.pose(camera, world, frame)
+        assert list(canvas) == list(camera.render(world))
+
+
+def test_pose_moves_animated_parts(camera, world, animation):
+    animation.pose(camera, world, 1)
+
+    assert world.shapes[1].transform == Matrix.translation(0.25, 0.25, -0.5)
+    assert world.lights[0].position == Point(0, 10, -10)
+
+
+SCENE = dedent(
+    """
+    camera:
+      hsize: 10
+      vsize: 5
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 0, -5]
+        to: [0, 0, 0]
+        up: [0, 1, 0]
+
+    shapes:
+      - plane:
+          material:
+            color:
+              rgb: [255, 255, 255]
+      - sphere:
+          material:
+            color:
+              rgb: [255, 0, 0]
+
+    lights:
+      - position: [-10, 10, -10]
+
+    animation:
+      frames: 5
+      shapes:
+        1:
+          - frame: 0
+            transforms:
+              - rotation_y: 0
+          - frame: 4
+            transforms:
+              - rotation_y: pi
+      camera:
+        - frame: 0
+          from: [0, 0, -5]
+          to: [0, 0, 0]
+          up: [0, 1, 0]
+        - frame: 4
+          from: [0, 0, -10]
+          to: [0, 0, 0]
+          up: [0, 1, 0]
+    """
+)
+
+
+def test_load_animation_yaml():
+    camera, world, animation = load_animation_yaml(SCENE)
+
+    assert animation.frames == 5
+    animation.pose(camera, world, 2)
+    assert world.shapes[1].transform == Matrix.rotation_y(pi / 2)
+    assert camera.transform == World.view_transform(
+        from_=Point(0, 0, -7.5), to=Point(0, 0, 0), up=Vector3(0, 1, 0)
+    )
+
+
+def test_animated_shape_must_exist():
+    with pytest.raises(ValueError):
+        load_animation_yaml(SCENE.replace("\n    1:\n", "\n    7:\n"))
@@ -0,0 +1,92 @@
+from io import StringIO
+from textwrap import dedent
+
+import pytest
+
+from pytracer.batch import output_path, render_batch
+from pytracer.image import PNG, PPM
+from pytracer.pool import RenderPool
+from pytracer.serialization import load_yaml
+
+SCENE = dedent(
+    """
+    camera:
+      hsize: {width}
+      vsize: 5
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 0, -5]
+        to: [0, 0, 0]
+        up: [0, 1, 0]
+
+    shapes:
+      - sphere:
+          material:
+            color:
+              rgb: [255, 0, 0]
+
+    lights:
+      - position: [-10, 10, -10]
+        color:
+          rgb: [255, 255, 255]
+    """
+)
+
+
+def expected_image(scene):
+    camera, world = load_yaml(scene)
+    image = StringIO()
+    PPM.save(camera.render(world), image)
+    return image.getvalue()
+
+
+def test_output_path():
+    assert output_path("scenes/a.yaml") == "scenes/a.ppm"
+    assert output_path("scenes/a.yaml", "out") == "out/a.ppm"
+    assert output_path("scenes/a.yaml", extension=".png") == "scenes/a.png"
+
+
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_render_batch(tmp_path, backend):
+    scenes = {}
+    for width in range(3, 9):
+        filename = tmp_path / f"scene{width}.yaml"
+        scenes[str(filename)] = SCENE.format(width=width)
+        filename.write_text(scenes[str(filename)])
+
+    with RenderPool(num_processes=2, backend=backend) as pool:
+        results = list(render_batch(scenes, pool, tile_size=2, lookahead=3))
+
+    assert sorted(result.filename for result in results) == sorted(scenes)
+    for result in results:
+        assert result.error is None
+        with open(result.output) as f:
+            assert f.read() == expected_image(scenes[result.filename])
+
+
+def test_failed_scene_does_not_stop_batch(tmp_path):
+    good = tmp_path / "good.yaml"
+    good.write_text(SCENE.format(width=4))
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("shapes: [")
+
+    with RenderPool(num_processes=2, backend="thread") as pool:
+        results = {
+            result.filename: result
+            for result in render_batch([str(bad), str(good)], pool, tmp_path / "out")
+        }
+
+    assert results[str(bad)].error.startswith("Could not load scene")
+    assert results[str(good)].output == str(tmp_path / "out" / "good.ppm")
+
+
+def test_batch_image_format(tmp_path):
+    filename = tmp_path / "scene.yaml"
+    filename.write_text(SCENE.format(width=4))
+
+    with RenderPool(num_processes=1, backend="serial") as pool:
+        (result,) = render_batch([str(filename)], pool, image_format="png")
+
+    assert result.output == str(tmp_path / "scene.png")
+    with open(result.output, "rb") as f:
+        assert f.read(8) == PNG.signature
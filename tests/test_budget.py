@@ -0,0 +1,88 @@
+from math import pi
+
+import numpy as np
+import pytest
+
+from pytracer import Camera, Point, Vector3, World, render
+from pytracer.budget import Estimate, choose_settings, upscale_nearest
+from pytracer.render import RenderReport
+
+
+@pytest.fixture
+def camera():
+    c = Camera(12, 8, pi / 2)
+    c.transform = World.view_transform(
+        from_=Point(0, 0, -5), to=Point(0, 0, 0), up=Vector3(0, 1, 0)
+    )
+    return c
+
+
+def test_generous_budget_sacrifices_nothing(camera, world):
+    report = RenderReport()
+
+    canvas = render(
+        camera, world, backend="serial", show_progress=False, budget=60, report=report
+    )
+
+    assert report.sacrificed == []
+    assert report.rays_per_second > 0
+    assert list(canvas) == list(camera.render(world))
+
+
+def test_tiny_budget_still_renders_full_size(camera, world):
+    report = RenderReport()
+
+    canvas = render(
+        camera,
+        world,
+        backend="thread",
+        num_processes=2,
+        show_progress=False,
+        supersampling=2,
+        max_depth=3,
+        budget=0,
+        report=report,
+    )
+
+    assert (canvas.width, canvas.height) == (12, 8)
+    assert (report.width, report.height) == (1, 1)
+    assert report.supersampling == 1
+    assert report.max_depth == 1
+    assert report.sacrificed == [
+        "supersampling 2 -> 1",
+        "max depth 3 -> 1",
+        "resolution 12x8 -> 1x1",
+    ]
+
+
+def test_supersampling_sacrificed_before_depth():
+    estimate = Estimate(shallow=1, deep=2, max_depth=5)
+
+    # 10 pixels at full depth cost 20s per sample
+    assert choose_settings(estimate, 25, 5, 2, 2, 5) == (5, 2, 1, 5)
+
+
+def test_depth_sacrificed_before_resolution():
+    estimate = Estimate(shallow=1, deep=2, max_depth=5)
+
+    assert choose_settings(estimate, 15, 5, 2, 1, 5) == (5, 2, 1, 3)
+
+
+def test_resolution_scales_with_remaining_time():
+    estimate = Estimate(shallow=1, deep=1, max_depth=1)
+
+    assert choose_settings(estimate, 25, 10, 10, 1, 1) == (5, 5, 1, 1)
+
+
+def test_upscale_nearest():
+    pixels = np.arange(4 * 3, dtype=float).reshape((2, 2, 3))
+
+    scaled = upscale_nearest(pixels, 4, 4)
+
+    assert scaled.shape == (4, 4, 3)
+    assert scaled[:, :, 0].tolist() == [
+        [0, 0, 3, 3],
+        [0, 0, 3, 3],
+        [6, 6, 9, 9],
+        [6, 6, 9, 9],
+    ]
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from pytracer import Matrix, Plane, Point, Ray, Sphere, Vector3, World
+from pytracer.bvh import BVH, Bounds
+
+
+@pytest.fixture
+def spheres_world():
+    rng = random.Random(1)
+    shapes = [Plane()]
+    for _ in range(30):
+        sphere = Sphere()
+        sphere.transform = Matrix.translation(
+            rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-5, 5)
+        ) * Matrix.scaling(*[rng.uniform(0.2, 1) for _ in range(3)])
+        shapes.append(sphere)
+    return World(shapes=shapes)
+
+
+def rays():
+    rng = random.Random(2)
+    for _ in range(200):
+        origin = Point(rng.uniform(-8, 8), rng.uniform(-8, 8), -10)
+        direction = Vector3(rng.uniform(-1, 1), rng.uniform(-1, 1), 1).normalize()
+        yield Ray(origin, direction)
+
+
+def test_sphere_bounds():
+    sphere = Sphere()
+    sphere.transform = Matrix.translation(1, 2, 3) * Matrix.scaling(2, 1, 1)
+
+    bounds = Bounds.of_shape(sphere)
+
+    assert bounds.minimum == pytest.approx((-1, 1, 2), abs=0.001)
+    assert bounds.maximum == pytest.approx((3, 3, 4), abs=0.001)
+
+
+def test_planes_are_unbounded():
+    bvh = BVH([Plane(), Sphere()])
+
+    assert bvh.unbounded == [0]
+    assert Bounds.of_shape(Plane()) is None
+
+
+def test_bvh_matches_brute_force(spheres_world):
+    expected = [spheres_world.intersect(ray) for ray in rays()]
+
+    spheres_world.build_bvh()
+
+    assert [spheres_world.intersect(ray) for ray in rays()] == expected
+
+
+def test_refit_after_moving_shapes(spheres_world):
+    spheres_world.build_bvh()
+    for i in (3, 17):
+        spheres_world.shapes[i].transform = Matrix.translation(0, 0, i / 10)
+
+    spheres_world.bvh.refit([3, 17])
+    refit = [spheres_world.intersect(ray) for ray in rays()]
+    spheres_world.bvh = None
+
+    assert refit == [spheres_world.intersect(ray) for ray in rays()]
@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 
-from pytracer.canvas import Canvas
+from pytracer.canvas import Canvas, MappedCanvas
 from pytracer.color import Color
 
 
@@ -46,3 +47,72 @@ def test_index_for_coords(x, y, expected):
     """
     c = Canvas(5, 5)
     assert c._index_for_coords(x, y) == expected
+
+
+def test_write_pixels():
+    c = Canvas(5, 4)
+    block = np.arange(2 * 3 * 3, dtype=float).reshape((2, 3, 3))
+
+    c.write_pixels(1, 2, block)
+
+    assert c.pixel_at(1, 2) == Color(0, 1, 2)
+    assert c.pixel_at(3, 3) == Color(15, 16, 17)
+    assert c.pixel_at(0, 2) == Color(0, 0, 0)
+    with pytest.raises(IndexError):
+        c.write_pixels(3, 2, block)
+
+
+def test_array_access_is_zero_copy():
+    c = Canvas(4, 3, fill=Color(0.5, 0.5, 0.5))
+    array = np.asarray(c)
+    array[1, 2] = (1, 0, 0)
+
+    assert array.shape == (3, 4, 3)
+    assert c.pixel_at(2, 1) == Color(1, 0, 0)
+    assert memoryview(c.pixels).shape == (3, 4, 3)
+
+
+def test_from_array():
+    pixels = np.zeros((2, 3, 3), dtype=np.float32)
+    pixels[1, 0] = (0, 1, 0)
+
+    c = Canvas.from_array(pixels)
+
+    assert (c.width, c.height) == (3, 2)
+    assert c.pixel_at(0, 1) == Color(0, 1, 0)
+    assert list(c)[3] == Color(0, 1, 0)
+    with pytest.raises(ValueError):
+        Canvas.from_array(np.zeros((2, 3)))
+
+
+def test_float32_canvas():
+    c = Canvas(2, 2, dtype=np.float32)
+    c.write_pixel(1, 1, Color(0.25, 0.5, 1))
+
+    assert c.pixels.dtype == np.float32
+    assert c.pixel_at(1, 1) == Color(0.25, 0.5, 1)
+
+
+def test_bands():
+    c = Canvas(3, 5)
+    c.write_pixel(1, 4, Color(1, 0, 0))
+
+    bands = list(c.bands(rows=2))
+
+    assert [band.shape for band in bands] == [(2, 3, 3), (2, 3, 3), (1, 3, 3)]
+    assert np.array_equal(np.concatenate(bands), c.pixels)
+
+
+def test_mapped_canvas(tmp_path):
+    path = tmp_path / "canvas"
+    c = MappedCanvas(4, 3, str(path), fill=Color(0.5, 0.5, 0.5), dtype=np.float32)
+    c.write_pixel(0, 0, Color(1, 0, 0))
+    c.write_pixels(2, 1, np.ones((2, 2, 3)))
+
+    assert path.stat().st_size == 4 * 3 * 3 * 4
+    assert c.pixel_at(0, 0) == Color(1, 0, 0)
+    assert c.pixel_at(3, 2) == Color(1, 1, 1)
+    assert c.pixel_at(1, 2) == Color(0.5, 0.5, 0.5)
+    assert np.array_equal(np.concatenate(list(c.bands(rows=2))), np.asarray(c))
+    with pytest.raises(IndexError):
+        c.write_pixels(3, 1, np.ones((2, 2, 3)))
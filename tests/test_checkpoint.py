@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from pytracer import World, render
+from pytracer.checkpoint import Checkpoint
+
+SETTINGS = {"width": 4, "height": 2}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "render.checkpoint")
+
+
+def test_resume_returns_written_tiles(path):
+    checkpoint = Checkpoint(path, key="scene")
+    checkpoint.start(SETTINGS)
+    checkpoint.write((0, 0, 2, 2), np.ones((2, 2, 3)))
+    checkpoint.close()
+
+    completed = Checkpoint(path, key="scene", resume=True).start(SETTINGS)
+
+    assert list(completed) == [(0, 0, 2, 2)]
+    assert (completed[(0, 0, 2, 2)] == 1).all()
+
+
+def test_partially_written_tile_is_dropped(path):
+    checkpoint = Checkpoint(path, key="scene")
+    checkpoint.start(SETTINGS)
+    checkpoint.write((0, 0, 2, 2), np.ones((2, 2, 3)))
+    checkpoint.write((2, 0, 4, 2), np.ones((2, 2, 3)))
+    checkpoint.close()
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+
+    resumed = Checkpoint(path, key="scene", resume=True)
+    assert list(resumed.start(SETTINGS)) == [(0, 0, 2, 2)]
+    resumed.write((2, 0, 4, 2), np.zeros((2, 2, 3)))
+    resumed.close()
+
+    completed = Checkpoint(path, key="scene", resume=True).start(SETTINGS)
+    assert list(completed) == [(0, 0, 2, 2), (2, 0, 4, 2)]
+
+
+def test_resume_rejects_different_scene(path):
+    Checkpoint(path, key="scene").start(SETTINGS)
+
+    with pytest.raises(ValueError):
+        Checkpoint(path, key="other", resume=True).start(SETTINGS)
+
+
+def test_render_skips_completed_tiles(path, camera, world):
+    expected = render(camera, world, backend="serial", show_progress=False)
+    render(
+        camera,
+        world,
+        backend="serial",
+        show_progress=False,
+        tile_size=4,
+        checkpoint=Checkpoint(path),
+    )
+    # An empty world renders black, so only completed tiles have color
+    resumed = render(
+        camera,
+        World(),
+        backend="serial",
+        show_progress=False,
+        tile_size=4,
+        checkpoint=Checkpoint(path, resume=True),
+    )
+
+    assert list(resumed) == list(expected)
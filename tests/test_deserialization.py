@@ -1,6 +1,7 @@
 from math import pi
 from textwrap import dedent
 
+import numpy as np
 import pytest
 
 from pytracer import Color, Material, Matrix
@@ -222,3 +223,188 @@ def test_load_scene():
         red=0.50588, green=0.84705, blue=0.81568
     )
     assert len(world.lights) == 1
+
+
+ARRAY_SCENE = dedent(
+    """
+    camera:
+      hsize: 20
+      vsize: 10
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 1, -5]
+        to: [0, 1, 0]
+        up: [0, 1, 0]
+
+    materials:
+      red:
+        color:
+          rgb: [255, 0, 0]
+      blue:
+        color:
+          rgb: [0, 0, 255]
+
+    shapes:
+      - array:
+          sphere:
+            material: red
+            transforms:
+              - rotation_y: pi / 4
+          positions: {positions}
+          scales: {scales}
+          {materials}
+    """
+)
+
+
+def array_scene(positions, scales, materials=""):
+    return ARRAY_SCENE.format(positions=positions, scales=scales, materials=materials)
+
+
+def test_load_shape_array():
+    _, world = load_yaml(
+        array_scene("[[0, 1, 0], [2, 1, 3]]", "[[0.5, 0.5, 0.5], [1, 2, 3]]")
+    )
+
+    assert len(world.shapes) == 2
+    assert world.shapes[0].material is world.shapes[1].material
+    for shape, transforms in zip(
+        world.shapes,
+        [
+            [
+                {"rotation_y": "pi / 4"},
+                {"scaling": [0.5, 0.5, 0.5]},
+                {"translation": [0, 1, 0]},
+            ],
+            [
+                {"rotation_y": "pi / 4"},
+                {"scaling": [1, 2, 3]},
+                {"translation": [2, 1, 3]},
+            ],
+        ],
+    ):
+        assert shape.transform.cells == pytest.approx(load_transforms(transforms).cells)
+
+
+def test_load_shape_array_materials():
+    _, world = load_yaml(
+        array_scene(
+            "[[0, 0, 0], [1, 0, 0], [2, 0, 0]]",
+            "[1, 1, 1]",
+            "materials: [red, blue]\n      material_indices: [1, 0, 1]",
+        )
+    )
+
+    red, blue = Color(1, 0, 0), Color(0, 0, 1)
+    assert [shape.material.color for shape in world.shapes] == [blue, red, blue]
+
+
+def test_shape_array_materials_need_indices():
+    with pytest.raises(ValueError, match="material_indices"):
+        load_yaml(array_scene("[[0, 0, 0]]", "[1]", "materials: [red, blue]"))
+
+
+def test_load_shape_array_files(tmp_path):
+    np.save(tmp_path / "positions.npy", np.arange(30.0).reshape((10, 3)))
+    np.save(tmp_path / "scales.npy", np.full(10, 0.25))
+
+    _, world = load_yaml(
+        array_scene("positions.npy", "scales.npy"), directory=str(tmp_path)
+    )
+
+    assert len(world.shapes) == 10
+    assert world.shapes[3].transform.cells[:3, 3].tolist() == [9, 10, 11]
+    # Large scenes get a bounding volume hierarchy
+    assert world.bvh is not None
+
+
+def test_shape_array_files_need_a_directory():
+    with pytest.raises(ValueError):
+        load_yaml(array_scene("positions.npy", "[1]"))
+
+
+def test_shape_array_lengths_must_match():
+    with pytest.raises(ValueError):
+        load_yaml(array_scene("[[0, 0, 0], [1, 0, 0]]", "[1, 2, 3]"))
+
+
+NAMED_SCENE = dedent(
+    """
+    camera:
+      hsize: 20
+      vsize: 10
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 1, -5]
+        to: [0, 1, 0]
+        up: [0, 1, 0]
+
+    materials:
+      white:
+        color:
+          rgb: [255, 255, 255]
+        diffuse: 0.7
+      shiny:
+        extend: white
+        reflective: 0.3
+      red:
+        extend: shiny
+        color:
+          rgb: [255, 0, 0]
+
+    transforms:
+      onFloor:
+        - translation: [0, 1, 0]
+      small:
+        - scaling: [0.5, 0.5, 0.5]
+        - onFloor
+
+    shapes:
+      - sphere:
+          material: red
+          transforms: small
+      - sphere:
+          material: shiny
+          transforms:
+            - small
+      - sphere:
+          material: white
+          transforms:
+            - small
+            - rotation_y: pi / 4
+    """
+)
+
+
+def test_load_named_transforms():
+    _, world = load_yaml(NAMED_SCENE)
+
+    first, second, third = (shape.transform for shape in world.shapes)
+    assert first is second
+    assert first == Matrix.translation(0, 1, 0) * Matrix.scaling(0.5, 0.5, 0.5)
+    assert third == Matrix.rotation_y(pi / 4) * first
+
+
+def test_load_extended_materials():
+    _, world = load_yaml(NAMED_SCENE)
+
+    red, shiny, white = (shape.material for shape in world.shapes)
+    assert white.reflective == 0
+    assert shiny.reflective == 0.3
+    assert shiny.diffuse == red.diffuse == 0.7
+    assert red.color == Color(1, 0, 0)
+    assert shiny.color == Color(1, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("- onFloor", "- small"),
+        ("- onFloor", "- offFloor"),
+        ("extend: white", "extend: red"),
+        ("extend: white", "extend: black"),
+    ],
+)
+def test_invalid_names(old, new):
+    with pytest.raises(ValueError):
+        load_yaml(NAMED_SCENE.replace(old, new))
@@ -0,0 +1,150 @@
+import pickle
+import socketserver
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from pytracer.distributed import (
+    WorkerServer,
+    parse_address,
+    receive_message,
+    render_distributed,
+    send_bytes,
+)
+
+
+class DyingHandler(socketserver.StreamRequestHandler):
+    """Accepts the scene and a tile, then drops the connection"""
+
+    def handle(self):
+        receive_message(self.rfile)
+        receive_message(self.rfile)
+
+
+class BadReplyHandler(socketserver.StreamRequestHandler):
+    """Accepts the scene and a tile, then replies with junk"""
+
+    reply = b""
+
+    def handle(self):
+        receive_message(self.rfile)
+        receive_message(self.rfile)
+        send_bytes(self.wfile, self.reply)
+
+
+class HangingHandler(socketserver.StreamRequestHandler):
+    """Accepts the scene and a tile, then never replies"""
+
+    def handle(self):
+        receive_message(self.rfile)
+        receive_message(self.rfile)
+        self.rfile.read()
+
+
+def start_server(server):
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    return server.server_address[:2]
+
+
+@pytest.fixture
+def workers():
+    servers = [WorkerServer(("localhost", 0)) for _ in range(2)]
+    yield [start_server(server) for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def dying_worker():
+    server = socketserver.TCPServer(("localhost", 0), DyingHandler)
+    yield start_server(server)
+    server.shutdown()
+    server.server_close()
+
+
+def test_render_on_workers(camera, world, workers):
+    canvas = render_distributed(
+        camera, world, workers, tile_size=4, show_progress=False
+    )
+
+    assert list(canvas) == list(camera.render(world))
+
+
+def test_tiles_of_lost_worker_are_reassigned(camera, world, workers, dying_worker):
+    canvas = render_distributed(
+        camera, world, [dying_worker, workers[0]], tile_size=4, show_progress=False
+    )
+
+    assert list(canvas) == list(camera.render(world))
+
+
+@pytest.mark.parametrize(
+    "reply", [b"not a pickle", pickle.dumps(("pixels",)), pickle.dumps("hello")]
+)
+def test_bad_reply_loses_worker(camera, world, workers, reply):
+    handler = type("Handler", (BadReplyHandler,), {"reply": reply})
+    server = socketserver.TCPServer(("localhost", 0), handler)
+    try:
+        canvas = render_distributed(
+            camera,
+            world,
+            [start_server(server), workers[0]],
+            tile_size=4,
+            show_progress=False,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert list(canvas) == list(camera.render(world))
+
+
+def test_hung_worker_times_out(camera, world):
+    server = socketserver.ThreadingTCPServer(("localhost", 0), HangingHandler)
+    server.daemon_threads = True
+    try:
+        with pytest.raises(RuntimeError):
+            render_distributed(
+                camera, world, [start_server(server)], show_progress=False, timeout=0.2
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_all_workers_lost(camera, world, dying_worker):
+    with pytest.raises(RuntimeError):
+        render_distributed(camera, world, [dying_worker], show_progress=False)
+
+
+def test_local_worker_processes(camera, world):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "pytracer.cli", "worker", "--port", "0"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(2)
+    ]
+    try:
+        addresses = [
+            parse_address(process.stdout.readline().split()[-1])
+            for process in processes
+        ]
+        canvas = render_distributed(camera, world, addresses, show_progress=False)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    assert list(canvas) == list(camera.render(world))
+
+
+def test_parse_address():
+    assert parse_address("render-01:9000") == ("render-01", 9000)
+    assert parse_address(":9000") == ("localhost", 9000)
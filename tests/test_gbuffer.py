@@ -0,0 +1,129 @@
+from copy import copy
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pytracer import Color, Material, Point, PointLight, World
+from pytracer.gbuffer import GBuffer, build_gbuffer, render_with_gbuffer, reshade
+from pytracer.render import render
+from pytracer.scenecache import load_scene_file
+
+from .conftest import CountingWorld
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+# Hits are stored rounded to float32, so secondary rays start from slightly
+# different points. Keep the difference within one 8 bit level.
+FLOAT32_TOLERANCE = 1 / 255
+
+
+def edited(world, material=None, lights=None):
+    shapes = [copy(shape) for shape in world.shapes]
+    if material is not None:
+        shapes[0].material = material
+    return World(shapes=shapes, lights=world.lights if lights is None else lights)
+
+
+@pytest.mark.parametrize("backend", ["serial", "process"])
+def test_reshade_matches_render(camera, world, backend):
+    gbuffer = build_gbuffer(camera, world, num_processes=2, backend=backend)
+
+    canvas = reshade(camera, world, gbuffer, num_processes=2, backend=backend)
+
+    assert list(canvas) == list(camera.render(world))
+
+
+@pytest.mark.parametrize(
+    "material, lights",
+    [
+        (Material(color=Color(1, 0, 0), shininess=10), None),
+        (Material(color=Color(0, 0, 1), reflective=0.5), None),
+        (None, [PointLight(Point(10, 10, -10), Color(1, 1, 1))]),
+    ],
+)
+def test_reshade_edited_scene(camera, world, material, lights):
+    gbuffer = build_gbuffer(camera, world, backend="serial")
+    changed = edited(world, material, lights)
+
+    canvas = reshade(camera, changed, gbuffer, backend="serial")
+
+    assert list(canvas) == list(camera.render(changed))
+
+
+def test_material_edit_traces_no_primary_or_shadow_rays(camera, world):
+    gbuffer = build_gbuffer(camera, world, backend="serial")
+    changed = edited(world, Material(color=Color(1, 0, 0)))
+    counting = CountingWorld(shapes=changed.shapes, lights=changed.lights)
+
+    CountingWorld.reset()
+    reshade(camera, counting, gbuffer, backend="serial")
+
+    assert CountingWorld.intersections == 0
+
+
+def test_geometry_change_is_rejected(camera, world):
+    gbuffer = build_gbuffer(camera, world, backend="serial")
+    camera.hsize = 12
+
+    with pytest.raises(ValueError):
+        reshade(camera, world, gbuffer, backend="serial")
+
+
+def test_save_and_load(tmp_path, camera, world):
+    path = str(tmp_path / "scene.gbuffer")
+    gbuffer = build_gbuffer(camera, world, backend="serial")
+
+    gbuffer.save(path)
+    loaded = GBuffer.load(path)
+
+    assert loaded.matches(camera, world)
+    assert list(reshade(camera, world, loaded, backend="serial")) == list(
+        camera.render(world)
+    )
+
+
+def test_render_with_gbuffer_reuses_file(tmp_path, camera, world):
+    path = str(tmp_path / "scene.gbuffer")
+    render_with_gbuffer(camera, world, path, backend="serial")
+    changed = edited(world, Material(color=Color(1, 0, 0)))
+    counting = CountingWorld(shapes=changed.shapes, lights=changed.lights)
+
+    CountingWorld.reset()
+    canvas = render_with_gbuffer(camera, counting, path, backend="serial")
+
+    assert CountingWorld.intersections == 0
+    assert list(canvas) == list(camera.render(changed))
+
+
+def test_float32_gbuffer(tmp_path, camera, world):
+    path = str(tmp_path / "scene.gbuffer")
+    render_with_gbuffer(camera, world, path, backend="serial")
+
+    canvas = render_with_gbuffer(
+        camera, world, path, backend="serial", precision="float32"
+    )
+
+    assert canvas.pixels.dtype == np.float32
+    # The float64 buffer is replaced, rather than reused
+    assert GBuffer.load(path).position.dtype == np.float32
+
+
+@pytest.mark.parametrize(
+    "scene",
+    [
+        "scene.yaml",
+        "scene_reflection.yaml",
+        "sphere_in_glass.yaml",
+        "transparency.yaml",
+    ],
+)
+def test_float32_gbuffer_close_to_float64_render(scene):
+    camera, world = load_scene_file(str(EXAMPLES / scene), use_cache=False)
+    camera.hsize, camera.vsize = 16, 10
+    gbuffer = build_gbuffer(camera, world, backend="serial", precision="float32")
+
+    canvas = reshade(camera, world, gbuffer, backend="serial")
+
+    expected = render(camera, world, backend="serial", show_progress=False)
+    assert np.abs(canvas.pixels - expected.pixels).max() <= FLOAT32_TOLERANCE
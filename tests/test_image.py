@@ -1,9 +1,24 @@
-from io import StringIO
+import struct
+import zlib
+from io import BytesIO, StringIO
 from textwrap import dedent
 
-from pytracer.canvas import Canvas
+import numpy as np
+import pytest
+
+from pytracer.canvas import Canvas, MappedCanvas
 from pytracer.color import Color
-from pytracer.image import PPM
+from pytracer.image import (
+    FORMATS,
+    PFM,
+    PNG,
+    PPM,
+    BinaryPPM,
+    filter_rows,
+    load_image,
+    quantize,
+)
+from pytracer.options import IMAGE_FORMATS
 
 
 def test_defaults():
@@ -57,3 +72,247 @@ def test_save():
     ).lstrip()  # removes leading whitespace for nicer formatting here
 
     assert dest.getvalue() == expected
+
+
+def test_load_round_trip():
+    c = Canvas(2, 2)
+    c.write_pixel(0, 0, Color(1, 0.5, 0))
+    c.write_pixel(1, 1, Color(0, 0, 1))
+    dest = StringIO()
+    PPM.save(c, dest, comments=["made by a test"])
+
+    loaded, comments = PPM.load(StringIO(dest.getvalue()))
+
+    assert comments == ["made by a test"]
+    assert (loaded.width, loaded.height) == (2, 2)
+    assert loaded.pixel_at(0, 0) == Color(1, 128 / 255, 0)
+    assert loaded.pixel_at(1, 1) == Color(0, 0, 1)
+
+
+@pytest.mark.parametrize("size", [(0, 0), (1, 1), (4, 1), (5, 3), (33, 17)])
+def test_save_matches_pixel_at_a_time_output(size):
+    width, height = size
+    pixels = np.random.default_rng(0).uniform(-0.2, 1.2, (height, width, 3))
+    pixels[::2, ::3] = 0.5  # rounds half to even
+    c = Canvas.from_array(pixels)
+    dest = StringIO()
+
+    PPM.save(c, dest, comments=["region 0,0,1,1 of 2x2"])
+
+    expected = "".join(
+        f"{line}\n" for line in PPM.lines(c, comments=["region 0,0,1,1 of 2x2"])
+    )
+    assert dest.getvalue() == expected
+
+
+def test_binary_save():
+    c = Canvas(2, 1)
+    c.write_pixel(0, 0, Color(1.5, 0.5, 0))
+    c.write_pixel(1, 0, Color(0, 0, 1))
+    dest = BytesIO()
+
+    BinaryPPM.save(c, dest, comments=["a comment"])
+
+    assert dest.getvalue() == b"P6\n# a comment\n2 1\n255\n\xff\x80\x00\x00\x00\xff"
+
+
+def test_binary_load_round_trip():
+    c = Canvas(3, 2)
+    c.write_pixel(2, 1, Color(1, 0.5, 0))
+    dest = BytesIO()
+    BinaryPPM.save(c, dest, comments=["made by a test"])
+    dest.seek(0)
+
+    loaded, comments = load_image(dest)
+
+    assert comments == ["made by a test"]
+    assert (loaded.width, loaded.height) == (3, 2)
+    assert loaded.pixel_at(2, 1) == Color(1, 128 / 255, 0)
+
+
+def test_format_names_match_writers():
+    assert tuple(FORMATS) == IMAGE_FORMATS
+
+
+def test_load_image_reads_text_ppm():
+    c = Canvas(2, 2)
+    c.write_pixel(1, 0, Color(0, 1, 0))
+    text = StringIO()
+    PPM.save(c, text)
+
+    loaded, _ = load_image(BytesIO(text.getvalue().encode()))
+
+    assert loaded.pixel_at(1, 0) == Color(0, 1, 0)
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [(PNG.signature + b"\0\0\0\rIHDR", "PNG"), (b"\xff\xd8\xff\xe0", "Not a")],
+)
+def test_load_image_rejects_other_formats(data, message):
+    with pytest.raises(ValueError, match=message):
+        load_image(BytesIO(data))
+
+
+def test_binary_load_rejects_other_images():
+    with pytest.raises(ValueError):
+        BinaryPPM.load(BytesIO(b"P3\n1 1\n255\n0 0 0\n"))
+
+
+@pytest.mark.parametrize("writer", [PPM, BinaryPPM])
+@pytest.mark.parametrize("band_height", [1, 2, 5])
+def test_save_rows_matches_save(writer, band_height):
+    pixels = np.random.default_rng(0).uniform(-0.2, 1.2, (9, 13, 3))
+    saved = StringIO() if writer is PPM else BytesIO()
+    streamed = StringIO() if writer is PPM else BytesIO()
+    writer.save(Canvas.from_array(pixels), saved, comments=["a comment"])
+
+    writer.save_rows(
+        13,
+        9,
+        (pixels[y : y + band_height] for y in range(0, 9, band_height)),
+        streamed,
+        comments=["a comment"],
+    )
+
+    assert streamed.getvalue() == saved.getvalue()
+
+
+def test_save_mapped_canvas(tmp_path):
+    mapped = MappedCanvas(7, 5, str(tmp_path / "canvas"))
+    mapped.write_pixels(0, 0, np.random.default_rng(0).random((5, 7, 3)))
+    expected, saved = StringIO(), StringIO()
+    PPM.save(Canvas.from_array(np.array(mapped.pixels)), expected)
+
+    PPM.save(mapped, saved)
+
+    assert saved.getvalue() == expected.getvalue()
+
+
+def read_png(data: bytes) -> tuple[np.ndarray, list[bytes]]:
+    """Decode an 8 bit RGB PNG, returning its pixels and tEXt chunks"""
+    assert data[:8] == PNG.signature
+    position, idat, texts = 8, b"", []
+    while position < len(data):
+        (length,) = struct.unpack(">I", data[position : position + 4])
+        kind = data[position + 4 : position + 8]
+        chunk = data[position + 8 : position + 8 + length]
+        (checksum,) = struct.unpack(
+            ">I", data[position + 8 + length : position + 12 + length]
+        )
+        assert zlib.crc32(kind + chunk) == checksum
+        if kind == b"IHDR":
+            width, height = struct.unpack(">II", chunk[:8])
+            assert chunk[8:] == bytes([8, 2, 0, 0, 0])
+        elif kind == b"IDAT":
+            idat += chunk
+        elif kind == b"tEXt":
+            texts.append(chunk)
+        position += 12 + length
+    assert kind == b"IEND"
+
+    raw = zlib.decompress(idat)
+    stride = width * 3
+    rows = []
+    previous = [0] * stride
+    for y in range(height):
+        filter_type, line = (
+            raw[y * (stride + 1)],
+            raw[y * (stride + 1) + 1 : (y + 1) * (stride + 1)],
+        )
+        row = []
+        for i, value in enumerate(line):
+            a = row[i - 3] if i >= 3 else 0
+            b = previous[i]
+            c = previous[i - 3] if i >= 3 else 0
+            p = a + b - c
+            paeth = min((abs(p - a), 0, a), (abs(p - b), 1, b), (abs(p - c), 2, c))[2]
+            predictor = [0, a, b, (a + b) // 2, paeth][filter_type]
+            row.append((value + predictor) % 256)
+        rows.append(row)
+        previous = row
+    return np.array(rows, dtype=np.uint8).reshape((height, width, 3)), texts
+
+
+@pytest.mark.parametrize("level", [0, 1, 6, 9])
+def test_png_round_trip(level):
+    rng = np.random.default_rng(0)
+    # Smooth gradients and noise, so every filter type gets picked
+    y, x = np.mgrid[0:23, 0:17]
+    pixels = np.stack([x / 17, y / 23, (x + y) % 5 / 4], axis=2)
+    pixels[15:] = rng.random((8, 17, 3))
+    canvas = Canvas.from_array(pixels)
+    dest = BytesIO()
+
+    PNG.save(canvas, dest, comments=["made by a test"], level=level)
+
+    decoded, texts = read_png(dest.getvalue())
+    assert texts == [b"Comment\0made by a test"]
+    assert np.array_equal(decoded, quantize(canvas, 255))
+
+
+def test_png_pieces_compressed_in_parallel(monkeypatch):
+    monkeypatch.setattr(PNG, "piece_bytes", 100)
+    pixels = np.random.default_rng(0).random((40, 9, 3))
+    dest = BytesIO()
+
+    PNG.save_rows(9, 40, (pixels[y : y + 7] for y in range(0, 40, 7)), dest, threads=3)
+
+    decoded, _ = read_png(dest.getvalue())
+    assert np.array_equal(decoded, quantize(pixels, 255))
+
+
+def test_filter_rows_picks_per_row():
+    flat = np.full((1, 12), 7, dtype=np.uint8)
+    ramp = (np.arange(12, dtype=np.uint8) * 3)[np.newaxis]
+    pixels = np.vstack([flat, flat, ramp])
+
+    filtered = filter_rows(pixels, np.zeros(12, dtype=np.uint8))
+
+    # The first row is best predicted from the left, the second from above
+    assert filtered[:, 0].tolist()[:2] == [1, 2]
+    assert not filtered[1, 1:].any()
+
+
+def test_pfm_round_trip():
+    pixels = np.random.default_rng(0).uniform(0, 4, (3, 5, 3))
+    dest = BytesIO()
+
+    PFM.save(Canvas.from_array(pixels), dest)
+
+    assert dest.getvalue().startswith(b"PF\n5 3\n-1.0\n")
+    dest.seek(0)
+    loaded, comments = load_image(dest)
+    assert comments == []
+    assert np.array_equal(loaded.pixels, pixels.astype(np.float32))
+
+
+class Unseekable(BytesIO):
+    def seekable(self):
+        return False
+
+
+@pytest.mark.parametrize("destination", [BytesIO, Unseekable])
+def test_pfm_save_rows_matches_save(destination):
+    pixels = np.random.default_rng(0).uniform(0, 4, (7, 4, 3))
+    streamed = destination()
+
+    PFM.save_rows(4, 7, (pixels[y : y + 3] for y in range(0, 7, 3)), streamed)
+
+    expected = b"PF\n4 7\n-1.0\n" + pixels[::-1].astype("<f4").tobytes()
+    assert streamed.getvalue() == expected
+
+
+def test_pfm_save_mapped_canvas_in_bands(tmp_path, monkeypatch):
+    # Two rows per band
+    monkeypatch.setattr("pytracer.canvas.BAND_BYTES", 2 * 4 * 3 * 8)
+    pixels = np.random.default_rng(0).uniform(0, 4, (5, 4, 3))
+    mapped = MappedCanvas(4, 5, str(tmp_path / "canvas"))
+    mapped.write_pixels(0, 0, pixels)
+    saved = BytesIO()
+
+    PFM.save(mapped, saved)
+
+    assert saved.getvalue() == (
+        b"PF\n4 5\n-1.0\n" + pixels[::-1].astype("<f4").tobytes()
+    )
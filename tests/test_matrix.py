@@ -202,3 +202,19 @@ def test_multiply_a_product_by_its_inverse():
     m2 = Matrix([[8, 2, 2, 2], [3, -1, 7, 0], [7, 0, 5, 4], [6, -2, 0, 5]])
     m3 = m1 * m2
     assert_matrix_approx_equal(m3 * m2.inverse(), m1)
+
+
+def test_inverse_is_cached():
+    m = Matrix.translation(1, 2, 3)
+
+    assert m.inverse() is m.inverse()
+
+
+def test_changing_a_matrix_drops_its_inverse():
+    m = Matrix.translation(1, 2, 3)
+    m.inverse()
+
+    m[0, 3] = 5
+
+    assert m.inverse() == Matrix.translation(-5, -2, -3)
+    assert m.determinant == approx(1)
@@ -0,0 +1,28 @@
+import pytest
+
+from pytracer.pool import MISSING, RenderPool, _pool_task
+from pytracer.render import render_tile
+
+
+@pytest.mark.parametrize("backend", ["process", "thread", "serial"])
+def test_pool_matches_camera_render(camera, world, backend):
+    with RenderPool(num_processes=2, backend=backend) as pool:
+        canvas = pool.render(camera, world, tile_size=4)
+
+    assert list(canvas) == list(camera.render(world))
+
+
+def test_pool_reuses_cached_world(camera, world):
+    expected = list(camera.render(world))
+    with RenderPool(num_processes=2, backend="process") as pool:
+        first = pool.render(camera, world, key="scene", tile_size=4)
+        second = pool.render(camera, world, key="scene", tile_size=4)
+
+    assert list(first) == expected
+    assert list(second) == expected
+
+
+def test_worker_without_world_reports_missing(camera):
+    tile = (0, 0, 1, 1)
+
+    assert _pool_task(render_tile, "unknown", None, camera, tile, {}) == (tile, MISSING)
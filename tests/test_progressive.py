@@ -0,0 +1,51 @@
+import numpy as np
+
+from pytracer.progressive import fill_nearest, render_progressive
+
+from .conftest import CountingWorld
+
+
+def test_final_pass_matches_full_render(camera, world):
+    expected = camera.render(world)
+
+    passes = [
+        list(canvas) for canvas in render_progressive(camera, world, num_processes=2)
+    ]
+
+    assert len(passes) == 4
+    assert passes[-1] == list(expected)
+
+
+def test_each_pixel_traced_once(camera, world):
+    counting = CountingWorld(shapes=world.shapes, lights=world.lights)
+    CountingWorld.reset()
+
+    for _ in render_progressive(camera, counting, backend="serial"):
+        pass
+
+    # None of the test materials spawn secondary rays
+    assert CountingWorld.colors == camera.hsize * camera.vsize
+
+
+def test_abort_after_first_pass(camera, world):
+    counting = CountingWorld(shapes=world.shapes, lights=world.lights)
+    CountingWorld.reset()
+
+    passes = render_progressive(camera, counting, backend="serial")
+    next(passes)
+    passes.close()
+
+    # 2 x 1 grid of samples at stride 8
+    assert CountingWorld.colors == 2
+
+
+def test_fill_nearest():
+    samples = np.zeros((3, 3, 3))
+    samples[0, 0] = 1
+    samples[0, 2] = 2
+    samples[2, 0] = 3
+    samples[2, 2] = 4
+
+    filled = fill_nearest(samples, 2)
+
+    assert filled[:, :, 0].tolist() == [[1, 1, 2], [1, 1, 2], [3, 3, 4]]
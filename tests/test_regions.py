@@ -0,0 +1,93 @@
+import pytest
+
+from pytracer import Canvas, Color
+from pytracer.cli import merge_cli
+from pytracer.image import PNG
+from pytracer.regions import find_region, merge, parse_region, region_comment
+
+
+def test_parse_region():
+    assert parse_region("0,10,20,30") == (0, 10, 20, 30)
+
+
+def test_parse_invalid_region():
+    with pytest.raises(ValueError):
+        parse_region("0,10,20")
+
+
+def test_region_comment_round_trip():
+    comment = region_comment((1, 2, 3, 4), 10, 20)
+
+    assert find_region(["something else", comment]) == ((1, 2, 3, 4), (10, 20))
+
+
+def test_merge_places_regions():
+    left = Canvas(2, 2, fill=Color(1, 0, 0))
+    right = Canvas(1, 2, fill=Color(0, 0, 1))
+
+    merged = merge(
+        [
+            (left, [region_comment((0, 0, 2, 2), 4, 2)]),
+            (right, [region_comment((3, 0, 4, 2), 4, 2)]),
+        ]
+    )
+
+    assert (merged.width, merged.height) == (4, 2)
+    assert [merged.pixel_at(x, 1) for x in range(4)] == [
+        Color(1, 0, 0),
+        Color(1, 0, 0),
+        Color(0, 0, 0),
+        Color(0, 0, 1),
+    ]
+
+
+def test_merge_rejects_mismatched_images():
+    with pytest.raises(ValueError):
+        merge(
+            [
+                (Canvas(2, 2), [region_comment((0, 0, 2, 2), 4, 2)]),
+                (Canvas(2, 2), [region_comment((0, 0, 2, 2), 8, 2)]),
+            ]
+        )
+
+
+def test_merge_rejects_region_of_wrong_size():
+    with pytest.raises(ValueError):
+        merge([(Canvas(2, 2), [region_comment((0, 0, 3, 2), 4, 2)])])
+
+
+def test_merge_whole_frame_under_regions():
+    merged = merge(
+        [
+            (Canvas(4, 2, fill=Color(1, 0, 0)), []),
+            (Canvas(1, 2, fill=Color(0, 0, 1)), [region_comment((3, 0, 4, 2), 4, 2)]),
+        ]
+    )
+
+    assert merged.pixel_at(0, 0) == Color(1, 0, 0)
+    assert merged.pixel_at(3, 0) == Color(0, 0, 1)
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        # Neither part says where it goes
+        [(Canvas(2, 2), []), (Canvas(2, 2), [])],
+        # A part without a comment that isn't the whole frame
+        [(Canvas(2, 2), [region_comment((2, 0, 4, 2), 4, 2)]), (Canvas(2, 2), [])],
+    ],
+)
+def test_merge_rejects_parts_without_region(parts):
+    with pytest.raises(ValueError):
+        merge(parts)
+
+
+def test_merge_cli_reports_unreadable_images(tmp_path, capsys):
+    png = tmp_path / "part.png"
+    with open(png, "wb") as f:
+        PNG.save(Canvas(2, 2), f)
+
+    for filename in [png, tmp_path / "missing.ppm"]:
+        with pytest.raises(SystemExit):
+            merge_cli([str(filename)])
+        assert f"Could not read {filename}" in capsys.readouterr().err
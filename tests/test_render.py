@@ -0,0 +1,255 @@
+import asyncio
+import importlib
+from contextlib import aclosing
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pytracer import Canvas, Color
+from pytracer.canvas import MappedCanvas
+from pytracer.render import (
+    BACKEND_ENV_VAR,
+    PRECISION_ENV_VAR,
+    generate_tiles,
+    render,
+    render_async,
+    render_tile,
+    resolve_backend,
+    resolve_precision,
+)
+from pytracer.scenecache import load_scene_file
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+# Rays are traced in float64 either way, so float32 renders only differ
+# by the rounding of the stored pixels
+FLOAT32_TOLERANCE = 1e-6
+
+# pytracer.render is shadowed by the render function in the package namespace
+render_module = importlib.import_module("pytracer.render")
+
+
+def test_tiles_cover_image_exactly_once():
+    covered = []
+    for x0, y0, x1, y1 in generate_tiles(10, 7, tile_size=4):
+        covered += [(x, y) for y in range(y0, y1) for x in range(x0, x1)]
+
+    assert sorted(covered) == sorted((x, y) for y in range(7) for x in range(10))
+
+
+def test_render_tile_shape(camera, world):
+    pixels = render_tile(camera, world, (2, 1, 5, 3))
+
+    assert pixels.shape == (2, 3, 3)
+
+
+@pytest.mark.parametrize("backend", ("serial", "thread", "process"))
+def test_backends_match_camera_render(backend, camera, world):
+    expected = camera.render(world)
+
+    canvas = render(
+        camera,
+        world,
+        num_processes=2,
+        show_progress=False,
+        backend=backend,
+        tile_size=4,
+    )
+
+    assert list(canvas) == list(expected)
+
+
+def test_single_process_defaults_to_serial(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    assert resolve_backend(None, 1) == "serial"
+
+
+def test_backend_auto_detects_gil(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+
+    monkeypatch.setattr(render_module, "gil_enabled", lambda: True)
+    assert resolve_backend(None, 4) == "process"
+
+    monkeypatch.setattr(render_module, "gil_enabled", lambda: False)
+    assert resolve_backend(None, 4) == "thread"
+
+
+def test_backend_from_env_var(monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "thread")
+    assert resolve_backend(None, 4) == "thread"
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        resolve_backend("gpu", 4)
+
+
+def test_render_async_yields_every_tile(camera, world):
+    expected = camera.render(world)
+
+    async def collect():
+        return [
+            tile
+            async for tile in render_async(
+                camera, world, num_processes=2, backend="thread", tile_size=4
+            )
+        ]
+
+    tiles = asyncio.run(collect())
+
+    assert len(tiles) == len(list(generate_tiles(11, 7, tile_size=4)))
+    for x0, y0, pixels in tiles:
+        height, width, _ = pixels.shape
+        for y in range(height):
+            for x in range(width):
+                assert Color(*pixels[y, x]) == expected.pixel_at(x0 + x, y0 + y)
+
+
+def test_render_async_starts_at_center(camera, world):
+    async def first_tile():
+        async with aclosing(
+            render_async(camera, world, backend="serial", tile_size=3)
+        ) as tiles:
+            async for x0, y0, _ in tiles:
+                return x0, y0
+
+    assert asyncio.run(first_tile()) == (3, 3)
+
+
+def test_render_async_cancellation(camera, world):
+    async def cancel_after_first_tile():
+        received = []
+
+        async def consume():
+            async for tile in render_async(
+                camera, world, backend="thread", num_processes=1, tile_size=1
+            ):
+                received.append(tile)
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(consume())
+        while not received:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return received
+
+    assert len(asyncio.run(cancel_after_first_tile())) == 1
+
+
+def test_supersampling_averages_subpixel_rays(camera, world):
+    single = render_tile(camera, world, (5, 3, 6, 4))
+    supersampled = render_tile(camera, world, (5, 3, 6, 4), supersampling=3)
+
+    # The center of the sphere is smoothly shaded, so nearby rays agree
+    assert np.allclose(single, supersampled, atol=0.01)
+
+
+def test_max_depth_of_zero_is_black(camera, world):
+    pixels = render_tile(camera, world, (5, 3, 6, 4), max_depth=0)
+
+    assert not pixels.any()
+
+
+def test_render_region(camera, world):
+    full = camera.render(world)
+
+    canvas = render(
+        camera,
+        world,
+        backend="serial",
+        show_progress=False,
+        tile_size=4,
+        region=(3, 2, 9, 7),
+    )
+
+    assert (canvas.width, canvas.height) == (6, 5)
+    for y in range(5):
+        for x in range(6):
+            assert canvas.pixel_at(x, y) == full.pixel_at(x + 3, y + 2)
+
+
+def test_region_outside_image(camera, world):
+    with pytest.raises(ValueError):
+        render(camera, world, backend="serial", region=(0, 0, 12, 7))
+
+
+def test_render_into_mapped_canvas(tmp_path, camera, world):
+    mapped = MappedCanvas(6, 5, str(tmp_path / "canvas"))
+
+    canvas = render(
+        camera,
+        world,
+        backend="thread",
+        num_processes=2,
+        show_progress=False,
+        tile_size=4,
+        region=(3, 2, 9, 7),
+        canvas=mapped,
+    )
+
+    assert canvas is mapped
+    assert np.allclose(canvas.pixels, camera.render(world).pixels[2:7, 3:9])
+
+
+def test_canvas_must_fit_region(camera, world):
+    with pytest.raises(ValueError):
+        render(camera, world, backend="serial", canvas=Canvas(11, 6))
+
+
+def test_precision_defaults_to_float64(monkeypatch):
+    monkeypatch.delenv(PRECISION_ENV_VAR, raising=False)
+    assert resolve_precision(None) == "float64"
+
+
+def test_precision_from_env_var(monkeypatch):
+    monkeypatch.setenv(PRECISION_ENV_VAR, "float32")
+    assert resolve_precision(None) == "float32"
+
+
+def test_invalid_precision():
+    with pytest.raises(ValueError):
+        resolve_precision("float16")
+
+
+@pytest.mark.parametrize("backend", ("serial", "process"))
+def test_float32_render(backend, camera, world):
+    canvas = render(
+        camera,
+        world,
+        num_processes=2,
+        show_progress=False,
+        backend=backend,
+        tile_size=4,
+        precision="float32",
+    )
+
+    assert canvas.pixels.dtype == np.float32
+    assert render_tile(camera, world, (0, 0, 2, 2), precision="float32").dtype == (
+        np.float32
+    )
+
+
+@pytest.mark.parametrize(
+    "scene",
+    [
+        "scene.yaml",
+        "scene_reflection.yaml",
+        "sphere_in_glass.yaml",
+        "transparency.yaml",
+    ],
+)
+def test_float32_matches_float64_on_examples(scene):
+    camera, world = load_scene_file(str(EXAMPLES / scene), use_cache=False)
+    camera.hsize, camera.vsize = 16, 10
+
+    double, single = (
+        render(camera, world, backend="serial", show_progress=False, precision=p)
+        for p in ("float64", "float32")
+    )
+
+    assert np.allclose(
+        single.pixels, double.pixels, rtol=FLOAT32_TOLERANCE, atol=FLOAT32_TOLERANCE
+    )
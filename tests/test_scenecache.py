@@ -0,0 +1,165 @@
+import os
+import shutil
+from pathlib import Path
+from textwrap import dedent
+
+import numpy as np
+import pytest
+
+from pytracer import scenecache
+from pytracer.scenecache import cache_path, load_scene_file
+from pytracer.serialization import load_yaml
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+@pytest.fixture
+def scene_file(tmp_path):
+    filename = tmp_path / "scene.yaml"
+    shutil.copy(EXAMPLES / "scene_reflection.yaml", filename)
+    return str(filename)
+
+
+def no_parsing(*args):
+    raise AssertionError("Scene was parsed")
+
+
+@pytest.mark.parametrize(
+    "name", ["scene.yaml", "scene_reflection.yaml", "transparency.yaml"]
+)
+def test_compiled_scene_matches_yaml(tmp_path, name, monkeypatch):
+    filename = str(tmp_path / name)
+    shutil.copy(EXAMPLES / name, filename)
+    with open(filename) as f:
+        expected_camera, expected_world = load_yaml(f.read())
+    load_scene_file(filename)
+    monkeypatch.setattr(scenecache, "parse_scene", no_parsing)
+
+    camera, world = load_scene_file(filename)
+
+    for c in (camera, expected_camera):
+        c.hsize, c.vsize = 16, 8
+    assert list(camera.render(world)) == list(expected_camera.render(expected_world))
+    assert camera.transform == expected_camera.transform
+    assert world.lights == expected_world.lights
+    for shape, expected in zip(world.shapes, expected_world.shapes, strict=True):
+        assert type(shape) is type(expected)
+        assert shape.transform == expected.transform
+        assert shape.material == expected.material
+
+
+def test_edited_scene_is_parsed_again(scene_file):
+    load_scene_file(scene_file)
+    with open(scene_file) as f:
+        text = f.read()
+    with open(scene_file, "w") as f:
+        f.write(text.replace("hsize: ", "hsize: 1"))
+
+    camera, _ = load_scene_file(scene_file)
+
+    assert camera.hsize == load_yaml(text.replace("hsize: ", "hsize: 1"))[0].hsize
+
+
+def test_unreadable_cache_is_ignored(scene_file):
+    with open(cache_path(scene_file), "wb") as f:
+        f.write(b"not a cache")
+
+    camera, world = load_scene_file(scene_file)
+
+    assert world.shapes
+    assert load_scene_file(scene_file)[1].shapes
+
+
+def test_cache_can_be_skipped(scene_file):
+    load_scene_file(scene_file, use_cache=False)
+
+    assert not os.path.exists(cache_path(scene_file))
+
+
+def test_shared_materials_stay_shared(tmp_path, monkeypatch):
+    filename = str(tmp_path / "scene.yaml")
+    shutil.copy(EXAMPLES / "scene.yaml", filename)
+    with open(filename) as f:
+        _, expected = load_yaml(f.read())
+    load_scene_file(filename)
+    monkeypatch.setattr(scenecache, "parse_scene", no_parsing)
+
+    _, world = load_scene_file(filename)
+
+    def sharing(world):
+        return [
+            [shape.material is other.material for other in world.shapes]
+            for shape in world.shapes
+        ]
+
+    assert sharing(world) == sharing(expected)
+
+
+def test_changed_array_file_is_loaded_again(tmp_path):
+    scene = dedent(
+        """
+        camera:
+          hsize: 10
+          vsize: 5
+          field_of_view: "pi/2"
+          view_transform:
+            from: [0, 0, -5]
+            to: [0, 0, 0]
+            up: [0, 1, 0]
+        shapes:
+          - array:
+              sphere:
+                material:
+                  color:
+                    rgb: [255, 0, 0]
+              positions: positions.npy
+        """
+    )
+    filename = tmp_path / "scene.yaml"
+    filename.write_text(scene)
+    np.save(tmp_path / "positions.npy", np.zeros((3, 3)))
+    load_scene_file(str(filename))
+    np.save(tmp_path / "positions.npy", np.ones((5, 3)))
+
+    _, world = load_scene_file(str(filename))
+
+    assert len(world.shapes) == 5
+    assert world.shapes[-1].transform.cells[:3, 3].tolist() == [1, 1, 1]
+
+
+def test_shared_transforms_stay_shared(tmp_path, monkeypatch):
+    filename = tmp_path / "scene.yaml"
+    filename.write_text(
+        dedent(
+            """
+            camera:
+              hsize: 10
+              vsize: 5
+              field_of_view: "pi/2"
+              view_transform:
+                from: [0, 0, -5]
+                to: [0, 0, 0]
+                up: [0, 1, 0]
+            transforms:
+              up:
+                - translation: [0, 1, 0]
+            shapes:
+              - sphere:
+                  material:
+                    color:
+                      rgb: [255, 0, 0]
+                  transforms: up
+              - plane:
+                  material:
+                    color:
+                      rgb: [0, 255, 0]
+                  transforms: up
+            """
+        )
+    )
+    load_scene_file(str(filename))
+    monkeypatch.setattr(scenecache, "parse_scene", no_parsing)
+
+    _, world = load_scene_file(str(filename))
+
+    assert world.shapes[0].transform is world.shapes[1].transform
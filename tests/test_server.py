@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from io import StringIO
+from textwrap import dedent
+
+import pytest
+
+from pytracer.image import PPM
+from pytracer.pool import RenderPool
+from pytracer.serialization import load_yaml
+from pytracer.server import RenderServer, RenderService
+
+SCENE = dedent(
+    """
+    camera:
+      hsize: 8
+      vsize: 6
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 0, -5]
+        to: [0, 0, 0]
+        up: [0, 1, 0]
+
+    shapes:
+      - sphere:
+          material:
+            color:
+              rgb: [255, 0, 0]
+
+    lights:
+      - position: [-10, 10, -10]
+        color:
+          rgb: [255, 255, 255]
+    """
+)
+
+
+@pytest.fixture
+def service():
+    with RenderPool(num_processes=2, backend="thread") as pool:
+        service = RenderService(pool)
+        yield service
+        service.close()
+
+
+@pytest.fixture
+def url(service):
+    server = RenderServer(("localhost", 0), service)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    host, port = server.server_address[:2]
+    yield f"http://{host!s}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def submit(url, scene, query=""):
+    request = urllib.request.Request(f"{url}/jobs{query}", data=scene.encode())
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 202
+        return json.load(response)
+
+
+def wait_for(url, job_id):
+    for _ in range(200):
+        with urllib.request.urlopen(f"{url}/jobs/{job_id}") as response:
+            status = json.load(response)
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_render_job(url):
+    job = submit(url, SCENE)
+    assert wait_for(url, job["id"])["status"] == "done"
+
+    with urllib.request.urlopen(f"{url}/jobs/{job['id']}/image") as response:
+        assert response.headers["Content-Type"] == "image/x-portable-pixmap"
+        image = response.read().decode()
+
+    camera, world = load_yaml(SCENE)
+    expected = StringIO()
+    PPM.save(camera.render(world), expected)
+    assert image == expected.getvalue()
+
+
+def test_overrides(url):
+    job = submit(url, SCENE, "?width=4&height=3&supersampling=2")
+    wait_for(url, job["id"])
+
+    with urllib.request.urlopen(f"{url}/jobs/{job['id']}/image") as response:
+        canvas, _ = PPM.load(StringIO(response.read().decode()))
+    assert (canvas.width, canvas.height) == (4, 3)
+
+
+def test_scene_is_parsed_once(url, service):
+    for _ in range(2):
+        wait_for(url, submit(url, SCENE)["id"])
+
+    assert (service.scenes.misses, service.scenes.hits) == (1, 1)
+
+
+@pytest.mark.parametrize("scene", ["shapes: [", "", "foo", "- a", "camera: 1"])
+def test_invalid_scene(url, scene):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        submit(url, scene)
+    assert e.value.code == 400
+
+
+def test_unknown_override(url):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        submit(url, SCENE, "?colour=red")
+    assert e.value.code == 400
+
+
+def test_unknown_job(url):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(f"{url}/jobs/nope")
+    assert e.value.code == 404
@@ -0,0 +1,86 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from pytracer.scenecache import load_scene_file
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def imported_modules(code: str) -> set[str]:
+    """Modules imported by running ``code`` in a fresh interpreter"""
+    result = run_python(f"{code}; import sys; print(' '.join(sys.modules))")
+    return set(result.stdout.split())
+
+
+def import_seconds(module: str) -> float:
+    """Cumulative import time of ``module``, from ``python -X importtime``"""
+    result = run_python(f"import {module}")
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+    raise AssertionError(f"{module} not in importtime output")
+
+
+def test_package_import_is_lazy():
+    modules = imported_modules("import pytracer")
+
+    assert "numpy" not in modules
+    assert "pytracer.world" not in modules
+
+
+def test_package_names_resolve():
+    modules = imported_modules("from pytracer import Color, render")
+
+    assert "pytracer.render" in modules
+
+
+def test_cli_defers_unused_features():
+    modules = imported_modules("import pytracer.cli")
+
+    for name in (
+        "numpy",
+        "yaml",
+        "rich",
+        "asyncio",
+        "http.server",
+        "pytracer.render",
+        "pytracer.animation",
+    ):
+        assert name not in modules
+
+
+def test_compiled_scene_skips_yaml(tmp_path):
+    filename = tmp_path / "scene.yaml"
+    shutil.copy(EXAMPLES / "scene.yaml", filename)
+    load_scene_file(str(filename))
+
+    modules = imported_modules(
+        f"from pytracer.scenecache import load_scene_file; "
+        f"load_scene_file({str(filename)!r})"
+    )
+
+    assert "yaml" not in modules
+
+
+def test_cli_import_time():
+    # The CLI took close to 300ms to import when it loaded NumPy and the
+    # renderer up front, and takes a fraction of NumPy's own import time
+    # without them. Comparing the two holds on fast and slow machines
+    # alike. Best of a few, interleaved, to ride out a busy machine.
+    cli, numpy = zip(
+        *((import_seconds("pytracer.cli"), import_seconds("numpy")) for _ in range(3))
+    )
+    assert min(cli) < min(numpy) / 2
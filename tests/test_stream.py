@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from pytracer.stream import render_rows
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_bands_make_up_the_image(camera, world, backend):
+    expected = camera.render(world)
+
+    bands = list(
+        render_rows(camera, world, num_processes=2, backend=backend, tile_size=3)
+    )
+
+    assert [band.shape for band in bands] == [(3, 11, 3), (3, 11, 3), (1, 11, 3)]
+    assert np.allclose(np.concatenate(bands), expected.pixels)
+
+
+def test_window_of_one(camera, world):
+    bands = list(render_rows(camera, world, backend="serial", tile_size=2, window=1))
+
+    assert np.allclose(np.concatenate(bands), camera.render(world).pixels)
+
+
+def test_region(camera, world):
+    expected = camera.render(world).pixels[2:6, 3:10]
+
+    bands = list(
+        render_rows(camera, world, backend="thread", tile_size=3, region=(3, 2, 10, 6))
+    )
+
+    assert np.allclose(np.concatenate(bands), expected)
+
+
+def test_float32_bands(camera, world):
+    bands = list(render_rows(camera, world, backend="serial", precision="float32"))
+
+    assert all(band.dtype == np.float32 for band in bands)
+    assert np.allclose(np.concatenate(bands), camera.render(world).pixels)
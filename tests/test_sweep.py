@@ -0,0 +1,213 @@
+from textwrap import dedent
+
+import pytest
+
+from pytracer import Color, Material, Point, PointLight
+from pytracer.render import render
+from pytracer.serialization import load_sweep_yaml
+from pytracer.sweep import Variant, render_sweep
+
+from .conftest import CountingWorld
+
+
+@pytest.fixture
+def variants():
+    return [
+        Variant("base"),
+        Variant("red", {0: Material(color=Color(1, 0, 0))}),
+        Variant("mirror", {0: Material(color=Color(0, 0, 1), reflective=0.5)}),
+        Variant(
+            "glass",
+            {0: Material(Color(0, 0, 0), transparency=0.9, refractive_index=1.5)},
+        ),
+        Variant(
+            "lights", lights=[PointLight(Point(10, 10, -10), Color(0.5, 0.5, 0.5))]
+        ),
+    ]
+
+
+@pytest.mark.parametrize("supersampling", [1, 2])
+def test_variants_match_render(camera, world, variants, supersampling):
+    canvases = render_sweep(
+        camera, world, variants, backend="serial", supersampling=supersampling
+    )
+
+    for variant, canvas in zip(variants, canvases):
+        expected = render(
+            camera,
+            variant.apply(world),
+            show_progress=False,
+            backend="serial",
+            supersampling=supersampling,
+        )
+        assert list(canvas) == list(expected), variant.name
+
+
+def test_process_backend(camera, world, variants):
+    canvases = render_sweep(
+        camera, world, variants, num_processes=2, backend="process", tile_size=4
+    )
+
+    assert list(canvases[1]) == list(camera.render(variants[1].apply(world)))
+
+
+def test_variant_keeps_bvh(world):
+    world.build_bvh()
+
+    applied = Variant("red", {0: Material(color=Color(1, 0, 0))}).apply(world)
+
+    assert applied.bvh is world.bvh
+    assert applied.shapes[0].material.color == Color(1, 0, 0)
+
+
+def test_variants_applied_once(camera, world, variants, monkeypatch):
+    applied = []
+    apply = Variant.apply
+
+    def counting_apply(variant, world):
+        applied.append(variant.name)
+        return apply(variant, world)
+
+    monkeypatch.setattr(Variant, "apply", counting_apply)
+    render_sweep(camera, world, variants, backend="serial", tile_size=4)
+
+    assert applied == [variant.name for variant in variants]
+
+
+def test_material_variants_share_geometry(camera, world):
+    counting = CountingWorld(shapes=world.shapes, lights=world.lights)
+    colors = [Color(1, 0, 0), Color(0, 1, 0), Color(0, 0, 1)]
+
+    CountingWorld.reset()
+    render_sweep(camera, counting, [Variant()], backend="serial")
+    one = CountingWorld.intersections
+
+    CountingWorld.reset()
+    render_sweep(
+        camera,
+        counting,
+        [Variant(materials={0: Material(color=color)}) for color in colors],
+        backend="serial",
+    )
+
+    assert CountingWorld.intersections == one
+
+
+SCENE = dedent(
+    """
+    camera:
+      hsize: 10
+      vsize: 5
+      field_of_view: "pi/2"
+      view_transform:
+        from: [0, 0, -5]
+        to: [0, 0, 0]
+        up: [0, 1, 0]
+
+    colors:
+      red:
+        rgb: [255, 0, 0]
+
+    materials:
+      shiny:
+        color: red
+        specular: 0.8
+
+    shapes:
+      - sphere:
+          material: shiny
+      - plane:
+          material:
+            color: red
+      - sphere:
+          material: shiny
+          transforms:
+            - translation: [2, 0, 0]
+
+    lights:
+      - position: [-10, 10, -10]
+
+    sweep:
+      materials:
+        shiny:
+          - color: red
+          - color:
+              hex: 00ff00
+            reflective: 0.5
+      lights:
+        - position: [-10, 10, -10]
+        - - position: [10, 10, -10]
+          - position: [0, 10, -10]
+    """
+)
+
+
+def test_load_sweep_yaml():
+    _, world, variants = load_sweep_yaml(SCENE)
+
+    assert len(world.shapes) == 3
+    assert [variant.name for variant in variants] == [
+        "shiny0-lights0",
+        "shiny0-lights1",
+        "shiny1-lights0",
+        "shiny1-lights1",
+    ]
+    green = variants[2]
+    assert set(green.materials) == {0, 2}
+    assert green.materials[0].color == Color(0, 1, 0)
+    assert green.materials[0].reflective == 0.5
+    assert green.materials[0].specular == 0.8
+    assert len(variants[1].lights) == 2
+
+
+def test_scene_without_sweep_has_one_variant():
+    _, _, variants = load_sweep_yaml(SCENE.split("sweep:")[0])
+
+    assert variants == [Variant()]
+
+
+def test_sweep_extended_material():
+    scene = SCENE.replace(
+        "\nshapes:\n", "  glossy:\n    extend: shiny\n    reflective: 0.2\n\nshapes:\n"
+    )
+    scene = scene.replace("material: shiny\n  - plane", "material: glossy\n  - plane")
+    scene = scene.replace("    shiny:\n      - color", "    glossy:\n      - color")
+
+    _, _, variants = load_sweep_yaml(scene)
+
+    green = variants[2].materials[0]
+    assert set(variants[2].materials) == {0}
+    assert green.color == Color(0, 1, 0)
+    assert green.specular == 0.8
+    assert green.reflective == 0.5
+    assert variants[0].materials[0].reflective == 0.2
+
+
+def test_sweep_scene_with_array():
+    scene = SCENE.split("shapes:")[0] + dedent(
+        """
+        shapes:
+          - array:
+              sphere:
+                material:
+                  color: red
+              positions: [[0, 0, 0], [2, 0, 0], [4, 0, 0]]
+          - sphere:
+              material: shiny
+          - array:
+              sphere:
+                material: shiny
+              positions: [[0, 2, 0], [2, 2, 0]]
+
+        sweep:
+          materials:
+            shiny:
+              - reflective: 0.5
+        """
+    )
+
+    _, world, variants = load_sweep_yaml(scene)
+
+    assert len(world.shapes) == 6
+    assert set(variants[0].materials) == {3, 4, 5}
+    assert variants[0].materials[3].reflective == 0.5
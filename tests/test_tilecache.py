@@ -0,0 +1,107 @@
+from copy import copy
+
+import numpy as np
+import pytest
+
+from pytracer import Color, Material, Point, PointLight, World
+from pytracer.render import RenderReport, render
+from pytracer.tilecache import TileCache, scene_fingerprint
+
+
+def test_fingerprint_is_stable(camera, world):
+    other = World(shapes=[copy(shape) for shape in world.shapes], lights=world.lights)
+    other.build_bvh()
+    camera.pixel_size
+
+    assert scene_fingerprint(camera, world) == scene_fingerprint(camera, other)
+
+
+def test_fingerprint_changes_with_scene(camera, world):
+    fingerprint = scene_fingerprint(camera, world, supersampling=1)
+    moved = World(
+        shapes=world.shapes, lights=[PointLight(Point(10, 10, -10), Color(1, 1, 1))]
+    )
+    recolored = World(shapes=[copy(shape) for shape in world.shapes])
+    recolored.lights = world.lights
+    recolored.shapes[0].material = Material(color=Color(0, 0, 1))
+
+    assert scene_fingerprint(camera, world, supersampling=2) != fingerprint
+    assert scene_fingerprint(camera, moved, supersampling=1) != fingerprint
+    assert scene_fingerprint(camera, recolored, supersampling=1) != fingerprint
+
+
+def test_render_reuses_cached_tiles(tmp_path, camera, world):
+    cache = TileCache(str(tmp_path))
+    first, second = RenderReport(), RenderReport()
+
+    expected = render(
+        camera, world, backend="serial", tile_size=4, cache=cache, report=first
+    )
+    canvas = render(
+        camera, world, backend="serial", tile_size=4, cache=cache, report=second
+    )
+
+    assert (first.cache_hits, first.cache_misses) == (0, 6)
+    assert (second.cache_hits, second.cache_misses) == (6, 0)
+    assert (cache.hits, cache.misses) == (6, 6)
+    assert list(canvas) == list(expected)
+
+
+def test_settings_change_misses(tmp_path, camera, world):
+    cache = TileCache(str(tmp_path))
+    render(camera, world, backend="serial", tile_size=4, cache=cache)
+    report = RenderReport()
+
+    render(
+        camera,
+        world,
+        backend="serial",
+        tile_size=4,
+        max_depth=1,
+        cache=cache,
+        report=report,
+    )
+
+    assert report.cache_hits == 0
+
+
+def test_cache_survives_reopening(tmp_path, camera, world):
+    render(camera, world, backend="serial", cache=TileCache(str(tmp_path)))
+    cache = TileCache(str(tmp_path))
+
+    render(camera, world, backend="serial", cache=cache)
+
+    assert cache.hits == 1
+    assert cache.size > 0
+
+
+def test_least_recently_used_tiles_are_evicted(tmp_path):
+    pixels = np.zeros((4, 4, 3))
+    tiles = [(0, 0, 4, 4), (4, 0, 8, 4), (8, 0, 12, 4)]
+    cache = TileCache(str(tmp_path))
+    cache.put("scene", tiles[0], pixels)
+    cache.max_bytes = 2 * cache.size
+    cache.put("scene", tiles[1], pixels)
+    cache.get("scene", tiles[0])
+
+    cache.put("scene", tiles[2], pixels)
+
+    assert cache.size <= cache.max_bytes
+    assert len(list(tmp_path.iterdir())) == 2
+    assert cache.get("scene", tiles[1]) is None
+    assert cache.get("scene", tiles[0]) is not None
+
+
+def test_unreadable_tile_is_a_miss(tmp_path):
+    cache = TileCache(str(tmp_path))
+    cache.put("scene", (0, 0, 2, 2), np.zeros((2, 2, 3)))
+    for path in tmp_path.iterdir():
+        path.write_bytes(b"not an array")
+
+    assert cache.get("scene", (0, 0, 2, 2)) is None
+    assert cache.misses == 1
+
+
+def test_budget_cant_use_cache(tmp_path, camera, world):
+    with pytest.raises(ValueError):
+        render(camera, world, budget=1, cache=TileCache(str(tmp_path)))
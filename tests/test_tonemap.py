@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from pytracer.canvas import Canvas
+from pytracer.tonemap import aces, grade, reinhard, srgb_encode
+
+
+def test_default_grade_clamps():
+    canvas = Canvas.from_array(np.array([[[-0.5, 0.25, 3.0]]]))
+
+    assert grade(canvas).pixels.tolist() == [[[0, 0.25, 1]]]
+
+
+def test_exposure_is_in_stops():
+    canvas = Canvas.from_array(np.full((1, 1, 3), 0.125))
+
+    assert np.allclose(grade(canvas, exposure=2).pixels, 0.5)
+
+
+def test_reinhard():
+    pixels = np.array([0.0, 1.0, 3.0, 100.0])
+
+    assert np.allclose(reinhard(pixels), [0, 0.5, 0.75, 100 / 101])
+    assert np.allclose(reinhard(pixels, white=3)[2:], 1)
+
+
+def test_aces_keeps_highlights_apart():
+    mapped = aces(np.array([0.0, 1.0, 2.0, 4.0]))
+
+    assert mapped[0] == pytest.approx(0, abs=1e-3)
+    assert np.all(np.diff(mapped) > 0)
+    assert mapped[-1] <= 1
+
+
+def test_srgb_lookup_matches_curve():
+    linear = np.linspace(0, 1, 1001)
+    exact = np.where(
+        linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055
+    )
+
+    assert np.abs(srgb_encode(linear) - exact).max() * 255 < 1
+    assert np.allclose(srgb_encode(np.array([0.0, 1.0, 2.0])), [0, 1, 1])
+
+
+def test_unknown_tonemap():
+    with pytest.raises(ValueError):
+        grade(Canvas(1, 1), tonemap="filmic")
+    with pytest.raises(ValueError):
+        grade(Canvas(1, 1), tonemap="aces", white=2)
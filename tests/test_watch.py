@@ -0,0 +1,137 @@
+from io import StringIO
+from textwrap import dedent
+
+import pytest
+import yaml
+
+from pytracer.image import PPM
+from pytracer.pool import RenderPool
+from pytracer.serialization import load_yaml
+from pytracer.watch import SceneWatcher, world_key
+
+SCENE = dedent(
+    """
+    camera:
+      hsize: 7
+      vsize: 5
+      field_of_view: "pi/2"
+      view_transform:
+        from: [{eye}, 0, -5]
+        to: [0, 0, 0]
+        up: [0, 1, 0]
+
+    shapes:
+      - sphere:
+          material:
+            color:
+              rgb: [{red}, 0, 0]
+            reflective: 0.3
+          transforms:
+            - translation: [{x}, 0, 0]
+      - plane:
+          material:
+            color:
+              rgb: [255, 255, 255]
+          transforms:
+            - translation: [0, -1, 0]
+
+    lights:
+      - position: [-10, 10, -10]
+        color:
+          rgb: [255, 255, 255]
+    """
+)
+
+
+def scene(eye=0, red=255, x=0):
+    return SCENE.format(eye=eye, red=red, x=x)
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    with RenderPool(num_processes=2, backend="thread") as pool:
+        yield SceneWatcher(
+            str(tmp_path / "scene.yaml"), str(tmp_path / "out.ppm"), pool, tile_size=2
+        )
+
+
+def edit(watcher, text):
+    with open(watcher.filename, "w") as f:
+        f.write(text)
+    return watcher.update()
+
+
+def assert_rendered(watcher, text):
+    camera, world = load_yaml(text)
+    image = StringIO()
+    PPM.save(camera.render(world), image)
+    with open(watcher.output) as f:
+        assert f.read() == image.getvalue()
+
+
+def test_world_key_ignores_camera():
+    a = yaml.safe_load(scene(eye=0))
+    b = yaml.safe_load(scene(eye=1))
+    c = yaml.safe_load(scene(red=128))
+
+    assert world_key(a) == world_key(b)
+    assert world_key(a) != world_key(c)
+
+
+def test_unchanged_scene_is_skipped(watcher):
+    assert edit(watcher, scene()) == "render"
+    assert watcher.update() is None
+
+
+def test_material_edit_reshades(watcher):
+    edit(watcher, scene())
+
+    assert edit(watcher, scene(red=64)) == "reshade"
+    assert_rendered(watcher, scene(red=64))
+
+
+def test_camera_edit_keeps_world(watcher):
+    edit(watcher, scene())
+    world = watcher.world
+
+    assert edit(watcher, scene(eye=1)) == "render"
+    assert watcher.world is world
+    assert_rendered(watcher, scene(eye=1))
+
+
+def test_geometry_edit_renders(watcher):
+    edit(watcher, scene())
+
+    assert edit(watcher, scene(x=0.5)) == "render"
+    assert_rendered(watcher, scene(x=0.5))
+    # The G-buffer is kept for the next edit
+    assert edit(watcher, scene(x=0.5, red=64)) == "reshade"
+    assert_rendered(watcher, scene(x=0.5, red=64))
+
+
+def test_invalid_scene_keeps_last_render(watcher):
+    edit(watcher, scene())
+    with open(watcher.output) as f:
+        before = f.read()
+
+    with pytest.raises(yaml.YAMLError):
+        edit(watcher, "shapes: [")
+
+    with open(watcher.output) as f:
+        assert f.read() == before
+
+
+def test_empty_scene_is_rejected(watcher):
+    edit(watcher, scene())
+
+    with pytest.raises(ValueError):
+        edit(watcher, "")
+
+
+def test_interrupted_render_is_redone(watcher):
+    with open(watcher.filename, "w") as f:
+        f.write(scene())
+
+    assert watcher.update(stale=lambda: True) == "interrupted"
+    assert watcher.gbuffer is None
+    assert watcher.update() == "render"